@@ -1,42 +1,111 @@
-import datetime
+import argparse
 import sys
 import os
-from svapy.parser import extract_module_ports
-from svapy.core import generate_module_docstring, generate_module, generate_runner
+import time
+from typing import List, Optional
+from svapy.parser import extract_all_module_ports
+from svapy.generate import discover_sources, generate_tree, read_manifest, write_module_files
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: poetry run python main.py <module_name> <file_path.v>")
+USAGE = """poetry run python main.py <module_name>[,<module_name>...] <file_path.v> [<file_path.v> ...]
+       poetry run python main.py --all <file_path.v> [<file_path.v> ...]
+       poetry run python main.py --tree <rtl_dir> | --manifest <file_list> [-j JOBS] [--force]"""
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(usage=USAGE, description="Generate svapy interfaces and test runners")
+    parser.add_argument('targets', nargs='*', help="module names (comma separated, unless --all) followed by Verilog files")
+    parser.add_argument('--all', action='store_true', help="generate for every module found in the files")
+    parser.add_argument('--tree', help="generate for every module of every Verilog file below a directory")
+    parser.add_argument('--manifest', help="generate for every module of the Verilog files listed in a file")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes for --tree/--manifest")
+    parser.add_argument('--force', action='store_true', help="regenerate unchanged modules too")
+    parser.add_argument('-I', '--include', action='append', default=[], help="include directory for the preprocessor")
+    parser.add_argument('-D', '--define', action='append', default=[], help="macro definition for the preprocessor")
+    parser.add_argument('--role', action='append', default=[], metavar='PORT=ROLE',
+                        help="port role overriding name detection: clock, reset, reset_n or data")
+    parser.add_argument('--min-cycles', type=int, default=10, help="shortest sequence drawn by the runners")
+    parser.add_argument('--max-cycles', type=int, default=100, help="longest sequence drawn by the runners")
+    parser.add_argument('--max-examples', type=int, default=20, help="Hypothesis examples per runner")
+    args = parser.parse_args(argv)
+
+    if args.min_cycles < 1 or args.max_cycles < args.min_cycles:
+        parser.error("expected 1 <= --min-cycles <= --max-cycles")
+    if args.max_examples < 1:
+        parser.error("expected --max-examples of at least 1")
+    args.runner_settings = {'min_cycles': args.min_cycles, 'max_cycles': args.max_cycles,
+                            'max_examples': args.max_examples}
+
+    args.roles = {}
+    for item in args.role:
+        port, sep, role = item.partition('=')
+        if not sep:
+            parser.error(f"expected PORT=ROLE, got {item}")
+        args.roles[port] = role
+
+    if args.tree or args.manifest:
+        args.modules = None
+        args.files = args.targets
+    elif args.all:
+        if not args.targets:
+            parser.error("expected at least one Verilog file")
+        args.modules = None
+        args.files = args.targets
+    else:
+        if len(args.targets) < 2:
+            parser.error("expected a module name and at least one Verilog file")
+        args.modules = [m for m in args.targets[0].split(',') if m]
+        args.files = args.targets[1:]
+    return args
+
+def run_tree(args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+    sources = list(args.files)
+    if args.tree:
+        sources += discover_sources(args.tree)
+    if args.manifest:
+        sources += read_manifest(args.manifest)
+
+    try:
+        results = generate_tree(sources, include=args.include, define=args.define, jobs=args.jobs, force=args.force,
+                                runner_settings=args.runner_settings, roles=args.roles)
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    errors = [r for r in results if r.error is not None]
+    generated = sum(len(r.modules) for r in results if not r.skipped and r.error is None)
+    skipped = sum(len(r.modules) for r in results if r.skipped)
+    for result in errors:
+        print(f"Error: {result.source}: {result.error}")
+    print(f"Generated {generated} module(s), skipped {skipped} unchanged, "
+          f"{len(errors)} error(s) in {time.perf_counter() - start:.2f}s")
+    if errors:
         sys.exit(1)
-    
-    module_name = sys.argv[1]
-    file_path = sys.argv[2]
-    
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    args = parse_args(argv)
+    if args.tree or args.manifest:
+        run_tree(args)
+        return
+
     try:
-        ports = extract_module_ports(module_name, file_path)
-        os.makedirs('gen', exist_ok=True)
-
-        docstring = generate_module_docstring(module_name, ports)
-        interface_path = os.path.join('gen', f"{module_name}_interface.py")
-        interface_code = generate_module(module_name, ports)
-        with open(interface_path, "w") as f:
-            f.write("# Auto-generated interface\n")
-            f.write(f"# Module: {module_name}\n")
-            f.write(f"# Created: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(interface_code)
-        print(f"Interface generated: {interface_path}")
-        # print (docstring)
-
-        runner_code = generate_runner(module_name, ports)
-        runner_path = os.path.join('gen', f"run_{module_name}.py")
-        with open(runner_path, 'w') as f:
-            f.write(runner_code)
-        print(f"Runner generated: {runner_path}")
+        # All files are parsed together once, whatever the number of modules
+        modules = extract_all_module_ports(args.files, include=args.include, define=args.define, roles=args.roles)
+        targets = args.modules if args.modules is not None else list(modules)
+        for module_name in targets:
+            if module_name not in modules:
+                raise ValueError(f"Module '{module_name}' not found in {', '.join(args.files)}")
+
+        for module_name in targets:
+            interface_path, runner_path = write_module_files(module_name, modules[module_name], args.files,
+                                                             runner_settings=args.runner_settings)
+            print(f"Interface generated: {interface_path}")
+            print(f"Runner generated: {runner_path}")
 
     except Exception as e:
         print(f"Error: {str(e)}")
         sys.exit(1)
-    
+
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,8 @@
+import numpy as np
+
+from svapy.refmodel import as_batch, last_index, previous
+
+
 def reference_counter(clk_seq, rst_n_seq):
     """
     Reference model of the Verilog counter module.
@@ -25,3 +30,27 @@ def reference_counter(clk_seq, rst_n_seq):
         
 
     return count_seq
+
+
+def reference_counter_batch(clk_seq, rst_n_seq):
+    """
+    Vectorized reference model of the Verilog counter module.
+
+    Args:
+        clk_seq (array): Clock values, shaped (examples, cycles).
+        rst_n_seq (array): Reset values, shaped (examples, cycles).
+
+    Returns:
+        numpy.ndarray: Counter values, shaped (examples, cycles).
+    """
+    clk, rst_n = as_batch(clk_seq, rst_n_seq)
+
+    # Count since the latest reset: running sum of increments minus its value at that reset
+    increments = ((clk != 0) & (rst_n != 0)).astype(np.int64)
+    total = np.cumsum(increments, axis=1)
+    reset = last_index(rst_n == 0)
+    base = np.take_along_axis(total, np.maximum(reset, 0), axis=1)
+    count = np.where(reset >= 0, total - base, total)
+
+    # Each cycle reports the count from before its own update
+    return previous(count)
@@ -1,3 +1,8 @@
+import numpy as np
+
+from svapy.refmodel import as_batch, hold, previous
+
+
 def reference_multiplier(clk_seq, rst_n_seq, valid_in_seq, data_in_seq):
     """
     Reference model for the pipelined multiplier with saturation.
@@ -58,3 +63,35 @@ def reference_multiplier(clk_seq, rst_n_seq, valid_in_seq, data_in_seq):
         prev_clk = clk
     
     return valid_out_seq, data_out_seq
+
+
+def reference_multiplier_batch(clk_seq, rst_n_seq, valid_in_seq, data_in_seq):
+    """
+    Vectorized reference model for the pipelined multiplier with saturation.
+
+    Args:
+        clk_seq (array): Clock values, shaped (examples, cycles)
+        rst_n_seq (array): Reset values, shaped (examples, cycles)
+        valid_in_seq (array): Valid input signals, shaped (examples, cycles)
+        data_in_seq (array): Input data values (0-255), shaped (examples, cycles)
+
+    Returns:
+        tuple: (valid_out, data_out) arrays, shaped (examples, cycles)
+    """
+    clk, rst_n, valid_in, data_in = as_batch(clk_seq, rst_n_seq, valid_in_seq, data_in_seq)
+
+    # The registers load the inputs of the previous cycle
+    prev_valid_in = previous(valid_in)
+    prev_data_in = previous(data_in.astype(np.int64))
+    prev_clk = previous(clk)
+
+    next_data_val = np.where(prev_valid_in != 0, np.where(prev_data_in < 128, prev_data_in * 2, 255), 0)
+    next_valid_val = prev_valid_in
+
+    # Reset clears the registers, a rising clock edge loads them, otherwise they hold
+    in_reset = rst_n == 0
+    load = in_reset | ((prev_clk == 0) & (clk == 1))
+    valid_out = hold(np.where(in_reset, 0, next_valid_val), load)
+    data_out = hold(np.where(in_reset, 0, next_data_val), load)
+
+    return valid_out, data_out
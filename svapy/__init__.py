@@ -0,0 +1,3 @@
+"""
+Svapy: property-based testing of Verilog modules with Hypothesis.
+"""
@@ -0,0 +1,146 @@
+"""
+Collision-free allocation of testbench artifacts.
+
+Every process draws testbench names from its own namespace, built from the
+pytest-xdist worker id and a random token, plus a per-process counter, so
+allocating a name never lists ``gen/tests`` and concurrent workers never pick
+the same one. Files are claimed with ``O_CREAT | O_EXCL``, which makes the
+claim atomic even if two namespaces ever clash.
+
+Each allocation is appended to a per-process JSONL shard under
+``gen/manifest/``. Shards have a single writer, so they need no locking;
+``read_manifest`` merges them into an index from example id to artifacts.
+"""
+import glob
+import itertools
+import json
+import os
+import secrets
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from svapy.vectors import VECTOR_DIR
+
+TEST_DIR = os.path.join('gen', 'tests')
+DUMP_DIR = os.path.join('gen', 'dump')
+MANIFEST_DIR = os.path.join('gen', 'manifest')
+
+def worker_id() -> str:
+    """
+    Returns the pytest-xdist worker id (gw0, gw1, ...) or 'main' outside xdist
+    """
+    return os.environ.get('PYTEST_XDIST_WORKER', 'main')
+
+@dataclass
+class Allocation:
+    """Artifacts reserved for one drive_<module> call"""
+    example: str
+    module: str
+    worker: str
+    mode: str
+    cycles: int
+    testbench: str
+    dump: str
+    vectors: str
+    created: float
+
+class ArtifactAllocator:
+    """
+    Hands out unique testbench, dump and vector paths for one module.
+
+    :param module_name: Module under test
+    :param test_dir: Directory receiving testbenches
+    :param dump_dir: Directory receiving VCD dumps
+    :param vector_dir: Directory receiving vector files
+    :param manifest_dir: Directory receiving the manifest shards
+    :param worker: Worker id, defaults to worker_id()
+    :param token: Namespace token, random by default
+    """
+
+    def __init__(self, module_name: str, test_dir: str = TEST_DIR, dump_dir: str = DUMP_DIR,
+                 vector_dir: str = VECTOR_DIR, manifest_dir: str = MANIFEST_DIR,
+                 worker: Optional[str] = None, token: Optional[str] = None) -> None:
+        self.module_name = module_name
+        self.test_dir = test_dir
+        self.dump_dir = dump_dir
+        self.vector_dir = vector_dir
+        self.manifest_dir = manifest_dir
+        self.worker = worker or worker_id()
+        self.namespace = f'{self.worker}_{token or secrets.token_hex(4)}'
+        self.manifest = os.path.join(manifest_dir, f'{module_name}_{self.namespace}.jsonl')
+        self._counter = itertools.count()
+
+    def _claim(self, example: str) -> str:
+        path = os.path.join(self.test_dir, f'{self.module_name}_tb_{example}.sv')
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        return path
+
+    def allocate(self, mode: str = 'unrolled', cycles: int = 0) -> Allocation:
+        """
+        Reserves the next testbench path and records it in the manifest
+
+        :param mode: Testbench mode the artifacts are generated for
+        :param cycles: Number of simulated cycles
+        :return: Allocation whose testbench file exists and is empty
+        """
+        for directory in (self.test_dir, self.dump_dir, self.manifest_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        while True:
+            example = f'{self.namespace}_{next(self._counter)}'
+            try:
+                testbench = self._claim(example)
+                break
+            except FileExistsError:
+                continue
+
+        base = f'{self.module_name}_tb_{example}'
+        allocation = Allocation(
+            example=example,
+            module=self.module_name,
+            worker=self.worker,
+            mode=mode,
+            cycles=cycles,
+            testbench=testbench,
+            dump=os.path.join(self.dump_dir, f'{base}.vcd'),
+            vectors=os.path.join(self.vector_dir, f'{base}.hex') if mode == 'vectors' else '',
+            created=time.time(),
+        )
+        with open(self.manifest, 'a') as f:
+            f.write(json.dumps(asdict(allocation)) + '\n')
+        return allocation
+
+def iter_manifest(manifest_dir: str = MANIFEST_DIR, module_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the records of every manifest shard
+
+    :param manifest_dir: Directory containing the shards
+    :param module_name: Only read the shards of this module
+    """
+    pattern = f'{module_name}_*.jsonl' if module_name else '*.jsonl'
+    for shard in sorted(glob.glob(os.path.join(manifest_dir, pattern))):
+        with open(shard, 'r') as f:
+            for line in f:
+                # A worker killed mid-write leaves a truncated last line
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if module_name is None or record.get('module') == module_name:
+                    yield record
+
+def read_manifest(manifest_dir: str = MANIFEST_DIR, module_name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Merges the manifest shards into one index
+
+    :return: Dictionary mapping example ids to their allocation records
+    """
+    return {record['example']: record for record in iter_manifest(manifest_dir, module_name)}
+
+def manifest_testbenches(manifest_dir: str = MANIFEST_DIR, module_name: Optional[str] = None) -> List[str]:
+    """
+    Returns the testbench paths recorded in the manifest, in allocation order
+    """
+    records = sorted(iter_manifest(manifest_dir, module_name), key=lambda r: (r['created'], r['example']))
+    return [r['testbench'] for r in records]
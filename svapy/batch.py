@@ -0,0 +1,182 @@
+"""
+Batching of many stimulus sequences into a single simulation run.
+
+Each queued sequence becomes a segment of one vector file. Segments are
+separated by a short reset pulse so they start from the reset state, and
+mismatches and property violations reported by the testbench are mapped back
+to the segment (and therefore the example) they came from. The batch keeps
+simulating past a violation, so every segment is checked.
+"""
+import bisect
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from svapy.clocking import clock_ports, reset_ports
+from svapy.engine import Mismatch, SimulationEngine, SimulationResult
+from svapy.ports import Ports
+from svapy.properties import Violation
+from svapy.vectors import direction_name
+from svapy.waves import new_dump_path
+
+def find_reset_port(ports_info: Ports) -> Optional[Tuple[str, bool]]:
+    """
+    Finds the reset input from the port roles (see svapy.clocking)
+
+    :param ports_info: Dictionary containing port information
+    :return: (port name, active low) or None if the module has no recognisable reset
+    """
+    resets = reset_ports(ports_info)
+    return resets[0] if resets else None
+
+def find_clock_port(ports_info: Ports) -> Optional[str]:
+    """
+    Finds the clock input from the port roles, or None if there is none
+    """
+    clocks = clock_ports(ports_info)
+    return clocks[0] if clocks else None
+
+@dataclass
+class Segment:
+    """One queued example inside a batch"""
+    index: int
+    start: int
+    cycles: int
+    sequences: Dict[str, Optional[Sequence[Any]]]
+    label: Optional[str] = None
+
+@dataclass
+class SegmentResult:
+    """Outcome of one segment of a batched simulation"""
+    segment: Segment
+    completed: bool
+    mismatches: List[Mismatch] = field(default_factory=list)
+    dump: str = ''
+    violations: List[Violation] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return self.completed and not self.mismatches and not self.violations
+
+class VectorBatch:
+    """
+    Collects sequences for a module and simulates them together.
+    """
+
+    def __init__(self, ports_info: Ports, reset_cycles: int = 2) -> None:
+        self.ports_info = ports_info
+        self.reset_cycles = reset_cycles
+        self.reset = find_reset_port(ports_info)
+        self.clock = find_clock_port(ports_info)
+        self.segments: List[Segment] = []
+        self._columns: Dict[str, List[Any]] = {port: [] for port in ports_info}
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    @property
+    def cycles(self) -> int:
+        """Total number of cycles queued, including reset pulses"""
+        if not self.segments:
+            return 0
+        last = self.segments[-1]
+        return last.start + self.reset_cycles + last.cycles
+
+    def segment_cycles(self, sequences: Dict[str, Optional[Sequence[Any]]]) -> int:
+        """
+        Returns the number of cycles a sequence set would add to the batch
+        """
+        valid_seqs = [seq for seq in sequences.values() if seq is not None]
+        return self.reset_cycles + min((len(seq) for seq in valid_seqs), default=0)
+
+    def add(self, sequences: Dict[str, Optional[Sequence[Any]]], label: Optional[str] = None) -> int:
+        """
+        Queues one set of sequences, trimmed to the shortest one
+
+        :param sequences: Mapping from port name to a value sequence or None
+        :param label: Optional description used when reporting this segment
+        :return: Index of the new segment
+        """
+        num_cycles = self.segment_cycles(sequences) - self.reset_cycles
+        segment = Segment(len(self.segments), self.cycles, num_cycles, sequences, label)
+        self.segments.append(segment)
+
+        for port, info in self.ports_info.items():
+            column = self._columns[port]
+            is_input = direction_name(info['direction']) == 'Input'
+            column.extend(self._reset_values(port) if is_input else [None] * self.reset_cycles)
+
+            seq = sequences.get(port)
+            if seq is None:
+                column.extend([0 if is_input else None] * num_cycles)
+            else:
+                column.extend(seq[:num_cycles])
+        return segment.index
+
+    def _reset_values(self, port: str) -> List[int]:
+        if self.reset is not None and port == self.reset[0]:
+            return [0 if self.reset[1] else 1] * self.reset_cycles
+        if port == self.clock:
+            return [cycle % 2 for cycle in range(self.reset_cycles)]
+        return [0] * self.reset_cycles
+
+    def sequences(self) -> Dict[str, Optional[Sequence[Any]]]:
+        """
+        Returns the merged per-port sequences of the whole batch.
+        Output cycles that must not be checked hold None.
+        """
+        return {port: column for port, column in self._columns.items()}
+
+    def split(self, result: SimulationResult) -> List[SegmentResult]:
+        """
+        Maps a simulation result of the merged batch back to its segments
+
+        :param result: Result of simulating sequences()
+        :return: One result per segment, in queue order
+        """
+        starts = [segment.start for segment in self.segments]
+        results = [SegmentResult(segment, result.completed) for segment in self.segments]
+        for mismatch in result.mismatches:
+            index = bisect.bisect_right(starts, mismatch.cycle) - 1
+            if index < 0:
+                continue
+            segment = self.segments[index]
+            local = Mismatch(mismatch.cycle - segment.start - self.reset_cycles,
+                             mismatch.port, mismatch.expected, mismatch.actual)
+            results[index].mismatches.append(local)
+        for violation in result.violations:
+            index = bisect.bisect_right(starts, violation.cycle) - 1
+            if index < 0:
+                continue
+            segment = self.segments[index]
+            results[index].violations.append(Violation(violation.property,
+                                                       violation.cycle - segment.start - self.reset_cycles))
+        return results
+
+    def run(self, engine: SimulationEngine, vector_path: str) -> List[SegmentResult]:
+        """
+        Simulates all queued segments in one run and clears the batch.
+        Dumps follow the wave policy of the engine (see svapy.waves).
+
+        :param engine: Engine compiled for the same module
+        :param vector_path: Where to write the merged vector file
+        :return: One result per segment, in queue order
+        """
+        if not self.segments:
+            return []
+        waves = engine.waves
+        dump = new_dump_path(engine.module_name, waves) if waves.dump_always else None
+        result = engine.run_sequences(self.sequences(), vector_path, dump_path=dump, keep_going=True)
+        results = self.split(result)
+        failed = [r for r in results if not r.passed]
+        if dump:
+            for segment_result in results:
+                segment_result.dump = dump
+        elif failed and waves.dump_failures:
+            # Hypothesis replays the shrunk example last, so only the last failure is re-run with dumping
+            single = VectorBatch(self.ports_info, self.reset_cycles)
+            single.add(failed[-1].segment.sequences)
+            failed[-1].dump = engine.run_sequences(single.sequences(), vector_path,
+                                                   dump_path=new_dump_path(engine.module_name, waves)).dump
+        self.segments = []
+        self._columns = {port: [] for port in self.ports_info}
+        return results
@@ -0,0 +1,400 @@
+"""
+Performance benchmarks for the parse, generate, write and simulate stages.
+
+Every stage is timed over a range of sizes: the number of modules per file
+for ``extract_all_module_ports``, port count and width for the ``generate_*``
+functions, and cycle count, port count and width for the testbench writer in
+``drive_<module>``. The designs are the ``example/`` modules plus synthetic
+modules with many wide ports. Results are written as JSON and compared with
+a stored baseline; a case whose median time grows by more than the threshold
+counts as a regression.
+
+Parsing needs the iverilog preprocessor and simulating needs iverilog and
+vvp, so those stages are skipped when the tools are missing.
+
+    python -m svapy.benchmark [--quick] [--stages parse,write] [--baseline FILE] [--save-baseline]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from svapy.ports import Ports
+
+STAGES = ('parse', 'generate', 'write', 'simulate')
+RESULTS_FILE = os.path.join('build', 'benchmark.json')
+BASELINE_FILE = os.path.join('benchmarks', 'baseline.json')
+EXAMPLE_DIR = 'example'
+DEFAULT_THRESHOLD = 1.5
+
+@dataclass(frozen=True)
+class Scale:
+    """Sizes every stage is measured at"""
+    cycles: Tuple[int, ...] = (100, 1000, 10000)
+    ports: Tuple[int, ...] = (4, 16, 64)
+    widths: Tuple[int, ...] = (1, 32, 128)
+    modules: Tuple[int, ...] = (1, 8, 32)
+    repeat: int = 5
+
+
+# A few seconds in total, e.g. for CI smoke runs
+QUICK = Scale(cycles=(10, 100), ports=(2, 8), widths=(1, 100), modules=(1, 4), repeat=2)
+
+@dataclass
+class BenchmarkResult:
+    """Timings of one benchmark case, in seconds"""
+    name: str
+    stage: str
+    params: Dict[str, Any]
+    times: List[float] = field(default_factory=list)
+
+    @property
+    def min(self) -> float:
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['min'] = self.min
+        data['median'] = self.median
+        return data
+
+@dataclass
+class Regression:
+    """A case that got slower than the baseline allows"""
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float('inf')
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> List[float]:
+    """
+    Calls fn repeat times and returns the wall-clock time of every call.
+    The warmup calls before that (imports, template compilation) are not timed.
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+def synthetic_ports(num_ports: int, width: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the port table of synthetic_module: half inputs, half outputs
+    """
+    inputs = max(1, num_ports // 2)
+    ports = {f'in{i}': {'direction': 'Input', 'width': width} for i in range(inputs)}
+    ports.update({f'out{i}': {'direction': 'Output', 'width': width} for i in range(max(1, num_ports - inputs))})
+    return ports
+
+def synthetic_module(name: str, num_ports: int, width: int) -> str:
+    """
+    Returns the Verilog source of a combinational module whose outputs XOR neighbouring inputs
+    """
+    ports = synthetic_ports(num_ports, width)
+    inputs = [p for p, info in ports.items() if info['direction'] == 'Input']
+    outputs = [p for p, info in ports.items() if info['direction'] == 'Output']
+    bus = f'[{width - 1}:0] ' if width > 1 else ''
+    declarations = [f'    input wire {bus}{p}' for p in inputs] + [f'    output wire {bus}{p}' for p in outputs]
+    assigns = [f'    assign {p} = {inputs[i % len(inputs)]} ^ {inputs[(i + 1) % len(inputs)]};'
+               for i, p in enumerate(outputs)]
+    return f'module {name} (\n' + ',\n'.join(declarations) + '\n);\n' + '\n'.join(assigns) + '\nendmodule\n'
+
+def random_sequences(ports_info: 'Ports', num_cycles: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Returns random input arrays and unchecked outputs for num_cycles cycles
+    """
+    import numpy as np
+
+    from svapy.stimulus import port_dtype
+
+    rng = np.random.default_rng(seed)
+    sequences: Dict[str, Any] = {}
+    for port, info in ports_info.items():
+        width = int(info['width'])
+        if info['direction'] != 'Input':
+            sequences[port] = None
+        elif width <= 64:
+            high = np.iinfo(np.uint64).max if width == 64 else (1 << width) - 1
+            sequences[port] = rng.integers(0, high, num_cycles, dtype=np.uint64, endpoint=True).astype(port_dtype(width))
+        else:
+            sequences[port] = [int.from_bytes(rng.bytes((width + 7) // 8), 'little') & ((1 << width) - 1)
+                               for _ in range(num_cycles)]
+    return sequences
+
+def has_preprocessor() -> bool:
+    return shutil.which('iverilog') is not None
+
+def has_simulator() -> bool:
+    return shutil.which('iverilog') is not None and shutil.which('vvp') is not None
+
+def _example_files(example_dir: str) -> List[str]:
+    if not os.path.isdir(example_dir):
+        return []
+    return sorted(os.path.join(example_dir, name) for name in os.listdir(example_dir) if name.endswith(('.v', '.sv')))
+
+def bench_parse(scale: Scale, work_dir: str, example_dir: str = EXAMPLE_DIR) -> List[BenchmarkResult]:
+    """
+    Times extract_all_module_ports without caches, over example files and module counts
+    """
+    from svapy.parser import extract_all_module_ports
+
+    results = []
+    for path in _example_files(example_dir):
+        result = BenchmarkResult(f'parse/example/{os.path.basename(path)}', 'parse', {'file': os.path.basename(path)})
+        result.times = measure(lambda: extract_all_module_ports([path], use_cache=False), scale.repeat)
+        results.append(result)
+
+    for count in scale.modules:
+        path = os.path.join(work_dir, f'synthetic_{count}.v')
+        with open(path, 'w') as f:
+            f.write(''.join(synthetic_module(f'synthetic_{i}', 8, 32) for i in range(count)))
+        result = BenchmarkResult(f'parse/modules={count}', 'parse', {'modules': count})
+        result.times = measure(lambda: extract_all_module_ports([path], use_cache=False), scale.repeat)
+        results.append(result)
+    return results
+
+def bench_generate(scale: Scale) -> List[BenchmarkResult]:
+    """
+    Times generate_module, generate_runner and generate_vector_testbench over port counts and widths
+    """
+    from svapy.core import generate_module, generate_runner, generate_vector_testbench
+
+    generators: Dict[str, Callable[['Ports'], str]] = {
+        'module': lambda ports: generate_module('synthetic', ports),
+        'runner': lambda ports: generate_runner('synthetic', ports),
+        'vector_testbench': lambda ports: generate_vector_testbench('synthetic', ports, depth=1 << 16),
+    }
+    results = []
+    for kind, generate in generators.items():
+        for num_ports in scale.ports:
+            for width in scale.widths:
+                ports = synthetic_ports(num_ports, width)
+                result = BenchmarkResult(f'generate/{kind}/ports={num_ports},width={width}', 'generate',
+                                         {'kind': kind, 'ports': num_ports, 'width': width})
+                result.times = measure(lambda: generate(ports), scale.repeat)
+                results.append(result)
+    return results
+
+def _write_cases(scale: Scale) -> List[Tuple[int, int, int]]:
+    # (cycles, ports, width): cycle counts at a medium port table, then port counts and widths at a medium length
+    ports, width, cycles = scale.ports[len(scale.ports) // 2], scale.widths[len(scale.widths) // 2], scale.cycles[0]
+    cases = [(c, ports, width) for c in scale.cycles]
+    cases += [(cycles, p, w) for p in scale.ports for w in scale.widths if (cycles, p, w) not in cases]
+    return cases
+
+def bench_write(scale: Scale, work_dir: str) -> List[BenchmarkResult]:
+    """
+    Times the testbench writer of drive_<module> in the unrolled and vectors modes
+    """
+    from svapy.core import generate_module
+
+    results = []
+    with contextlib.chdir(work_dir):
+        for num_cycles, num_ports, width in _write_cases(scale):
+            ports = synthetic_ports(num_ports, width)
+            namespace: Dict[str, Any] = {}
+            exec(generate_module('synthetic', ports), namespace)
+            drive = namespace['drive_synthetic']
+            sequences = {f'{port}_seq': seq for port, seq in random_sequences(ports, num_cycles).items()}
+            for mode in ('unrolled', 'vectors'):
+                result = BenchmarkResult(f'write/{mode}/cycles={num_cycles},ports={num_ports},width={width}', 'write',
+                                         {'mode': mode, 'cycles': num_cycles, 'ports': num_ports, 'width': width})
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result.times = measure(lambda: drive(mode=mode, **sequences), scale.repeat)
+                results.append(result)
+    return results
+
+def bench_simulate(scale: Scale, work_dir: str) -> List[BenchmarkResult]:
+    """
+    Times compiling a synthetic design once and simulating vector files of growing length
+    """
+    from svapy.engine import SimulationEngine
+    from svapy.waves import WavePolicy
+
+    num_ports, width = scale.ports[len(scale.ports) // 2], scale.widths[len(scale.widths) // 2]
+    ports = synthetic_ports(num_ports, width)
+    design = os.path.join(work_dir, 'synthetic_sim.v')
+    with open(design, 'w') as f:
+        f.write(synthetic_module('synthetic', num_ports, width))
+
+    engine = SimulationEngine('synthetic', ports, [design], build_dir=os.path.join(work_dir, 'build'),
+                              depth=max(scale.cycles), waves=WavePolicy('none'))
+    compile_result = BenchmarkResult(f'simulate/compile/ports={num_ports},width={width}', 'simulate',
+                                     {'ports': num_ports, 'width': width})
+    compile_result.times = measure(engine.compile, 1, warmup=0)
+    results = [compile_result]
+
+    vec_path = os.path.join(work_dir, 'synthetic.hex')
+    for num_cycles in scale.cycles:
+        sequences = random_sequences(ports, num_cycles)
+        result = BenchmarkResult(f'simulate/run/cycles={num_cycles}', 'simulate',
+                                 {'cycles': num_cycles, 'ports': num_ports, 'width': width})
+        result.times = measure(lambda: engine.run_sequences(sequences, vec_path), scale.repeat)
+        results.append(result)
+    return results
+
+def run_benchmarks(stages: Sequence[str] = STAGES, scale: Scale = Scale(), example_dir: str = EXAMPLE_DIR,
+                   log: Optional[Callable[[str], None]] = None) -> Tuple[List[BenchmarkResult], List[str]]:
+    """
+    Runs the selected stages in a temporary directory
+
+    :param stages: Subset of STAGES
+    :param scale: Sizes to measure at
+    :param example_dir: Directory holding the example designs
+    :param log: Called with a message whenever a stage is skipped
+    :return: (results, skipped stages)
+    """
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark stage(s): {', '.join(unknown)}")
+
+    example_dir = os.path.abspath(example_dir)
+    results: List[BenchmarkResult] = []
+    skipped: List[str] = []
+    with tempfile.TemporaryDirectory(prefix='svapy-bench-') as work_dir:
+        for stage in stages:
+            if stage == 'parse' and not has_preprocessor():
+                skipped.append(stage)
+                if log:
+                    log("Skipping parse stage: iverilog (preprocessor) not found")
+            elif stage == 'simulate' and not has_simulator():
+                skipped.append(stage)
+                if log:
+                    log("Skipping simulate stage: iverilog/vvp not found")
+            elif stage == 'parse':
+                results += bench_parse(scale, work_dir, example_dir)
+            elif stage == 'generate':
+                results += bench_generate(scale)
+            elif stage == 'write':
+                results += bench_write(scale, work_dir)
+            else:
+                results += bench_simulate(scale, work_dir)
+    return results, skipped
+
+def environment() -> Dict[str, str]:
+    """
+    Describes the machine and interpreter the benchmarks ran on
+    """
+    import numpy as np
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'numpy': np.__version__,
+    }
+
+def write_results(path: str, results: Sequence[BenchmarkResult], skipped: Sequence[str] = (),
+                  scale: Optional[Scale] = None) -> Dict[str, Any]:
+    """
+    Writes results as JSON, atomically
+
+    :return: The written document
+    """
+    document = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment(),
+        'scale': asdict(scale) if scale is not None else None,
+        'skipped': list(skipped),
+        'results': [result.to_dict() for result in results],
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(document, f, indent=2)
+    os.replace(tmp_path, path)
+    return document
+
+def load_results(path: str) -> Dict[str, float]:
+    """
+    Reads a results file written by write_results
+
+    :return: Dictionary mapping case names to median times
+    """
+    with open(path, 'r') as f:
+        document = json.load(f)
+    return {result['name']: float(result['median']) for result in document['results']}
+
+def compare(results: Sequence[BenchmarkResult], baseline: Dict[str, float],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Regression]:
+    """
+    Compares median times with a baseline; cases missing from either side are ignored
+
+    :param threshold: Allowed ratio of current to baseline median time
+    :return: Cases slower than threshold times their baseline
+    """
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is not None and result.median > reference * threshold:
+            regressions.append(Regression(result.name, reference, result.median))
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the parse, generate, write and simulate stages")
+    parser.add_argument('--stages', default=','.join(STAGES), help="comma-separated subset of " + ', '.join(STAGES))
+    parser.add_argument('--quick', action='store_true', help="small sizes and few repetitions")
+    parser.add_argument('--repeat', type=int, default=None, help="timed repetitions per case")
+    parser.add_argument('--examples', default=EXAMPLE_DIR, help="directory with the example designs")
+    parser.add_argument('--output', default=RESULTS_FILE, help="JSON results path")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="JSON baseline compared against, if it exists")
+    parser.add_argument('--save-baseline', action='store_true', help="also store the results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio reported as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    scale = QUICK if args.quick else Scale()
+    if args.repeat:
+        scale = Scale(scale.cycles, scale.ports, scale.widths, scale.modules, args.repeat)
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    try:
+        results, skipped = run_benchmarks(stages, scale, args.examples, log=print)
+    except ValueError as e:
+        parser.error(str(e))
+
+    write_results(args.output, results, skipped, scale)
+    for result in results:
+        print(f"{result.name:<64} median {result.median * 1e3:10.3f} ms   min {result.min * 1e3:10.3f} ms")
+    print(f"{len(results)} case(s), results: {args.output}")
+
+    if args.save_baseline:
+        write_results(args.baseline, results, skipped, scale)
+        print(f"Baseline saved: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, nothing compared")
+        return 0
+
+    regressions = compare(results, load_results(args.baseline), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression.name}: {regression.baseline * 1e3:.3f} ms -> "
+              f"{regression.current * 1e3:.3f} ms ({regression.ratio:.2f}x)")
+    print(f"{len(regressions)} regression(s) against {args.baseline} (threshold {args.threshold}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
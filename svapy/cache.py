@@ -0,0 +1,149 @@
+"""
+Persistent, content-addressed caches under ``gen/cache``.
+
+Entries are small JSON files named after the hash of everything that
+determines their content. Reading an entry refreshes its modification time,
+and the least recently used entries are evicted once the cache grows past
+its size limit.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def default_cache_dir(kind: str) -> str:
+    """
+    Returns the directory of one cache kind, honouring SVAPY_CACHE_DIR
+
+    :param kind: Cache name such as 'results'
+    :return: Directory path
+    """
+    root = os.environ.get('SVAPY_CACHE_DIR', os.path.join('gen', 'cache'))
+    return os.path.join(root, kind)
+
+def file_digest(path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    Size-bounded on-disk JSON cache with least-recently-used eviction.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None) -> None:
+        self.directory = directory or default_cache_dir('results')
+        if max_bytes is None:
+            max_bytes = int(os.environ.get('SVAPY_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """
+        Combines the parts identifying an entry into a cache key
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a cached value and marks it as recently used, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                value: Dict[str, Any] = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Stores a JSON-serialisable value, evicting old entries if the cache is full
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        entries: List[Tuple[str, int, float]] = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries until the cache fits its size limit
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        for path, entry_size, _ in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+        self._size = size
+
+    def clear(self) -> None:
+        """
+        Removes every entry of this cache
+        """
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._size = 0
+
+
+# One cache per directory and process, see get_cache()
+_CACHES: Dict[str, ResultCache] = {}
+
+def get_cache(kind: str = 'results') -> ResultCache:
+    """
+    Returns the cache of one kind, creating it on first use. Sharing one
+    instance per directory means its size is scanned once per process,
+    not once per caller.
+
+    :param kind: Cache name such as 'results' or 'parse'
+    """
+    directory = os.path.abspath(default_cache_dir(kind))
+    cache = _CACHES.get(directory)
+    if cache is None:
+        cache = _CACHES[directory] = ResultCache(directory)
+    return cache
@@ -0,0 +1,149 @@
+"""
+Clock and reset roles of module ports.
+
+Every port gets a role: 'clock', 'reset' (active high), 'reset_n' (active
+low) or 'data'. Roles are guessed from port names (clk, aclk, sys_clk, rst_n,
+aresetn, i_rst, ...) and can be overridden by the user. Modules with a clock
+are then driven per clock cycle: the clock runs freely, reset is held for a
+fixed number of cycles, and only data inputs are drawn per edge.
+"""
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from svapy.ports import Ports
+from svapy.vectors import direction_name
+
+if TYPE_CHECKING:
+    from svapy.stimulus import Stimulus
+
+CLOCK = 'clock'
+RESET = 'reset'
+RESET_N = 'reset_n'
+DATA = 'data'
+ROLES = (CLOCK, RESET, RESET_N, DATA)
+
+# A port table of dictionaries or PortInfo records, updated in place
+Table = TypeVar('Table', bound=Dict[str, Any])
+
+_CLOCK_RE = re.compile(r'^(?:i_)?(?:\w+_|[ahps])?(?:clk|clock)(?:_?i)?$')
+_RESET_RE = re.compile(r'^(?:i_)?(?P<prefix>\w+_|[as]|n)?(?:rst|reset)(?P<low>_?n|_b|_ni)?(?:_i)?$')
+
+def port_role(name: str, direction: Any, width: int = 1) -> str:
+    """
+    Guesses the role of a port from its name
+
+    :param name: Port name
+    :param direction: pyverilog direction class or its name
+    :param width: Port width, only 1-bit inputs can be clocks or resets
+    :return: One of ROLES
+    """
+    if direction_name(direction) != 'Input' or width != 1:
+        return DATA
+    lowered = name.lower()
+    if _CLOCK_RE.match(lowered):
+        return CLOCK
+    match = _RESET_RE.match(lowered)
+    if match:
+        return RESET_N if match.group('low') or match.group('prefix') == 'n' else RESET
+    return DATA
+
+def assign_port_roles(ports_info: Table, roles: Optional[Dict[str, str]] = None) -> Table:
+    """
+    Adds a 'role' entry to every port that has none
+
+    :param ports_info: Dictionary containing port information, updated in place
+    :param roles: Roles chosen by the user, by port name; ports missing from the module are ignored
+    :return: ports_info
+    """
+    for port, role in (roles or {}).items():
+        if role not in ROLES:
+            raise ValueError(f"Unknown port role for {port}: {role} (expected one of {', '.join(ROLES)})")
+        if port in ports_info:
+            ports_info[port]['role'] = role
+
+    for port, info in ports_info.items():
+        if 'role' not in info:
+            info['role'] = port_role(port, info['direction'], info['width'])
+    return ports_info
+
+def _role(port: str, info: Mapping[str, Any]) -> str:
+    return str(info.get('role') or port_role(port, info['direction'], info['width']))
+
+def clock_ports(ports_info: Ports) -> List[str]:
+    """
+    Returns the clock inputs of a module
+    """
+    return [port for port, info in ports_info.items() if _role(port, info) == CLOCK]
+
+def data_inputs(ports_info: Ports) -> List[str]:
+    """
+    Returns the inputs of a module that are neither clocks nor resets
+    """
+    return [port for port, info in ports_info.items()
+            if direction_name(info['direction']) == 'Input' and _role(port, info) == DATA]
+
+def reset_ports(ports_info: Ports) -> List[Tuple[str, bool]]:
+    """
+    Returns the reset inputs of a module
+
+    :return: List of (port name, active low)
+    """
+    return [(port, _role(port, info) == RESET_N) for port, info in ports_info.items()
+            if _role(port, info) in (RESET, RESET_N)]
+
+def clocked_sequences(ports_info: Ports, sequences: Mapping[str, Optional[Sequence[Any]]],
+                      num_cycles: int, reset_cycles: int = 2) -> 'Stimulus':
+    """
+    Expands per-clock-cycle sequences into the per-step form used by vector files.
+
+    Each clock cycle takes two steps (clock low, then high). The first
+    reset_cycles cycles hold reset asserted and data inputs at 0. Expected
+    output values of cycle i are checked once edge i has been applied, and
+    steps without a check are masked out.
+
+    :param ports_info: Dictionary containing port information
+    :param sequences: Data inputs and expected outputs per clock cycle, as a
+        Stimulus or a mapping; clock sequences are ignored and a reset sequence,
+        if given, drives reset after the initial pulse
+    :param num_cycles: Number of clock cycles after reset
+    :param reset_cycles: Clock cycles with reset asserted; ignored without a reset port
+    :return: Stimulus of 2 * (reset_cycles + num_cycles) + 1 steps
+    """
+    import numpy as np
+
+    from svapy.stimulus import Stimulus, port_dtype
+
+    stimulus = Stimulus.from_sequences(ports_info, sequences).trim(num_cycles)
+    resets = dict(reset_ports(ports_info))
+    if not resets:
+        reset_cycles = 0
+    total = reset_cycles + num_cycles
+    steps = 2 * total + 1
+    checked = 2 * (reset_cycles + np.arange(num_cycles)) + 2
+
+    arrays: Dict[str, Any] = {}
+    checks: Dict[str, Any] = {}
+    for port, info in ports_info.items():
+        values = stimulus.array(port)
+        dtype = port_dtype(int(info['width']))
+        if _role(port, info) == CLOCK:
+            arrays[port] = (np.arange(steps) % 2).astype(dtype)
+        elif direction_name(info['direction']) == 'Input':
+            idle = int(resets[port]) if port in resets else 0
+            per_cycle = np.empty(total + 1, dtype=dtype)
+            per_cycle[:reset_cycles] = 1 - idle if port in resets else 0
+            per_cycle[reset_cycles:total] = idle if values is None else values
+            # The last step holds the values of the last cycle
+            per_cycle[total] = per_cycle[total - 1] if total else idle
+            arrays[port] = np.repeat(per_cycle, 2)[:steps]
+        elif values is None:
+            arrays[port] = None
+        else:
+            column = np.zeros(steps, dtype=values.dtype)
+            column[checked] = values
+            check = np.zeros(steps, dtype=bool)
+            given = stimulus.check(port)
+            check[checked] = True if given is None else given
+            arrays[port] = column
+            checks[port] = check
+    return Stimulus(ports_info, arrays, checks)
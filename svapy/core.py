@@ -1,26 +1,68 @@
 import os
 from datetime import datetime
-from typing import Dict, Any, List
-from jinja2 import Environment, FileSystemLoader, Template
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Sequence
 
-from pyverilog.vparser.ast import Input, Output, Inout
+from svapy.clocking import DATA, assign_port_roles, clock_ports, reset_ports
+from svapy.ports import Ports, PortTable, port_table
+from svapy.vectors import direction_name, vector_depth, vector_layout, vector_width
 
-def get_template_environment() -> Environment:
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+    from svapy.properties import Property
+    from svapy.waves import WavePolicy
+
+# Built once per process by get_template_environment()
+_ENVIRONMENT: Optional['Environment'] = None
+
+def get_template_environment() -> 'Environment':
     """
-    Creates and returns a Jinja2 template environment
+    Returns the Jinja2 template environment, creating it on first use.
+    Compiled templates are kept in a bytecode cache so later processes skip
+    template compilation (see SVAPY_CACHE_DIR).
     
     :return: Jinja2 Environment instance
     """
+    global _ENVIRONMENT
+    if _ENVIRONMENT is not None:
+        return _ENVIRONMENT
+
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    if 'SVAPY_CACHE_DIR' in os.environ:
+        cache_dir = os.path.join(os.environ['SVAPY_CACHE_DIR'], 'jinja')
+        os.makedirs(cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    else:
+        # Per-user directory in the system temp dir
+        bytecode_cache = FileSystemBytecodeCache()
+
     template_dir = os.path.join(os.path.dirname(__file__), 'templates')
-    env = Environment(
+    _ENVIRONMENT = Environment(
         loader=FileSystemLoader(template_dir),
         trim_blocks=True,
         lstrip_blocks=True,
-        keep_trailing_newline=True
+        keep_trailing_newline=True,
+        bytecode_cache=bytecode_cache
     )
-    return env
+    return _ENVIRONMENT
+
+def _port_table(ports_info: Ports) -> Dict[str, Dict[str, Any]]:
+    """
+    Converts port information into plain literals that can be embedded in generated code
+    """
+    return {
+        port: {'direction': direction_name(info['direction']), 'width': info['width'], 'role': info['role']}
+        for port, info in ports_info.items()
+    }
 
-def generate_module_docstring(module_name: str, ports_info: Dict[str, Dict[str, Any]]) -> str:
+def _with_roles(ports_info: Ports) -> PortTable:
+    """
+    Returns a copy of the port information as a PortTable in which every port has a role
+    """
+    return assign_port_roles(port_table(ports_info))
+
+def generate_module_docstring(module_name: str, ports_info: Ports) -> str:
     """
     Generates a Python docstring describing a Verilog module using Jinja2 template
     
@@ -39,14 +81,18 @@ def generate_module_docstring(module_name: str, ports_info: Dict[str, Dict[str,
     
     return template.render(context)
 
-def generate_module(module_name: str, ports_info: Dict[str, Dict[str, Any]]) -> str:
+def generate_module(module_name: str, ports_info: Ports,
+                    design_files: Optional[List[str]] = None) -> str:
     """
     Generates Python code for a function drive_<module_name> with Verilog bit-level representation
     and adds output value assertions only when output sequence is not None.
     Uses Jinja2 template for code generation.
+    design_files are the Verilog sources compiled by the 'engine' testbench mode.
+    Modules with a clock port are driven per clock cycle by default (see svapy.clocking).
     """
-    input_ports: List[str] = [p for p, info in ports_info.items() if info['direction'].__name__ == 'Input']
-    output_ports: List[str] = [p for p, info in ports_info.items() if info['direction'].__name__ == 'Output']
+    ports_info = _with_roles(ports_info)
+    input_ports: List[str] = [p for p, info in ports_info.items() if direction_name(info['direction']) == 'Input']
+    output_ports: List[str] = [p for p, info in ports_info.items() if direction_name(info['direction']) == 'Output']
     all_ports: List[str] = input_ports + output_ports
 
     env = get_template_environment()
@@ -56,27 +102,40 @@ def generate_module(module_name: str, ports_info: Dict[str, Dict[str, Any]]) ->
     context = {
         'module_name': module_name,
         'ports_info': ports_info,
+        'port_table': _port_table(ports_info),
+        'design_files': list(design_files or []),
         'input_ports': input_ports,
         'output_ports': output_ports,
-        'all_ports': all_ports
+        'all_ports': all_ports,
+        'data_inputs': [p for p in input_ports if ports_info[p]['role'] == DATA],
+        'clock_ports': clock_ports(ports_info),
+        'reset_ports': reset_ports(ports_info),
+        'check_width': max([int(ports_info[p]['width']) for p in output_ports] + [1])
     }
     
     return template.render(context)
 
-def generate_runner(module_name: str, ports_info: Dict[str, Dict[str, Any]]) -> str:
+def generate_runner(module_name: str, ports_info: Ports,
+                    min_cycles: int = 10, max_cycles: int = 100, max_examples: int = 20) -> str:
     """
     Generates proper Hypothesis-based test runner with correct property-based testing approach.
     Uses Jinja2 template for code generation.
+    For modules with a clock port only the data inputs are drawn; clock and reset are generated.
+    Each example is drawn in bulk by svapy.strategies.stimulus_strategy.
+
+    :param min_cycles: Default shortest sequence length (SVAPY_MIN_CYCLES at run time)
+    :param max_cycles: Default longest sequence length (SVAPY_MAX_CYCLES at run time)
+    :param max_examples: Default number of Hypothesis examples (SVAPY_MAX_EXAMPLES at run time)
     """
-    input_ports: List[str] = [p for p, info in ports_info.items() if info['direction'].__name__ == 'Input']
-    output_ports: List[str] = [p for p, info in ports_info.items() if info['direction'].__name__ == 'Output']
-    all_ports: List[str] = input_ports + output_ports
+    if min_cycles < 1 or max_cycles < min_cycles:
+        raise ValueError(f"Invalid sequence length bounds: {min_cycles}..{max_cycles}")
+    if max_examples < 1:
+        raise ValueError(f"max_examples must be at least 1, got {max_examples}")
 
-    # Calculate maximum values for each port
-    port_max_values: Dict[str, int] = {}
-    for port, info in ports_info.items():
-        if info['width'] > 1:
-            port_max_values[port] = (1 << info['width']) - 1
+    ports_info = _with_roles(ports_info)
+    input_ports: List[str] = [p for p, info in ports_info.items() if direction_name(info['direction']) == 'Input']
+    output_ports: List[str] = [p for p, info in ports_info.items() if direction_name(info['direction']) == 'Output']
+    all_ports: List[str] = input_ports + output_ports
 
     env = get_template_environment()
     template = env.get_template('test_runner.j2')
@@ -88,7 +147,69 @@ def generate_runner(module_name: str, ports_info: Dict[str, Dict[str, Any]]) ->
         'input_ports': input_ports,
         'output_ports': output_ports,
         'all_ports': all_ports,
-        'port_max_values': port_max_values
+        'data_inputs': [p for p in input_ports if ports_info[p]['role'] == DATA],
+        'clock_ports': clock_ports(ports_info),
+        'min_cycles': min_cycles,
+        'max_cycles': max_cycles,
+        'max_examples': max_examples
     }
     
     return template.render(context)
+
+def generate_vector_testbench(module_name: str, ports_info: Ports,
+                              depth: int = 0, default_vectors: str = '',
+                              default_cycles: int = 0, default_dump: str = '',
+                              sample_ports: Optional[List[str]] = None,
+                              waves: Optional['WavePolicy'] = None,
+                              properties: Sequence['Property'] = ()) -> str:
+    """
+    Generates a fixed-size SystemVerilog testbench that reads stimulus and expected
+    values from a $readmemh vector file (see svapy.vectors).
+    The vector file, cycle count and dump file can be overridden at run time with
+    the +vectors=, +cycles= and +dump= plusargs. With +samples= the sampled ports are
+    written to a binary file every cycle (see svapy.outputs). Properties are checked
+    at every evaluation point and stop the run at the first violation unless it is
+    given +keep_going (see svapy.properties).
+
+    :param module_name: Name of the Verilog module
+    :param ports_info: Dictionary containing port information
+    :param depth: Vector memory depth, defaults to enough room for default_cycles
+    :param default_vectors: Vector file used when +vectors= is not given
+    :param default_cycles: Cycle count used when +cycles= is not given
+    :param default_dump: Dump file used when +dump= is not given, empty disables dumping
+    :param sample_ports: Ports written by +samples=, defaults to every output port
+    :param waves: Scope and depth of the dump (see svapy.waves), the whole testbench by default
+    :param properties: Properties checked inside the testbench
+    :return: SystemVerilog source of the testbench
+    """
+    from svapy.properties import checker_code
+    from svapy.waves import WavePolicy
+
+    input_ports: List[str] = [p for p, info in ports_info.items() if direction_name(info['direction']) == 'Input']
+    output_ports: List[str] = [p for p, info in ports_info.items() if direction_name(info['direction']) == 'Output']
+    all_ports: List[str] = input_ports + output_ports
+    layout = vector_layout(ports_info)
+
+    env = get_template_environment()
+    template = env.get_template('vector_testbench.j2')
+
+    context = {
+        'module_name': module_name,
+        'ports_info': ports_info,
+        'input_ports': input_ports,
+        'output_ports': output_ports,
+        'all_ports': all_ports,
+        'layout': layout,
+        'word_width': vector_width(layout),
+        'depth': depth or vector_depth(default_cycles),
+        'default_vectors': default_vectors,
+        'default_cycles': default_cycles,
+        'default_dump': default_dump,
+        'dumpvars': (waves or WavePolicy()).dumpvars(f'{module_name}_tb'),
+        'sample_ports': sample_ports if sample_ports is not None else output_ports,
+        'property_code': checker_code(properties, ports_info),
+        'property_clock': next(iter(clock_ports(ports_info)), None),
+        'property_resets': reset_ports(ports_info)
+    }
+
+    return template.render(context)
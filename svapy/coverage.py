@@ -0,0 +1,302 @@
+"""
+Cheap coverage of simulation runs, fed back into Hypothesis.
+
+Every run is reduced to coverage bins:
+
+- toggle bins: each bit of each signal that rose, and each bit that fell
+- state bins: each value of an FSM state register, and each transition
+  between two different values
+
+Signals are taken at the evaluation points of svapy.properties (every step,
+or falling clock edges with reset released). Inputs come from the stimulus,
+outputs from the sample file of the vector testbench (see svapy.outputs) in
+the 'engine' mode, or from the traces of svapy.pysim, which also covers the
+registers and wires inside the design and treats registers whose name
+contains ``state`` as FSM state. Collecting is enabled with SVAPY_COVERAGE=1.
+
+Generated runners then pass the bins each example hits to
+hypothesis.target(), so generation is steered towards examples that toggle
+more bits and reach more states, and save every example that hits a bin no
+earlier example of the session hit into a corpus on disk (SVAPY_CORPUS_DIR,
+``build/corpus/<module>`` by default). Later runs replay the corpus first.
+"""
+import hashlib
+import io
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from svapy import instrument
+from svapy.clocking import clock_ports, reset_ports
+from svapy.ports import PortInfo, Ports
+from svapy.properties import evaluation_mask
+from svapy.stimulus import Stimulus, to_array
+from svapy.vectors import direction_name
+
+CORPUS_DIR = os.path.join('build', 'corpus')
+
+# Registers treated as FSM state: name contains 'state', at most 16 bits
+_STATE_RE = re.compile(r'state', re.IGNORECASE)
+MAX_STATE_WIDTH = 16
+
+def enabled() -> bool:
+    """
+    Returns True if SVAPY_COVERAGE is set to anything but '' or '0'
+    """
+    return os.environ.get('SVAPY_COVERAGE', '0') not in ('', '0')
+
+def state_registers(widths: Mapping[str, int]) -> List[str]:
+    """
+    Returns the signals that look like FSM state registers
+
+    :param widths: Mapping from signal name to width in bits
+    """
+    return [name for name, width in widths.items() if _STATE_RE.search(name) and width <= MAX_STATE_WIDTH]
+
+def toggles(values: npt.NDArray[Any]) -> Tuple[int, int]:
+    """
+    Returns the bit masks of the bits that rose and that fell somewhere in values
+    """
+    if len(values) < 2:
+        return 0, 0
+    if values.dtype == object:
+        rose = fell = 0
+        for previous, current in zip(values[:-1].tolist(), values[1:].tolist()):
+            changed = previous ^ current
+            rose |= changed & current
+            fell |= changed & previous
+        return int(rose), int(fell)
+    words = values.astype(np.uint64, copy=False)
+    changed = words[:-1] ^ words[1:]
+    return int(np.bitwise_or.reduce(changed & words[1:])), int(np.bitwise_or.reduce(changed & words[:-1]))
+
+@dataclass
+class Coverage:
+    """
+    Coverage bins hit by one run, or by many runs merged together
+    """
+    # Signal: (bits that rose, bits that fell)
+    toggles: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    states: Dict[str, Set[int]] = field(default_factory=dict)
+    transitions: Dict[str, Set[Tuple[int, int]]] = field(default_factory=dict)
+
+    @property
+    def bins(self) -> int:
+        """Number of bins hit"""
+        toggled = sum(bin(rose).count('1') + bin(fell).count('1') for rose, fell in self.toggles.values())
+        return (toggled + sum(len(values) for values in self.states.values())
+                + sum(len(pairs) for pairs in self.transitions.values()))
+
+    def merge(self, other: 'Coverage') -> int:
+        """
+        Adds the bins of other
+
+        :return: Number of bins that were not hit before
+        """
+        before = self.bins
+        for name, (rose, fell) in other.toggles.items():
+            old_rose, old_fell = self.toggles.get(name, (0, 0))
+            self.toggles[name] = (old_rose | rose, old_fell | fell)
+        for name, values in other.states.items():
+            self.states.setdefault(name, set()).update(values)
+        for name, pairs in other.transitions.items():
+            self.transitions.setdefault(name, set()).update(pairs)
+        return self.bins - before
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'bins': self.bins,
+            'toggles': {name: [rose, fell] for name, (rose, fell) in sorted(self.toggles.items())},
+            'states': {name: sorted(values) for name, values in sorted(self.states.items())},
+            'transitions': {name: sorted([a, b] for a, b in pairs) for name, pairs in sorted(self.transitions.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Coverage':
+        return cls(toggles={name: (int(rose), int(fell)) for name, (rose, fell) in data.get('toggles', {}).items()},
+                   states={name: set(values) for name, values in data.get('states', {}).items()},
+                   transitions={name: {(a, b) for a, b in pairs} for name, pairs in data.get('transitions', {}).items()})
+
+    def summary(self) -> str:
+        """
+        Returns one line per signal: toggled bits and FSM states reached
+        """
+        lines = []
+        for name in sorted(set(self.toggles) | set(self.states)):
+            rose, fell = self.toggles.get(name, (0, 0))
+            line = f'{name:<24} rose {bin(rose).count("1"):>4}  fell {bin(fell).count("1"):>4}'
+            if name in self.states:
+                states = ', '.join(format(value, 'x') for value in sorted(self.states[name]))
+                line += f'  states {states}  transitions {len(self.transitions.get(name, ()))}'
+            lines.append(line)
+        lines.append(f'{"bins":<24} {self.bins}')
+        return '\n'.join(lines)
+
+def collect(ports_info: Ports, values: Mapping[str, Any], steps: int,
+            states: Sequence[str] = ()) -> Coverage:
+    """
+    Returns the coverage of one run
+
+    :param ports_info: Dictionary containing port information
+    :param values: Mapping from signal name to a one-dimensional array with one value per step;
+        inputs as applied at each step, other signals as the testbench samples them
+    :param steps: Number of steps simulated
+    :param states: Signals whose values and transitions are covered as FSM states
+    """
+    points = np.flatnonzero(evaluation_mask(ports_info, values, steps))
+    # Clocks and resets are constant at the evaluation points
+    skip = set(clock_ports(ports_info)) | {port for port, _ in reset_ports(ports_info)}
+    coverage = Coverage()
+    for name, array in values.items():
+        if name in skip:
+            continue
+        at_points = np.asarray(array)[:steps][points[points < len(array)]]
+        coverage.toggles[name] = toggles(at_points)
+        if name in states and len(at_points):
+            codes = at_points.astype(np.uint64, copy=False)
+            coverage.states[name] = set(np.unique(codes).tolist())
+            pairs = np.stack([codes[:-1], codes[1:]], axis=1)
+            pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+            coverage.transitions[name] = {(int(a), int(b)) for a, b in np.unique(pairs, axis=0).tolist()}
+    return coverage
+
+def run_coverage(ports_info: Ports, stimulus: Stimulus, samples: Mapping[str, Any],
+                 states: Sequence[str] = ()) -> Coverage:
+    """
+    Returns the coverage of one run from its inputs and sampled signals
+
+    :param ports_info: Dictionary containing port information
+    :param stimulus: Inputs applied per step; expected outputs are ignored
+    :param samples: Outputs and internal signals per step, e.g. engine.load_samples()
+    :param states: Signals whose values and transitions are covered as FSM states
+    """
+    values: Dict[str, Any] = dict(samples)
+    for port, info in ports_info.items():
+        if direction_name(info['direction']) == 'Input' and stimulus.array(port) is not None:
+            values[port] = stimulus.array(port)
+    return collect(ports_info, values, stimulus.cycles, states)
+
+class Corpus:
+    """
+    Examples that hit new coverage bins, one .npz file of port arrays each.
+
+    Files are named after a hash of their content, so saving an example twice,
+    also from several processes, keeps one file.
+
+    :param module_name: Name of the Verilog module
+    :param ports_info: Dictionary containing port information
+    :param directory: Corpus root, defaults to SVAPY_CORPUS_DIR or CORPUS_DIR
+    """
+
+    def __init__(self, module_name: str, ports_info: Ports,
+                 directory: Optional[str] = None) -> None:
+        self.ports_info = ports_info
+        self.directory = os.path.join(directory or os.environ.get('SVAPY_CORPUS_DIR') or CORPUS_DIR, module_name)
+
+    def paths(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.endswith('.npz'))
+
+    def __len__(self) -> int:
+        return len(self.paths())
+
+    def __iter__(self) -> Iterator[Stimulus]:
+        for path in self.paths():
+            yield self.load(path)
+
+    def add(self, stimulus: Stimulus) -> str:
+        """
+        Saves an example, atomically
+
+        :return: Path of the corpus file
+        """
+        arrays: Dict[str, npt.NDArray[Any]] = {}
+        for port in stimulus:
+            values = stimulus.array(port)
+            if values is None:
+                continue
+            # Ports wider than 64 bits are stored as hex strings, keeping the files free of pickles
+            arrays[port] = np.array([format(v, 'x') for v in values.tolist()]) if values.dtype == object else values
+        buffer = io.BytesIO()
+        np.savez(buffer, allow_pickle=False, **arrays)
+        data = buffer.getvalue()
+
+        path = os.path.join(self.directory, f'{hashlib.sha256(data).hexdigest()[:16]}.npz')
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return path
+
+    def load(self, path: str) -> Stimulus:
+        """
+        Loads one corpus file as a Stimulus
+        """
+        arrays: Dict[str, Optional[npt.NDArray[Any]]] = {}
+        with np.load(path, allow_pickle=False) as data:
+            for port in data.files:
+                values = data[port]
+                width = int(self.ports_info[port]['width']) if port in self.ports_info else 64
+                arrays[port] = to_array([int(v, 16) for v in values.tolist()], width) if values.dtype.kind == 'U' else values
+        table = {port: PortInfo.from_mapping(self.ports_info[port]) for port in arrays if port in self.ports_info}
+        return Stimulus(table, arrays)
+
+
+# Every CoverageFeedback of this process, merged by session_coverage()
+_feedbacks: List['CoverageFeedback'] = []
+
+def session_coverage() -> Coverage:
+    """
+    Returns the coverage reached by all runners of this process, e.g. one shard of svapy.shard
+    """
+    total = Coverage()
+    for feedback in _feedbacks:
+        total.merge(feedback.total)
+    return total
+
+class CoverageFeedback:
+    """
+    Coverage of the examples of one runner session, fed back into Hypothesis.
+
+    :param module_name: Name of the Verilog module
+    :param ports_info: Dictionary containing port information
+    :param corpus_dir: Corpus root, defaults to SVAPY_CORPUS_DIR or CORPUS_DIR
+    """
+
+    def __init__(self, module_name: str, ports_info: Ports,
+                 corpus_dir: Optional[str] = None) -> None:
+        self.total = Coverage()
+        self.corpus = Corpus(module_name, ports_info, corpus_dir)
+        _feedbacks.append(self)
+
+    def observe(self, stimulus: Stimulus, result: Any) -> int:
+        """
+        Merges the coverage of one example, targets its bins and saves it to
+        the corpus if it hit new ones
+
+        :param stimulus: Example as drawn, replayed as it is from the corpus
+        :param result: Value returned by drive_<module>; results without coverage are ignored
+        :return: Number of bins the example hit first
+        """
+        from hypothesis import currently_in_test_context, target
+
+        coverage = getattr(result, 'coverage', None)
+        if coverage is None:
+            return 0
+        if currently_in_test_context():
+            target(float(coverage.bins), label='coverage bins')
+            for name, values in coverage.states.items():
+                target(float(len(values) + len(coverage.transitions.get(name, ()))), label=f'{name} states')
+        new = self.total.merge(coverage)
+        instrument.count('coverage_bins_new', new)
+        if new:
+            self.corpus.add(stimulus)
+        return new
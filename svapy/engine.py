@@ -0,0 +1,398 @@
+"""
+Compile-once, run-many simulation engine.
+
+The DUT and a generic vector-reading testbench are compiled once per design
+hash. Every example afterwards only writes a vector file and runs the compiled
+model with ``+vectors=`` and ``+cycles=`` plusargs, so no per-example
+compilation is needed. The model is built with iverilog/vvp by default or with
+Verilator (``SVAPY_SIM=verilator``); both report results the same way.
+"""
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Sequence, Type
+
+from svapy import instrument, outputs
+from svapy.cache import ResultCache, file_digest, get_cache
+from svapy.core import generate_vector_testbench
+from svapy.parser import include_digests
+from svapy.ports import Ports
+from svapy.properties import Property, Violation
+from svapy.vectors import direction_name, write_vector_file
+from svapy.waves import WavePolicy, new_dump_path, final_example
+
+if TYPE_CHECKING:
+    from svapy.coverage import Coverage
+
+BUILD_DIR = os.path.join('build', 'svapy')
+
+_MISMATCH_RE = re.compile(r'SVAPY_MISMATCH cycle=(\d+) port=(\w+) expected=(\w+) actual=(\w+)')
+_DONE_RE = re.compile(r'SVAPY_DONE cycles=(\d+) errors=(\d+)')
+_PROPERTY_RE = re.compile(r'SVAPY_PROPERTY name=(\w+) cycle=(\d+)')
+
+@dataclass
+class Mismatch:
+    """A single output mismatch reported by the testbench"""
+    cycle: int
+    port: str
+    expected: str
+    actual: str
+
+@dataclass
+class SimulationResult:
+    """Outcome of one simulation run"""
+    cycles: int = 0
+    errors: int = 0
+    completed: bool = False
+    mismatches: List[Mismatch] = field(default_factory=list)
+    output: str = ''
+    cached: bool = False
+    dump: str = ''
+    violations: List[Violation] = field(default_factory=list)
+    # Set when coverage is collected (see svapy.coverage), not cached
+    coverage: Optional['Coverage'] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.completed and self.errors == 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data['cached']
+        del data['dump']
+        del data['coverage']
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SimulationResult':
+        mismatches = [Mismatch(**m) for m in data.get('mismatches', [])]
+        violations = [Violation(**v) for v in data.get('violations', [])]
+        return cls(cycles=data['cycles'], errors=data['errors'], completed=data['completed'],
+                   mismatches=mismatches, output=data.get('output', ''), violations=violations)
+
+def parse_simulation_output(output: str) -> SimulationResult:
+    """
+    Parses the SVAPY_MISMATCH / SVAPY_PROPERTY / SVAPY_DONE lines printed by the vector testbench
+
+    :param output: Simulator standard output
+    :return: Parsed simulation result
+    """
+    result = SimulationResult(output=output)
+    for match in _MISMATCH_RE.finditer(output):
+        result.mismatches.append(Mismatch(int(match.group(1)), match.group(2), match.group(3), match.group(4)))
+    for match in _PROPERTY_RE.finditer(output):
+        result.violations.append(Violation(match.group(1), int(match.group(2))))
+
+    done = _DONE_RE.search(output)
+    if done:
+        result.completed = True
+        result.cycles = int(done.group(1))
+        result.errors = int(done.group(2))
+    else:
+        result.errors = len(result.mismatches) + len(result.violations)
+    return result
+
+
+_SIMULATOR_VERSIONS: Dict[str, str] = {}
+
+def simulator_version(executable: str) -> str:
+    """
+    Returns the first line of `<executable> -V`, or 'unknown' if it cannot be run
+    """
+    if executable not in _SIMULATOR_VERSIONS:
+        try:
+            proc = subprocess.run([executable, '-V'], capture_output=True, text=True)
+            lines = (proc.stdout or proc.stderr).strip().splitlines()
+            _SIMULATOR_VERSIONS[executable] = lines[0] if lines else 'unknown'
+        except OSError:
+            _SIMULATOR_VERSIONS[executable] = 'unknown'
+    return _SIMULATOR_VERSIONS[executable]
+
+def design_hash(design_files: Sequence[str], testbench: str, *extra: str) -> str:
+    """
+    Hashes design sources, the headers they include, testbench source and any extra build settings
+
+    :return: Hex digest identifying one compiled design
+    """
+    digest = hashlib.sha256()
+    digest.update(testbench.encode())
+    for path in design_files:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    for item in [*include_digests(design_files, ()), *extra]:
+        digest.update(b'\0' + item.encode())
+    return digest.hexdigest()
+
+class SimulationEngine:
+    """
+    Compiles a module with the generic vector testbench once and runs it many times.
+    This backend compiles with iverilog and runs the result with vvp.
+    """
+
+    backend = 'iverilog'
+    binary_suffix = '.vvp'
+
+    def __init__(self, module_name: str, ports_info: Ports,
+                 design_files: Sequence[str], build_dir: str = BUILD_DIR,
+                 depth: int = 1 << 16, iverilog: str = 'iverilog', vvp: str = 'vvp',
+                 cache: Optional[ResultCache] = None, sample_ports: Optional[Sequence[str]] = None,
+                 waves: Optional[WavePolicy] = None, properties: Sequence[Property] = ()) -> None:
+        self.module_name = module_name
+        self.ports_info = ports_info
+        self.design_files = list(design_files)
+        self.build_dir = build_dir
+        self.depth = depth
+        self.iverilog = iverilog
+        self.vvp = vvp
+        self.cache = cache
+        self.sample_ports = outputs.sample_ports(ports_info, sample_ports)
+        self.waves = waves or WavePolicy.from_env()
+        self.properties = list(properties)
+        self.testbench = generate_vector_testbench(module_name, ports_info, depth=depth,
+                                                   sample_ports=self.sample_ports, waves=self.waves,
+                                                   properties=self.properties)
+        self.design_hash = design_hash(self.design_files, self.testbench, str(depth), *self.build_options())
+        self._binary: Optional[str] = None
+
+    @property
+    def binary_path(self) -> str:
+        return os.path.join(self.build_dir, f'{self.module_name}_{self.design_hash[:16]}{self.binary_suffix}')
+
+    def build_options(self) -> List[str]:
+        """
+        Returns backend settings that change the compiled model, folded into the design hash
+        """
+        return []
+
+    def version(self) -> str:
+        """
+        Returns the simulator version, part of the result cache key
+        """
+        return simulator_version(self.iverilog)
+
+    def build(self, tb_path: str, binary: str) -> None:
+        """
+        Compiles the design files and testbench into binary
+        """
+        cmd = [self.iverilog, '-g2012', '-s', f'{self.module_name}_tb', '-o', binary]
+        proc = subprocess.run(cmd + self.design_files + [tb_path], capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Compilation error: {proc.stderr.strip() or proc.stdout.strip()}")
+
+    def command(self, binary: str) -> List[str]:
+        """
+        Returns the command running a compiled binary, before plusargs
+        """
+        return [self.vvp, '-n', binary]
+
+    def compile(self) -> str:
+        """
+        Compiles the design unless a binary for the same design hash already exists
+
+        :return: Path to the compiled vvp binary
+        """
+        if self._binary is not None:
+            return self._binary
+
+        binary = self.binary_path
+        if not os.path.exists(binary):
+            os.makedirs(self.build_dir, exist_ok=True)
+            tb_path = os.path.join(self.build_dir, f'{self.module_name}_{self.design_hash[:16]}_tb.sv')
+            with open(tb_path, 'w') as f:
+                f.write(self.testbench)
+
+            # Compile into a private file first so concurrent workers never see a partial binary
+            tmp_binary = f'{binary}.{os.getpid()}.tmp'
+            with instrument.phase('compile'):
+                self.build(tb_path, tmp_binary)
+            os.replace(tmp_binary, binary)
+            instrument.count('compiles')
+        else:
+            instrument.count('binary_reuses')
+
+        self._binary = binary
+        return binary
+
+    def run(self, vector_path: str, num_cycles: int, dump_path: Optional[str] = None,
+            samples_path: Optional[str] = None, keep_going: bool = False) -> SimulationResult:
+        """
+        Runs the compiled design over a vector file
+
+        :param vector_path: $readmemh vector file (see svapy.vectors)
+        :param num_cycles: Number of cycles in the vector file
+        :param dump_path: Optional file to dump waveforms into, in the format of the wave policy
+        :param samples_path: Optional binary file receiving the sampled ports (see load_samples)
+        :param keep_going: Keep simulating after a property violation instead of stopping
+        :return: Parsed simulation result
+        """
+        if num_cycles > self.depth:
+            raise ValueError(f"Sequence of {num_cycles} cycles exceeds engine depth {self.depth}")
+
+        # Dumps and sample files are side effects, so only plain runs are served from the cache
+        key = None
+        if self.cache is not None and not dump_path and not samples_path:
+            key = self.cache.key(self.design_hash, self.version(),
+                                 file_digest(vector_path), str(num_cycles), *(['+keep_going'] if keep_going else []))
+            cached = self.cache.get(key)
+            if cached is not None:
+                instrument.count('cache_hits')
+                result = SimulationResult.from_dict(cached)
+                result.cached = True
+                return result
+            instrument.count('cache_misses')
+
+        cmd = self.command(self.compile())
+        if dump_path:
+            cmd += self.waves.run_args(self.backend)
+        cmd += [f'+vectors={vector_path}', f'+cycles={num_cycles}']
+        if dump_path:
+            cmd.append(f'+dump={dump_path}')
+        if samples_path:
+            cmd.append(f'+samples={samples_path}')
+        if keep_going:
+            cmd.append('+keep_going')
+        with instrument.phase('simulate'):
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+        with instrument.phase('check'):
+            result = parse_simulation_output(proc.stdout)
+        instrument.count('simulations')
+        instrument.count('cycles_simulated', result.cycles)
+        if proc.returncode != 0 and not result.completed:
+            raise RuntimeError(f"Simulation error: {proc.stderr.strip() or proc.stdout.strip()}")
+
+        if key is not None and self.cache is not None and result.completed:
+            self.cache.put(key, result.to_dict())
+        result.dump = dump_path or ''
+        return result
+
+    def run_sequences(self, sequences: Dict[str, Optional[Sequence[Any]]], vector_path: str,
+                      dump_path: Optional[str] = None, samples_path: Optional[str] = None,
+                      keep_going: bool = False) -> SimulationResult:
+        """
+        Writes sequences into a vector file and simulates them
+
+        :param sequences: Mapping from port name to a value sequence or None
+        :param vector_path: Where to write the vector file
+        :param dump_path: Optional file to dump waveforms into, in the format of the wave policy
+        :param samples_path: Optional binary file receiving the sampled ports (see load_samples)
+        :param keep_going: Keep simulating after a property violation instead of stopping
+        :return: Parsed simulation result
+        """
+        num_cycles = write_vector_file(vector_path, self.ports_info, sequences)
+        return self.run(vector_path, num_cycles, dump_path, samples_path, keep_going)
+
+    def run_example(self, sequences: Dict[str, Optional[Sequence[Any]]], vector_path: str,
+                    samples_path: Optional[str] = None) -> SimulationResult:
+        """
+        Simulates sequences under the wave policy: with 'all' every run is
+        dumped, with 'failure' a failing run is repeated with dumping enabled
+        (inside Hypothesis only for the final replay of the shrunk example).
+        The dump file, if any, is in result.dump.
+        """
+        num_cycles = write_vector_file(vector_path, self.ports_info, sequences)
+        if self.waves.dump_always:
+            return self.run(vector_path, num_cycles, new_dump_path(self.module_name, self.waves), samples_path)
+
+        result = self.run(vector_path, num_cycles, samples_path=samples_path)
+        if not result.passed and self.waves.dump_failures and final_example():
+            rerun = self.run(vector_path, num_cycles, new_dump_path(self.module_name, self.waves))
+            result.dump = rerun.dump
+        return result
+
+    def run_stream(self, chunks: Iterable[Mapping[str, Optional[Sequence[Any]]]], **kwargs: Any) -> SimulationResult:
+        """
+        Simulates stimulus chunks while they are generated, fed through a named
+        pipe instead of a vector file (see svapy.stream.run_stream for the options)
+        """
+        from svapy.stream import run_stream
+
+        return run_stream(self, chunks, **kwargs)
+
+    def load_samples(self, samples_path: str, mmap: bool = True) -> Dict[str, Any]:
+        """
+        Loads the per-cycle port samples written by a run as NumPy arrays
+        """
+        return outputs.load_samples(samples_path, self.ports_info, self.sample_ports, mmap)
+
+class VerilatorEngine(SimulationEngine):
+    """
+    Simulation engine backend that builds the design and testbench into a
+    native executable with Verilator (``--binary --timing``). Builds take longer
+    than with iverilog, but long runs are much faster.
+    """
+
+    backend = 'verilator'
+    binary_suffix = '.vlt'
+
+    def __init__(self, module_name: str, ports_info: Ports,
+                 design_files: Sequence[str], verilator: str = 'verilator',
+                 flags: Sequence[str] = (), **kwargs: Any) -> None:
+        self.verilator = verilator
+        self.flags = list(flags)
+        super().__init__(module_name, ports_info, design_files, **kwargs)
+
+    def build_options(self) -> List[str]:
+        return [self.backend, *self.waves.build_flags(self.backend), *self.flags]
+
+    def version(self) -> str:
+        return simulator_version(self.verilator)
+
+    def build(self, tb_path: str, binary: str) -> None:
+        top = f'{self.module_name}_tb'
+        obj_dir = f'{binary}.obj'
+        # --trace(-fst) keeps $dumpvars working; tracing only costs time once a dump is opened
+        cmd = [self.verilator, '--binary', '--timing', *self.waves.build_flags(self.backend), '-Wno-fatal', '-j', '0',
+               '--top-module', top, '-Mdir', obj_dir, *self.flags]
+        try:
+            proc = subprocess.run(cmd + self.design_files + [tb_path], capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise RuntimeError(f"Compilation error: {proc.stderr.strip() or proc.stdout.strip()}")
+            os.replace(os.path.join(obj_dir, f'V{top}'), binary)
+        finally:
+            shutil.rmtree(obj_dir, ignore_errors=True)
+
+    def command(self, binary: str) -> List[str]:
+        return [binary]
+
+
+# Simulator backends selectable with SVAPY_SIM or the simulator argument of get_engine
+BACKENDS: Dict[str, Type[SimulationEngine]] = {
+    'iverilog': SimulationEngine,
+    'verilator': VerilatorEngine,
+}
+
+_ENGINES: Dict[str, SimulationEngine] = {}
+
+def _engine_key(simulator: str, module_name: str, ports_info: Ports, design_files: Sequence[str],
+                kwargs: Mapping[str, Any]) -> str:
+    # Every setting an engine is built from, except the result cache it shares
+    ports = [(port, direction_name(info['direction']), int(info['width']), info.get('role'))
+             for port, info in ports_info.items()]
+    settings = [(name, value) for name, value in sorted(kwargs.items()) if name not in ('cache', 'properties')]
+    properties = [prop.key() for prop in kwargs.get('properties') or ()]
+    return repr((simulator, module_name, list(design_files), ports, settings, properties))
+
+def get_engine(module_name: str, ports_info: Ports,
+               design_files: Sequence[str], simulator: Optional[str] = None,
+               **kwargs: Any) -> SimulationEngine:
+    """
+    Returns a per-process shared engine for a module, creating it on first use.
+    The backend defaults to the SVAPY_SIM environment variable, or iverilog.
+    Simulation results are cached on disk unless SVAPY_RESULT_CACHE is set to 0.
+    Engines differing in ports, properties or any other setting are separate.
+    """
+    simulator = simulator or os.environ.get('SVAPY_SIM', 'iverilog')
+    if simulator not in BACKENDS:
+        raise ValueError(f"Unknown simulator backend: {simulator}")
+
+    key = _engine_key(simulator, module_name, ports_info, design_files, kwargs)
+    engine = _ENGINES.get(key)
+    if engine is None:
+        if 'cache' not in kwargs and os.environ.get('SVAPY_RESULT_CACHE', '1') != '0':
+            kwargs['cache'] = get_cache()
+        engine = BACKENDS[simulator](module_name, ports_info, design_files, **kwargs)
+        _ENGINES[key] = engine
+    return engine
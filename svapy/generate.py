@@ -0,0 +1,274 @@
+"""
+Writing of generated interfaces and runners, for one module or whole RTL trees.
+
+Tree generation fans parsing and rendering out over a process pool, one task
+per source file, and skips every file whose source hash (covering the headers
+it includes), template hash, runner settings and port roles are unchanged
+since the last run (recorded in ``gen/.svapy-state.json``). Every file of
+the tree is a design file of every module, so hierarchies spread over several
+files compile, and a module defined in two files is an error.
+"""
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from svapy.cache import file_digest
+from svapy.clocking import assign_port_roles
+from svapy.core import generate_module, generate_runner
+from svapy.parser import include_digests
+from svapy.ports import Ports
+
+GEN_DIR = 'gen'
+STATE_FILE = '.svapy-state.json'
+SOURCE_EXTENSIONS = ('.v', '.sv')
+
+def output_paths(module_name: str, out_dir: str = GEN_DIR) -> List[str]:
+    """
+    Returns the files write_module_files writes for a module
+    """
+    return [os.path.join(out_dir, f'{module_name}_interface.py'), os.path.join(out_dir, f'run_{module_name}.py')]
+
+def write_module_files(module_name: str, ports: Ports,
+                       design_files: Sequence[str], out_dir: str = GEN_DIR,
+                       runner_settings: Optional[Dict[str, int]] = None) -> List[str]:
+    """
+    Writes gen/<module>_interface.py and gen/run_<module>.py
+
+    :param module_name: Name of the Verilog module
+    :param ports: Dictionary containing port information
+    :param design_files: Verilog sources of the design
+    :param out_dir: Output directory
+    :param runner_settings: min_cycles, max_cycles and max_examples of the runner (see generate_runner)
+    :return: Paths of the written files
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    interface_path, runner_path = output_paths(module_name, out_dir)
+
+    interface_code = generate_module(module_name, ports, list(design_files))
+    with open(interface_path, "w") as f:
+        f.write("# Auto-generated interface\n")
+        f.write(f"# Module: {module_name}\n")
+        f.write(f"# Created: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        f.write(interface_code)
+
+    runner_code = generate_runner(module_name, ports, **(runner_settings or {}))
+    with open(runner_path, 'w') as f:
+        f.write(runner_code)
+
+    return [interface_path, runner_path]
+
+def template_sources() -> List[str]:
+    """
+    Returns the files generated code depends on: the templates and every
+    module of the package, since port tables, vector layouts and strategies
+    all shape what is rendered
+    """
+    package_dir = os.path.dirname(__file__)
+    template_dir = os.path.join(package_dir, 'templates')
+    paths = [os.path.join(template_dir, name) for name in sorted(os.listdir(template_dir))]
+    paths += [os.path.join(package_dir, name) for name in sorted(os.listdir(package_dir)) if name.endswith('.py')]
+    return paths
+
+def template_hash() -> str:
+    """
+    Hashes the code generation templates and the modules that render them
+    """
+    digest = hashlib.sha256()
+    for path in template_sources():
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()
+
+def discover_sources(directory: str, extensions: Sequence[str] = SOURCE_EXTENSIONS) -> List[str]:
+    """
+    Finds Verilog sources below a directory
+
+    :return: Sorted list of file paths
+    """
+    sources: List[str] = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        sources += [os.path.join(root, name) for name in files if name.endswith(tuple(extensions))]
+    return sorted(sources)
+
+def read_manifest(path: str) -> List[str]:
+    """
+    Reads a manifest listing one Verilog file per line.
+    Blank lines and lines starting with '#' are ignored; relative paths are
+    resolved against the manifest's directory.
+    """
+    base = os.path.dirname(path)
+    sources: List[str] = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                sources.append(os.path.normpath(os.path.join(base, line)))
+    return sources
+
+@dataclass
+class UnitResult:
+    """Outcome of generating the modules of one source file"""
+    source: str
+    source_hash: str = ''
+    modules: List[str] = field(default_factory=list)
+    skipped: bool = False
+    error: Optional[str] = None
+
+@dataclass
+class UnitTask:
+    """Generation of the modules of one source file, run in a worker process"""
+    source: str
+    include: List[str]
+    define: List[str]
+    out_dir: str
+    templates: str
+    runner_settings: Dict[str, int]
+    previous: Optional[Dict[str, Any]] = None
+    roles: Dict[str, str] = field(default_factory=dict)
+    # Every file of the tree, recorded as DESIGN_FILES so submodules in other files are compiled too
+    design_files: List[str] = field(default_factory=list)
+
+def source_hash(source: str, include: Sequence[str], define: Sequence[str]) -> str:
+    digest = hashlib.sha256(file_digest(source).encode())
+    for item in [*include_digests([source], include), 'include', *include, 'define', *define]:
+        digest.update(b'\0' + item.encode())
+    return digest.hexdigest()
+
+def design_hash(design_files: Sequence[str]) -> str:
+    return hashlib.sha256('\0'.join(design_files).encode()).hexdigest()
+
+def _unchanged(task: UnitTask, result: UnitResult) -> bool:
+    previous = task.previous
+    return (previous is not None and previous.get('source_hash') == result.source_hash
+            and previous.get('template_hash') == task.templates
+            and previous.get('runner_settings', {}) == task.runner_settings
+            and previous.get('roles', {}) == task.roles
+            and all(os.path.exists(path) for m in previous.get('modules', []) for path in output_paths(m, task.out_dir)))
+
+def _scan_unit(task: UnitTask) -> UnitResult:
+    # Lists the modules of one file, parsing it only if it changed
+    result = UnitResult(task.source)
+    try:
+        result.source_hash = source_hash(task.source, task.include, task.define)
+        if task.previous is not None and _unchanged(task, result):
+            result.modules = list(task.previous.get('modules', []))
+            result.skipped = True
+            return result
+
+        from svapy.parser import extract_all_module_ports
+
+        result.modules = list(extract_all_module_ports([task.source], include=task.include, define=task.define))
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+def _write_unit(task: UnitTask) -> Optional[str]:
+    # Writes the interfaces and runners of one file; the parse comes from the cache filled by _scan_unit
+    try:
+        from svapy.parser import extract_all_module_ports
+
+        modules = extract_all_module_ports([task.source], include=task.include, define=task.define, roles=task.roles)
+        for module_name, ports in modules.items():
+            write_module_files(module_name, ports, task.design_files, task.out_dir, task.runner_settings)
+    except Exception as e:
+        return str(e)
+    return None
+
+def check_duplicate_modules(results: Sequence[UnitResult]) -> None:
+    """
+    Raises ValueError if two source files define the same module, whose
+    generated files would overwrite each other
+    """
+    defined: Dict[str, str] = {}
+    for result in results:
+        for module in result.modules:
+            if module in defined:
+                raise ValueError(f"Module '{module}' is defined in both {defined[module]} and {result.source}")
+            defined[module] = result.source
+
+def load_state(out_dir: str = GEN_DIR) -> Dict[str, Any]:
+    path = os.path.join(out_dir, STATE_FILE)
+    try:
+        with open(path, 'r') as f:
+            state: Dict[str, Any] = json.load(f)
+        return state
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state: Dict[str, Any], out_dir: str = GEN_DIR) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, STATE_FILE)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def generate_tree(sources: Sequence[str], include: Sequence[str] = (), define: Sequence[str] = (),
+                  jobs: Optional[int] = None, out_dir: str = GEN_DIR, force: bool = False,
+                  runner_settings: Optional[Dict[str, int]] = None,
+                  roles: Optional[Dict[str, str]] = None) -> List[UnitResult]:
+    """
+    Generates interfaces and runners for every module of many source files.
+
+    :param sources: Verilog source files, each parsed on its own; all of them are design files of every module
+    :param include: Include directories passed to the preprocessor
+    :param define: Macro definitions passed to the preprocessor
+    :param jobs: Number of worker processes, defaults to the CPU count
+    :param out_dir: Output directory
+    :param force: Regenerate files even if nothing changed
+    :param runner_settings: min_cycles, max_cycles and max_examples of the runners (see generate_runner)
+    :param roles: Port roles overriding the name heuristics, applied to every module having the port
+    :return: One result per source file
+    """
+    roles = dict(roles or {})
+    # Unknown roles are rejected before any worker starts
+    assign_port_roles({}, roles)
+    state = {} if force else load_state(out_dir)
+    templates = template_hash()
+    runner_settings = dict(runner_settings or {})
+    tasks = [UnitTask(source, list(include), list(define), out_dir, templates, runner_settings, state.get(source),
+                      roles)
+             for source in sources]
+
+    jobs = jobs or os.cpu_count() or 1
+    serial = jobs == 1 or len(tasks) <= 1
+    with contextlib.nullcontext() if serial else ProcessPoolExecutor(max_workers=jobs) as pool:
+        run_all: Callable[..., Iterable[Any]] = map if pool is None else pool.map
+        results: List[UnitResult] = list(run_all(_scan_unit, tasks))
+        # Nothing is written before duplicates are ruled out
+        check_duplicate_modules(results)
+
+        design_files = [result.source for result in results if result.error is None]
+        design = design_hash(design_files)
+        pending: List[Tuple[UnitTask, UnitResult]] = []
+        for task, result in zip(tasks, results):
+            if result.error is not None:
+                continue
+            if result.skipped and (task.previous or {}).get('design_hash') == design:
+                continue
+            result.skipped = False
+            task.design_files = design_files
+            pending.append((task, result))
+        for (task, result), error in zip(pending, run_all(_write_unit, [task for task, _ in pending])):
+            result.error = error
+
+    new_state = load_state(out_dir) if force else state
+    for result in results:
+        if result.error is None:
+            new_state[result.source] = {
+                'source_hash': result.source_hash,
+                'template_hash': templates,
+                'runner_settings': runner_settings,
+                'roles': roles,
+                'design_hash': design,
+                'modules': result.modules,
+            }
+        else:
+            new_state.pop(result.source, None)
+    save_state(new_state, out_dir)
+    return results
@@ -0,0 +1,239 @@
+"""
+Per-phase timers and counters for generated runners.
+
+When profiling is enabled, svapy records the wall time spent in each phase of
+an example, how often each phase ran, and a few counters:
+
+- ``draw``: Hypothesis drawing and decoding stimulus (svapy.strategies)
+- ``convert``: turning sequences into trimmed stimulus arrays (drive_<module>)
+- ``write``: writing testbench and vector files (counter ``bytes_written``)
+- ``compile``: building the simulator model (counters ``compiles``, ``binary_reuses``)
+- ``simulate``: simulator wall time (counters ``simulations``, ``cycles_simulated``)
+- ``check``: parsing simulator output and comparing expected values
+- counters ``cache_hits`` and ``cache_misses`` of the simulation result cache
+- counter ``coverage_bins_new`` of coverage bins first hit (svapy.coverage)
+
+Profiling is off by default and costs one function call per phase then.
+It is enabled with SVAPY_PROFILE=1, or with the ``--svapy-profile`` option of
+the pytest plugin in this module (loaded with ``-p svapy.instrument`` or
+through the ``pytest11`` entry point). At the end of the session the results
+are written as JSON to SVAPY_PROFILE_FILE (``build/profile.json`` by default,
+one file per pytest-xdist worker) and a summary table is printed.
+"""
+import atexit
+import contextlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+PROFILE_FILE = os.path.join('build', 'profile.json')
+
+@dataclass
+class PhaseStats:
+    """Accumulated wall time of one phase, in seconds"""
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+class Profiler:
+    """
+    Collects phase timings and counters of one process.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, PhaseStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Times the body of a with statement as one call of a phase
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, elapsed: float) -> None:
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        stats.add(elapsed)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def reset(self) -> None:
+        self.phases.clear()
+        self.counters.clear()
+        self.started = time.perf_counter()
+
+    @property
+    def wall_time(self) -> float:
+        return time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        from svapy.artifacts import worker_id
+
+        return {
+            'worker': worker_id(),
+            'wall_time': self.wall_time,
+            'phases': {name: {'calls': s.calls, 'total': s.total, 'max': s.max}
+                       for name, s in sorted(self.phases.items(), key=lambda item: -item[1].total)},
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+    def summary(self) -> str:
+        """
+        Returns a plain-text table of phases, sorted by total time, and counters
+        """
+        wall = self.wall_time
+        lines = [f"{'phase':<12} {'calls':>8} {'total s':>10} {'mean ms':>10} {'max ms':>10} {'share':>7}"]
+        for name, s in sorted(self.phases.items(), key=lambda item: -item[1].total):
+            share = 100.0 * s.total / wall if wall else 0.0
+            lines.append(f'{name:<12} {s.calls:>8} {s.total:>10.3f} {1000.0 * s.total / s.calls:>10.3f} '
+                         f'{1000.0 * s.max:>10.3f} {share:>6.1f}%')
+        lines.append(f"{'wall':<12} {'':>8} {wall:>10.3f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'{name:<23} {value:>10}')
+        return '\n'.join(lines)
+
+    def write(self, path: str) -> None:
+        """
+        Writes the results as JSON, atomically
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+# Profiler of this process while profiling is enabled
+_profiler: Optional[Profiler] = None
+_report_path: Optional[str] = None
+_exit_report = False
+_atexit_registered = False
+
+def enabled() -> bool:
+    return _profiler is not None
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+def enable(path: Optional[str] = None, report_at_exit: bool = True) -> Profiler:
+    """
+    Starts profiling this process, keeping the running profiler if there is one
+
+    :param path: JSON results file, defaults to SVAPY_PROFILE_FILE or PROFILE_FILE
+    :param report_at_exit: Write the results and print the summary when the interpreter exits
+    :return: The active profiler
+    """
+    global _profiler, _report_path, _exit_report, _atexit_registered
+    if _profiler is None:
+        _profiler = Profiler()
+    _report_path = path or os.environ.get('SVAPY_PROFILE_FILE') or PROFILE_FILE
+    if report_at_exit and not _atexit_registered:
+        atexit.register(_report_at_exit)
+        _atexit_registered = True
+    _exit_report = report_at_exit
+    return _profiler
+
+def disable() -> None:
+    global _profiler, _exit_report
+    _profiler = None
+    _exit_report = False
+
+def report_path(path: Optional[str] = None) -> str:
+    """
+    Returns the results file of this process: one per pytest-xdist worker
+    """
+    from svapy.artifacts import worker_id
+
+    path = path or _report_path or PROFILE_FILE
+    worker = worker_id()
+    if worker == 'main':
+        return path
+    root, ext = os.path.splitext(path)
+    return f'{root}_{worker}{ext}'
+
+def report(path: Optional[str] = None, stream: Any = None) -> Optional[str]:
+    """
+    Writes the results of the active profiler and prints its summary
+
+    :return: The results file, or None when profiling is disabled
+    """
+    if _profiler is None:
+        return None
+    path = report_path(path)
+    _profiler.write(path)
+    print(f'svapy profile ({path}):\n{_profiler.summary()}', file=stream or sys.stderr)
+    return path
+
+def _report_at_exit() -> None:
+    if _exit_report:
+        report()
+
+def phase(name: str) -> Any:
+    """
+    Returns a context manager timing one call of a phase, or a no-op one when profiling is disabled
+    """
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.phase(name)
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Adds amount to a counter when profiling is enabled
+    """
+    if _profiler is not None:
+        _profiler.count(name, amount)
+
+def enable_from_env() -> None:
+    """
+    Enables profiling if SVAPY_PROFILE is set to anything but '' or '0'
+    """
+    if os.environ.get('SVAPY_PROFILE', '0') not in ('', '0'):
+        enable()
+
+
+enable_from_env()
+
+# pytest plugin
+
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup('svapy')
+    group.addoption('--svapy-profile', action='store_true', default=False,
+                    help="time svapy phases and write the results as JSON (see svapy.instrument)")
+    group.addoption('--svapy-profile-file', default=None,
+                    help="JSON results file (default: SVAPY_PROFILE_FILE or build/profile.json)")
+
+def pytest_configure(config: Any) -> None:
+    if config.getoption('svapy_profile', False) or enabled():
+        # The plugin reports at the end of the session instead of at exit
+        enable(config.getoption('svapy_profile_file', None), report_at_exit=False)
+
+def pytest_sessionfinish(session: Any) -> None:
+    if _profiler is not None:
+        session.config._svapy_profile = report_path()
+        _profiler.write(session.config._svapy_profile)
+
+def pytest_terminal_summary(terminalreporter: Any) -> None:
+    path = getattr(terminalreporter.config, '_svapy_profile', None)
+    if _profiler is not None and path:
+        terminalreporter.write_sep('=', 'svapy profile')
+        terminalreporter.write_line(_profiler.summary())
+        terminalreporter.write_line(f'Results: {path}')
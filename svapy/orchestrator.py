@@ -0,0 +1,253 @@
+"""
+Concurrent compile-and-simulate runner for generated testbenches.
+
+Testbenches are discovered when the run starts, so files generated earlier in
+the same ``make`` invocation are picked up. Every testbench is compiled and
+simulated as asyncio subprocesses, at most one per core at a time; output
+lines are streamed with a ``[testbench]`` prefix, kept in per-testbench log
+files, and the outcome is written to a JSON summary. With the default wave
+policy only failing testbenches are simulated again with dumping enabled.
+
+    python -m svapy.orchestrator --design example/counter.v [-j JOBS] [--sim verilator]
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import IO, Any, Dict, List, Optional, Sequence
+
+from svapy.engine import parse_simulation_output
+from svapy.waves import FORMATS, POLICIES, WavePolicy
+
+TEST_DIR = os.path.join('gen', 'tests')
+BUILD_DIR = os.path.join('build', 'bin')
+SUMMARY_FILE = os.path.join('build', 'sim-summary.json')
+
+# Lines reported as errors by $error/$fatal in iverilog and Verilator
+_ERROR_RE = re.compile(r'^(ERROR|FATAL|%Error|%Fatal)', re.MULTILINE)
+_MODULE_RE = re.compile(r'^\s*module\s+(\w+)', re.MULTILINE)
+
+@dataclass
+class StepResult:
+    """One compile or simulate subprocess"""
+    command: List[str]
+    returncode: int
+    duration: float
+
+@dataclass
+class TestbenchResult:
+    """Outcome of compiling and simulating one testbench"""
+    testbench: str
+    log: str
+    steps: List[StepResult] = field(default_factory=list)
+    errors: int = 0
+    passed: bool = False
+    duration: float = 0.0
+    dump: str = ''
+
+def discover_testbenches(test_dir: str = TEST_DIR, pattern: str = '*.sv') -> List[str]:
+    """
+    Lists testbenches at the time of the call
+
+    :return: Sorted testbench paths
+    """
+    return sorted(glob.glob(os.path.join(test_dir, pattern)))
+
+def top_module(testbench: str) -> str:
+    """
+    Returns the name of the first module declared in a testbench
+    """
+    with open(testbench, 'r') as f:
+        match = _MODULE_RE.search(f.read())
+    if match is None:
+        raise ValueError(f"No module found in {testbench}")
+    return match.group(1)
+
+def build_commands(testbench: str, design_files: Sequence[str], build_dir: str, simulator: str = 'iverilog',
+                   iverilog: str = 'iverilog', vvp: str = 'vvp', verilator: str = 'verilator',
+                   waves: Optional[WavePolicy] = None) -> List[List[str]]:
+    """
+    Returns the compile and simulate commands for one testbench
+
+    :param testbench: Testbench source
+    :param design_files: Verilog sources of the design
+    :param build_dir: Directory receiving the compiled binaries
+    :param simulator: 'iverilog' or 'verilator'
+    :param waves: Wave policy, selects the Verilator trace format
+    :return: List of commands, run in order
+    """
+    waves = waves or WavePolicy()
+    name = os.path.splitext(os.path.basename(testbench))[0]
+    if simulator == 'iverilog':
+        binary = os.path.join(build_dir, f'{name}.vvp')
+        return [[iverilog, '-g2012', '-o', binary, *design_files, testbench],
+                [vvp, '-n', binary]]
+    if simulator == 'verilator':
+        top = top_module(testbench)
+        obj_dir = os.path.join(build_dir, f'{name}.obj')
+        return [[verilator, '--binary', '--timing', *waves.build_flags(simulator), '-Wno-fatal', '--top-module', top,
+                 '-Mdir', obj_dir, *design_files, testbench],
+                [os.path.join(obj_dir, f'V{top}')]]
+    raise ValueError(f"Unknown simulator backend: {simulator}")
+
+async def _run_step(command: List[str], name: str, log: IO[str], stream: Optional[IO[str]]) -> StepResult:
+    start = time.perf_counter()
+    log.write(f"$ {' '.join(command)}\n")
+    try:
+        proc = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.STDOUT)
+    except OSError as e:
+        log.write(f"{e}\n")
+        return StepResult(command, 127, time.perf_counter() - start)
+
+    assert proc.stdout is not None
+    async for raw in proc.stdout:
+        line = raw.decode(errors='replace')
+        log.write(line)
+        if stream is not None:
+            stream.write(f"[{name}] {line}")
+            stream.flush()
+    returncode = await proc.wait()
+    return StepResult(command, returncode, time.perf_counter() - start)
+
+def dump_command(command: List[str], dump_path: str, simulator: str, waves: WavePolicy) -> List[str]:
+    """
+    Returns a simulate command that dumps waveforms into dump_path
+    """
+    return [*command, *waves.run_args(simulator), f'+dump={dump_path}']
+
+def _check(result: TestbenchResult, output: str) -> None:
+    simulation = parse_simulation_output(output)
+    result.errors = max(simulation.errors, len(_ERROR_RE.findall(output)))
+    result.passed = (len(result.steps) == 2 and all(s.returncode == 0 for s in result.steps)
+                     and result.errors == 0)
+
+async def run_testbench(testbench: str, design_files: Sequence[str], semaphore: asyncio.Semaphore,
+                        build_dir: str = BUILD_DIR, log_dir: Optional[str] = None, simulator: str = 'iverilog',
+                        stream: Optional[IO[str]] = None, waves: Optional[WavePolicy] = None,
+                        **executables: str) -> TestbenchResult:
+    """
+    Compiles and simulates one testbench once a concurrency slot is free.
+    Waveforms are dumped into <build_dir>/dump as the wave policy asks: for
+    every run, or by simulating a failing testbench once more with dumping.
+    """
+    waves = waves or WavePolicy()
+    name = os.path.splitext(os.path.basename(testbench))[0]
+    log_dir = log_dir or os.path.join(build_dir, 'logs')
+    dump_path = os.path.join(build_dir, 'dump', name + waves.extension)
+    result = TestbenchResult(testbench, os.path.join(log_dir, f'{name}.log'))
+
+    async with semaphore:
+        start = time.perf_counter()
+        commands = build_commands(testbench, design_files, build_dir, simulator, waves=waves, **executables)
+        if waves.dump_always:
+            os.makedirs(os.path.dirname(dump_path), exist_ok=True)
+            commands[-1] = dump_command(commands[-1], dump_path, simulator, waves)
+            result.dump = dump_path
+        with open(result.log, 'w') as log:
+            for command in commands:
+                step = await _run_step(command, name, log, stream)
+                result.steps.append(step)
+                if step.returncode != 0:
+                    break
+
+        with open(result.log, 'r') as f:
+            _check(result, f.read())
+        if not result.passed and not waves.dump_always and waves.dump_failures and len(result.steps) == 2:
+            # The outcome stays that of the first run, the re-run only adds the dump
+            os.makedirs(os.path.dirname(dump_path), exist_ok=True)
+            with open(result.log, 'a') as log:
+                log.write('# re-run with waveform dumping\n')
+                await _run_step(dump_command(commands[-1], dump_path, simulator, waves), name, log, None)
+            result.dump = dump_path
+        result.duration = time.perf_counter() - start
+    return result
+
+async def run_testbenches(testbenches: Sequence[str], design_files: Sequence[str], jobs: Optional[int] = None,
+                          build_dir: str = BUILD_DIR, log_dir: Optional[str] = None, simulator: str = 'iverilog',
+                          stream: Optional[IO[str]] = None, waves: Optional[WavePolicy] = None,
+                          **executables: str) -> List[TestbenchResult]:
+    """
+    Runs many testbenches with at most `jobs` (default: CPU count) running at once
+
+    :param testbenches: Testbench sources
+    :param design_files: Verilog sources of the design
+    :param jobs: Concurrency limit
+    :param build_dir: Directory receiving the compiled binaries
+    :param log_dir: Directory receiving one log per testbench, defaults to <build_dir>/logs
+    :param simulator: 'iverilog' or 'verilator'
+    :param stream: Where output lines are streamed, e.g. sys.stdout; None keeps them in the logs only
+    :param waves: Wave policy, defaults to SVAPY_WAVES and friends (see svapy.waves)
+    :return: One result per testbench, in input order
+    """
+    log_dir = log_dir or os.path.join(build_dir, 'logs')
+    os.makedirs(build_dir, exist_ok=True)
+    os.makedirs(log_dir, exist_ok=True)
+
+    semaphore = asyncio.Semaphore(jobs or os.cpu_count() or 1)
+    waves = waves or WavePolicy.from_env()
+    tasks = [run_testbench(tb, design_files, semaphore, build_dir, log_dir, simulator, stream, waves, **executables)
+             for tb in testbenches]
+    return list(await asyncio.gather(*tasks))
+
+def summarize(results: Sequence[TestbenchResult], duration: float) -> Dict[str, Any]:
+    """
+    Builds the machine-readable summary of a run
+    """
+    return {
+        'total': len(results),
+        'passed': sum(1 for r in results if r.passed),
+        'failed': sum(1 for r in results if not r.passed),
+        'duration': round(duration, 3),
+        'testbenches': [asdict(r) for r in results],
+    }
+
+def write_summary(summary: Dict[str, Any], path: str = SUMMARY_FILE) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, path)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile and simulate generated testbenches concurrently")
+    parser.add_argument('--design', action='append', required=True, help="Verilog source of the design")
+    parser.add_argument('--tests', default=TEST_DIR, help="directory searched for *.sv testbenches")
+    parser.add_argument('--build', default=BUILD_DIR, help="directory for binaries and logs")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="concurrent testbenches (default: CPU count)")
+    parser.add_argument('--sim', default='iverilog', choices=['iverilog', 'verilator'], help="simulator backend")
+    parser.add_argument('--summary', default=SUMMARY_FILE, help="JSON summary path")
+    parser.add_argument('--quiet', action='store_true', help="do not stream simulator output")
+    parser.add_argument('--waves', choices=POLICIES, default=None,
+                        help="waveform dumping: none, failure (re-run failing testbenches) or all (default: SVAPY_WAVES)")
+    parser.add_argument('--wave-format', choices=FORMATS, default=None, help="dump format (default: SVAPY_WAVE_FORMAT)")
+    args = parser.parse_args(argv)
+
+    waves = WavePolicy.from_env()
+    waves = WavePolicy(args.waves or waves.policy, args.wave_format or waves.format, waves.depth, waves.signals)
+
+    testbenches = discover_testbenches(args.tests)
+    start = time.perf_counter()
+    results = asyncio.run(run_testbenches(testbenches, args.design, args.jobs, args.build, simulator=args.sim,
+                                          stream=None if args.quiet else sys.stdout, waves=waves))
+    summary = summarize(results, time.perf_counter() - start)
+    write_summary(summary, args.summary)
+
+    for result in results:
+        if not result.passed:
+            dump = f", waves: {result.dump}" if result.dump else ''
+            print(f"FAILED {result.testbench} ({result.errors} error(s), log: {result.log}{dump})")
+    print(f"{summary['passed']}/{summary['total']} testbench(es) passed in {summary['duration']:.2f}s, "
+          f"summary: {args.summary}")
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Compact binary capture of output ports.
+
+When a vector testbench is run with ``+samples=<file>`` it writes the sampled
+output ports once per cycle with ``$fwrite("%u")``: every port takes
+``ceil(width / 32)`` little-endian 32-bit words, least significant word first.
+The file is loaded back as NumPy arrays without parsing any text, and ports of
+up to 32 bits are returned as zero-copy views of the file.
+"""
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from svapy.ports import Ports
+from svapy.vectors import direction_name
+
+# (port, width, first word, number of words)
+SampleField = Tuple[str, int, int, int]
+
+def sample_ports(ports_info: Ports, ports: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Returns the ports to sample: the given ones, or every output port
+
+    :param ports_info: Dictionary containing port information
+    :param ports: Explicit port selection
+    :return: List of port names in sampling order
+    """
+    if ports is None:
+        return [p for p, info in ports_info.items() if direction_name(info['direction']) == 'Output']
+    for port in ports:
+        if port not in ports_info:
+            raise ValueError(f"Unknown port: {port}")
+    return list(ports)
+
+def sample_layout(ports_info: Ports, ports: Optional[Sequence[str]] = None) -> List[SampleField]:
+    """
+    Describes where each sampled port is stored within one cycle's record
+    """
+    layout: List[SampleField] = []
+    offset = 0
+    for port in sample_ports(ports_info, ports):
+        width = int(ports_info[port]['width'])
+        words = (width + 31) // 32
+        layout.append((port, width, offset, words))
+        offset += words
+    return layout
+
+def record_words(layout: List[SampleField]) -> int:
+    """
+    Returns the number of 32-bit words written per cycle
+    """
+    return sum(field[3] for field in layout)
+
+def load_samples(path: str, ports_info: Ports, ports: Optional[Sequence[str]] = None,
+                 mmap: bool = True) -> Dict[str, npt.NDArray[Any]]:
+    """
+    Loads a sample file written by the vector testbench.
+
+    Ports of up to 32 bits are uint32 views into the file (memory-mapped unless
+    mmap is False), ports of 33 to 64 bits are uint64 arrays and wider ports are
+    object arrays of Python ints.
+
+    :param path: Sample file path
+    :param ports_info: Dictionary containing port information
+    :param ports: Ports the testbench was generated to sample, defaults to all outputs
+    :param mmap: Memory-map the file instead of reading it
+    :return: Mapping from port name to a one-dimensional array with one value per cycle
+    """
+    layout = sample_layout(ports_info, ports)
+    words = record_words(layout)
+    if not layout:
+        return {}
+
+    dtype = np.dtype('<u4')
+    if os.path.getsize(path) == 0:
+        raw: npt.NDArray[Any] = np.zeros(0, dtype=dtype)
+    elif mmap:
+        raw = np.memmap(path, dtype=dtype, mode='r')
+    else:
+        raw = np.fromfile(path, dtype=dtype)
+    return decode_records(raw[:len(raw) - len(raw) % words].reshape(-1, words), layout)
+
+def decode_records(records: npt.NDArray[Any], layout: List[SampleField]) -> Dict[str, npt.NDArray[Any]]:
+    """
+    Splits sample records into one array per port, see load_samples
+
+    :param records: Array of shape (cycles, record_words(layout)) of little-endian 32-bit words
+    :param layout: Layout of one record
+    :return: Mapping from port name to a one-dimensional array with one value per cycle
+    """
+    samples: Dict[str, npt.NDArray[Any]] = {}
+    for port, width, offset, count in layout:
+        if count == 1:
+            samples[port] = records[:, offset]
+        elif count == 2:
+            low = records[:, offset].astype(np.uint64)
+            high = records[:, offset + 1].astype(np.uint64)
+            samples[port] = low | (high << np.uint64(32))
+        else:
+            values = np.empty(len(records), dtype=object)
+            for i, row in enumerate(records[:, offset:offset + count]):
+                values[i] = sum(int(word) << (32 * k) for k, word in enumerate(row))
+            samples[port] = values
+    return samples
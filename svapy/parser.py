@@ -1,51 +1,254 @@
-from pyverilog.vparser.parser import parse
-from pyverilog.vparser.ast import ModuleDef, Port
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Sequence
 import os
+import re
+import tempfile
+import threading
 
-def extract_module_ports(module_name: str, filepath: str) -> Dict[str, Dict[str, Any]]:
+from svapy.cache import ResultCache, file_digest, get_cache
+from svapy.clocking import assign_port_roles
+from svapy.ports import PortInfo, PortTable, port_table
 
+# pyverilog is only imported once a file actually has to be parsed (or a cached
+# port table restored); building its parser tables dominates a cold parse.
+
+# Port tables of every module in a parsed file, keyed by parse cache key
+_PARSE_CACHE: Dict[str, Dict[str, PortTable]] = {}
+
+# Per-process pyverilog parser, reused across files
+_VERILOG_PARSER: Any = None
+_PARSER_LOCK = threading.Lock()
+
+_INCLUDE_RE = re.compile(r'^[ \t]*`include[ \t]+"([^"]+)"', re.MULTILINE)
+
+def _module_ports(module: Any) -> PortTable:
+    ports_info: PortTable = {}
+    if not (hasattr(module, 'portlist') and module.portlist and hasattr(module.portlist, 'ports')):
+        return ports_info
+
+    ports = module.portlist.ports
+    for p in ports:
+        if not (hasattr(p, 'first') and p.first):
+            continue
+
+        direction = type(p.first)
+        width = 1
+
+        # Calculate width if available
+        if (hasattr(p.first, 'width') and p.first.width is not None
+                and hasattr(p.first.width, 'msb') and hasattr(p.first.width, 'lsb')
+                and hasattr(p.first.width.msb, 'value') and hasattr(p.first.width.lsb, 'value')):
+            width = (int(p.first.width.msb.value) - int(p.first.width.lsb.value)) + 1
+
+        ports_info[p.first.name] = PortInfo(direction, width)
+
+    return ports_info
+
+def _verilog_parser() -> Any:
+    global _VERILOG_PARSER
+    if _VERILOG_PARSER is None:
+        from pyverilog.vparser.parser import VerilogParser
+
+        # Keep the generated parser tables out of the working directory
+        with tempfile.TemporaryDirectory(prefix='svapy_parse_') as workdir:
+            _VERILOG_PARSER = VerilogParser(outputdir=workdir, debug=False)
+    return _VERILOG_PARSER
+
+def _parse(filepaths: Sequence[str], include: Sequence[str], define: Sequence[str]) -> Any:
+    from pyverilog.vparser.preprocessor import VerilogPreprocessor
+
+    # pyverilog writes its preprocessor output into the working directory by
+    # default; keep it private so concurrent parses cannot collide.
+    with tempfile.TemporaryDirectory(prefix='svapy_parse_') as workdir:
+        output = os.path.join(workdir, 'preprocess.output')
+        VerilogPreprocessor(list(filepaths), output, list(include), list(define)).preprocess()
+        with open(output, 'r') as f:
+            text = f.read()
+
+    with _PARSER_LOCK:
+        parser = _verilog_parser()
+        parser.lexer.reset_lineno()
+        parser.lexer.directives = []
+        return parser.parse(text)
+
+def include_digests(filepaths: Sequence[str], include: Sequence[str]) -> List[str]:
+    """
+    Digests the headers included by the given files, directly or through other headers.
+
+    Headers are looked up next to the including file, in the working directory
+    and in the include directories; every match is digested, whichever one the
+    preprocessor picks. Includes inside inactive `ifdef branches count too, and
+    a header that cannot be found is recorded by name, so creating it changes
+    the digests.
+
+    :param filepaths: Verilog source files
+    :param include: Include directories passed to the preprocessor
+    :return: One entry per header name and match, in include order
+    """
+    digests: List[str] = []
+    seen = set()
+    pending = list(filepaths)
+    while pending:
+        path = pending.pop(0)
+        with open(path, 'r', errors='replace') as f:
+            names = _INCLUDE_RE.findall(f.read())
+        for name in names:
+            candidates = [os.path.join(os.path.dirname(path), name), name,
+                          *[os.path.join(directory, name) for directory in include]]
+            found = [os.path.normpath(c) for c in candidates if os.path.isfile(c)]
+            if not found:
+                digests.append(f'{name}:missing')
+            for header in dict.fromkeys(found):
+                digests.append(f'{name}:{header}:{file_digest(header)}')
+                if header not in seen:
+                    seen.add(header)
+                    pending.append(header)
+    return digests
+
+def _parse_key(filepaths: Sequence[str], include: Sequence[str], define: Sequence[str]) -> str:
+    import pyverilog
+
+    return ResultCache.key(*[file_digest(path) for path in filepaths], *include_digests(filepaths, include),
+                           pyverilog.__version__, 'include', *include, 'define', *define)
+
+def _to_json(modules: Dict[str, PortTable]) -> Dict[str, Any]:
+    return {
+        name: {port: {'direction': info.direction.__name__, 'width': info.width}
+               for port, info in ports.items()}
+        for name, ports in modules.items()
+    }
+
+def _from_json(data: Dict[str, Any]) -> Dict[str, PortTable]:
+    import pyverilog.vparser.ast as vast
+
+    return {
+        name: {port: PortInfo(getattr(vast, info['direction']), info['width'])
+               for port, info in ports.items()}
+        for name, ports in data.items()
+    }
+
+def _file_ports(filepaths: Sequence[str], include: Sequence[str], define: Sequence[str],
+                use_cache: bool) -> Dict[str, PortTable]:
+    """
+    Returns the port tables of all modules in the given files, parsing them only on a cache miss.
+    Results are cached in memory and under gen/cache/parse.
+    """
+    key = _parse_key(filepaths, include, define)
+    if use_cache:
+        if key in _PARSE_CACHE:
+            return _PARSE_CACHE[key]
+        cached = get_cache('parse').get(key)
+        if cached is not None:
+            _PARSE_CACHE[key] = _from_json(cached)
+            return _PARSE_CACHE[key]
+
+    from pyverilog.vparser.ast import ModuleDef
+
+    ast = _parse(filepaths, include, define)
+
+    modules: Dict[str, PortTable] = {}
+    for definition in ast.description.definitions:
+        if isinstance(definition, ModuleDef):
+            modules[definition.name] = _module_ports(definition)
+
+    if use_cache:
+        _PARSE_CACHE[key] = modules
+        get_cache('parse').put(key, _to_json(modules))
+    return modules
+
+def extract_module_ports(module_name: str, filepath: str,
+                         include: Optional[Sequence[str]] = None,
+                         define: Optional[Sequence[str]] = None,
+                         use_cache: bool = True,
+                         roles: Optional[Dict[str, str]] = None) -> PortTable:
+    """
+    Extracts the port table of one module.
+
+    Port tables of every module in the file are cached by file content, included
+    headers, include paths, defines and pyverilog version, so repeated calls
+    skip parsing.
+    Every port gets a 'role' ('clock', 'reset', 'reset_n' or 'data'), guessed
+    from its name unless given in roles.
+
+    :param module_name: Name of the Verilog module
+    :param filepath: Verilog source file
+    :param include: Include directories passed to the preprocessor
+    :param define: Macro definitions passed to the preprocessor
+    :param use_cache: Set to False to always parse the file
+    :param roles: Port roles overriding the name heuristics, by port name
+    :return: Dictionary containing port information
+    """
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"File not found: {filepath}")
-    
+
     try:
-        ast, _ = parse([filepath])
-        
-        target_module: Optional[ModuleDef] = None
-        for definition in ast.description.definitions:
-            if hasattr(definition, 'name') and definition.name == module_name:
-                target_module = definition
-                break
-        
-        if not target_module:
+        modules = _file_ports([filepath], include or (), define or (), use_cache)
+
+        if module_name not in modules:
             raise ValueError(f"Module '{module_name}' not found in file")
-        
-        ports_info: Dict[str, Dict[str, Any]] = {}
-        if not (hasattr(target_module, 'portlist') and target_module.portlist and hasattr(target_module.portlist, 'ports')):
-            return ports_info
-            
-        ports = target_module.portlist.ports
-        for p in ports:
-            if not (hasattr(p, 'first') and p.first):
-                continue
-                
-            direction = type(p.first)
-            width = 1
-            
-            # Calculate width if available
-            if (hasattr(p.first, 'width') and p.first.width is not None
-                    and hasattr(p.first.width, 'msb') and hasattr(p.first.width, 'lsb')
-                    and hasattr(p.first.width.msb, 'value') and hasattr(p.first.width.lsb, 'value')):
-                width = (int(p.first.width.msb.value) - int(p.first.width.lsb.value)) + 1
-
-            ports_info[p.first.name] = {
-                'direction': direction,
-                'width': width
-            }
-        
-        return ports_info
-    
+
+        return assign_port_roles(port_table(modules[module_name]), roles)
+
+    except Exception as e:
+        raise RuntimeError(f"Parsing error: {str(e)}")
+
+def extract_all_module_ports(filepaths: Sequence[str],
+                             include: Optional[Sequence[str]] = None,
+                             define: Optional[Sequence[str]] = None,
+                             use_cache: bool = True,
+                             roles: Optional[Dict[str, str]] = None) -> Dict[str, PortTable]:
+    """
+    Extracts the port tables of every module defined in one or more files with a single parse.
+
+    :param filepaths: Verilog source files, parsed together
+    :param include: Include directories passed to the preprocessor
+    :param define: Macro definitions passed to the preprocessor
+    :param use_cache: Set to False to always parse the files
+    :param roles: Port roles overriding the name heuristics, applied to every module having the port
+    :return: Dictionary mapping module names to port information
+    """
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    for filepath in filepaths:
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+
+    try:
+        modules = _file_ports(list(filepaths), include or (), define or (), use_cache)
+        return {
+            name: assign_port_roles(port_table(ports), roles)
+            for name, ports in modules.items()
+        }
+
+    except Exception as e:
+        raise RuntimeError(f"Parsing error: {str(e)}")
+
+def parse_module(module_name: str, filepaths: Sequence[str],
+                 include: Optional[Sequence[str]] = None,
+                 define: Optional[Sequence[str]] = None) -> Any:
+    """
+    Parses Verilog files and returns the pyverilog AST of one module.
+    Unlike port tables, the full AST is not cached.
+
+    :param module_name: Name of the Verilog module
+    :param filepaths: Verilog source files, parsed together
+    :param include: Include directories passed to the preprocessor
+    :param define: Macro definitions passed to the preprocessor
+    :return: pyverilog ModuleDef node
+    """
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    for filepath in filepaths:
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+
+    try:
+        from pyverilog.vparser.ast import ModuleDef
+
+        ast = _parse(list(filepaths), include or (), define or ())
+        for definition in ast.description.definitions:
+            if isinstance(definition, ModuleDef) and definition.name == module_name:
+                return definition
+        raise ValueError(f"Module '{module_name}' not found in file")
+
     except Exception as e:
         raise RuntimeError(f"Parsing error: {str(e)}")
-    
-    
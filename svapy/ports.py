@@ -0,0 +1,70 @@
+"""
+Port tables.
+
+A port table maps port names to ``PortInfo`` records. ``PortInfo`` is a
+slotted dataclass, but it is also a read-only mapping that answers
+``info['width']``, ``'role' in info`` and ``dict(info)``, so code and
+templates written against the plain dictionaries used so far keep working.
+Functions that only read port information take ``Ports``, which accepts both
+a ``PortTable`` and a dictionary of dictionaries.
+"""
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from svapy.vectors import direction_name
+
+@dataclass(slots=True)
+class PortInfo(Mapping[str, Any]):
+    """Direction, width and role of one port"""
+    direction: Any
+    width: int = 1
+    role: Optional[str] = None
+
+    @classmethod
+    def from_mapping(cls, info: Mapping[str, Any]) -> 'PortInfo':
+        """
+        Builds a new record from a PortInfo or a {'direction', 'width', 'role'} dictionary
+        """
+        return cls(info['direction'], int(info['width']), info.get('role'))
+
+    @property
+    def is_input(self) -> bool:
+        return direction_name(self.direction) == 'Input'
+
+    @property
+    def is_output(self) -> bool:
+        return direction_name(self.direction) == 'Output'
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in _FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELDS and getattr(self, str(key)) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in _FIELDS if getattr(self, name) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+_FIELDS = tuple(f.name for f in fields(PortInfo))
+
+# Port name -> PortInfo, in declaration order
+PortTable = Dict[str, PortInfo]
+
+# Port name -> PortInfo or {'direction', 'width', 'role'} dictionary, read only
+Ports = Mapping[str, Mapping[str, Any]]
+
+def port_table(ports_info: Ports) -> PortTable:
+    """
+    Copies port information given as PortInfo records or dictionaries into a PortTable
+    """
+    return {port: PortInfo.from_mapping(info) for port, info in ports_info.items()}
@@ -0,0 +1,484 @@
+"""
+Temporal properties over port values, checked inside the simulator or with NumPy.
+
+Properties are built from ports and constants with comparisons, bitwise
+operators and bit selects, and a few temporal operators::
+
+    from svapy.properties import Property, implies, next_cycle, sig, stable_until
+
+    PROPERTIES = [
+        Property('ack_after_req', implies(sig('req'), next_cycle(sig('ack')))),
+        Property('data_held', stable_until(sig('data'), sig('ready'), when=sig('valid'))),
+        Property('no_overflow', sig('count') <= 200),
+    ]
+
+The same property is compiled into checker code for the generated
+testbenches (history registers and a ``svapy_check_properties`` task,
+portable to simulators without concurrent assertion support) and evaluated
+vectorized over NumPy arrays, e.g. the traces of svapy.pysim. A property is
+checked at every evaluation point: every step of a combinational module, or
+every falling clock edge with reset released for a clocked one. Looking
+ahead with next_cycle is implemented by delaying the check, so a violation is
+reported at the latest point the property looks at. Testbenches print
+``SVAPY_PROPERTY name=<name> cycle=<step>`` and stop at the first violation.
+
+``&``, ``|`` and ``^`` are bitwise, ``~`` is logical negation; comparisons
+are unsigned. Ports are referenced by name at the testbench scope.
+"""
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from svapy.ports import Ports
+
+_NAME_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Operators with their SystemVerilog spelling, shared by both evaluators
+_BINARY = {
+    '==': '==', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>=',
+    '&': '&', '|': '|', '^': '^', 'and': '&&', 'or': '||',
+}
+
+Operand = Union['Expr', int]
+
+@dataclass
+class Violation:
+    """A property that did not hold at one evaluation point"""
+    property: str
+    cycle: int
+
+class Expr(ABC):
+    """
+    Expression over port values at evaluation points relative to the current one.
+    """
+
+    @abstractmethod
+    def delayed(self, cycles: int) -> 'Expr':
+        """Returns the expression as seen cycles evaluation points later (negative: earlier)"""
+
+    @abstractmethod
+    def delays(self) -> Dict[str, Tuple[int, int]]:
+        """Returns {port: (smallest, largest delay)} of every port referenced"""
+
+    @abstractmethod
+    def to_sv(self) -> str:
+        """Returns the expression in SystemVerilog, over the testbench signals"""
+
+    @abstractmethod
+    def evaluate(self, values: Mapping[Tuple[str, int], Any]) -> Any:
+        """
+        Evaluates the expression over arrays whose last axis is the evaluation point
+
+        :param values: Mapping from (port, delay) to the array of that port delayed by delay points
+        """
+
+    def __eq__(self, other: Operand) -> 'Expr':  # type: ignore[override]
+        return BinaryOp('==', self, _expr(other))
+
+    def __ne__(self, other: Operand) -> 'Expr':  # type: ignore[override]
+        return BinaryOp('!=', self, _expr(other))
+
+    def __lt__(self, other: Operand) -> 'Expr':
+        return BinaryOp('<', self, _expr(other))
+
+    def __le__(self, other: Operand) -> 'Expr':
+        return BinaryOp('<=', self, _expr(other))
+
+    def __gt__(self, other: Operand) -> 'Expr':
+        return BinaryOp('>', self, _expr(other))
+
+    def __ge__(self, other: Operand) -> 'Expr':
+        return BinaryOp('>=', self, _expr(other))
+
+    def __and__(self, other: Operand) -> 'Expr':
+        return BinaryOp('&', self, _expr(other))
+
+    def __or__(self, other: Operand) -> 'Expr':
+        return BinaryOp('|', self, _expr(other))
+
+    def __xor__(self, other: Operand) -> 'Expr':
+        return BinaryOp('^', self, _expr(other))
+
+    def __invert__(self) -> 'Expr':
+        return Not(self)
+
+    def __bool__(self) -> bool:
+        raise TypeError("Properties are not Python booleans, use all_of/any_of/not_ instead of and/or/not")
+
+    __hash__ = object.__hash__
+
+class Const(Expr):
+    def __init__(self, value: int) -> None:
+        if value < 0:
+            raise ValueError(f"Constants must not be negative, got {value}")
+        self.value = int(value)
+
+    def delayed(self, cycles: int) -> Expr:
+        return self
+
+    def delays(self) -> Dict[str, Tuple[int, int]]:
+        return {}
+
+    def to_sv(self) -> str:
+        return f"{max(1, self.value.bit_length())}'d{self.value}"
+
+    def evaluate(self, values: Mapping[Tuple[str, int], Any]) -> Any:
+        # A Python int adapts to uint64 and object arrays alike
+        return self.value
+
+class Signal(Expr):
+    """
+    A port, optionally delayed and reduced to bits msb..lsb
+    """
+
+    def __init__(self, name: str, delay: int = 0, bits: Optional[Tuple[int, int]] = None) -> None:
+        if not _NAME_RE.match(name):
+            raise ValueError(f"Invalid port name: {name}")
+        self.name = name
+        self.delay = delay
+        self.bits = bits
+
+    def __getitem__(self, index: Union[int, slice]) -> 'Signal':
+        if self.bits is not None:
+            raise ValueError(f"{self.name} is already a bit select")
+        if isinstance(index, slice):
+            if index.start is None or index.stop is None or index.step is not None:
+                raise ValueError("Part selects are written sig('x')[msb:lsb]")
+            msb, lsb = int(index.start), int(index.stop)
+        else:
+            msb = lsb = int(index)
+        if lsb < 0 or msb < lsb:
+            raise ValueError(f"Invalid bit select [{msb}:{lsb}] of {self.name}")
+        return Signal(self.name, self.delay, (msb, lsb))
+
+    def delayed(self, cycles: int) -> Expr:
+        return Signal(self.name, self.delay + cycles, self.bits)
+
+    def delays(self) -> Dict[str, Tuple[int, int]]:
+        return {self.name: (self.delay, self.delay)}
+
+    def to_sv(self) -> str:
+        if self.delay < 0:
+            raise ValueError("Expressions must be normalized before compiling")
+        name = f'svapy_past{self.delay}_{self.name}' if self.delay else self.name
+        if self.bits is None:
+            return name
+        msb, lsb = self.bits
+        return f'{name}[{msb}]' if msb == lsb else f'{name}[{msb}:{lsb}]'
+
+    def evaluate(self, values: Mapping[Tuple[str, int], Any]) -> Any:
+        array = values[(self.name, self.delay)]
+        if self.bits is None:
+            return array
+        msb, lsb = self.bits
+        mask = (1 << (msb - lsb + 1)) - 1
+        if array.dtype == object:
+            return (array >> lsb) & mask
+        return (array >> np.uint64(lsb)) & np.uint64(mask)
+
+class BinaryOp(Expr):
+    def __init__(self, op: str, left: Expr, right: Expr) -> None:
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def delayed(self, cycles: int) -> Expr:
+        return BinaryOp(self.op, self.left.delayed(cycles), self.right.delayed(cycles))
+
+    def delays(self) -> Dict[str, Tuple[int, int]]:
+        return _merge(self.left.delays(), self.right.delays())
+
+    def to_sv(self) -> str:
+        return f'({self.left.to_sv()} {_BINARY[self.op]} {self.right.to_sv()})'
+
+    def evaluate(self, values: Mapping[Tuple[str, int], Any]) -> Any:
+        left, right = self.left.evaluate(values), self.right.evaluate(values)
+        if self.op == 'and':
+            return _truth(left) & _truth(right)
+        if self.op == 'or':
+            return _truth(left) | _truth(right)
+        if self.op in ('&', '|', '^'):
+            left, right = _integers(left), _integers(right)
+        return {
+            '==': lambda: left == right, '!=': lambda: left != right,
+            '<': lambda: left < right, '<=': lambda: left <= right,
+            '>': lambda: left > right, '>=': lambda: left >= right,
+            '&': lambda: left & right, '|': lambda: left | right, '^': lambda: left ^ right,
+        }[self.op]()
+
+class Not(Expr):
+    def __init__(self, operand: Expr) -> None:
+        self.operand = operand
+
+    def delayed(self, cycles: int) -> Expr:
+        return Not(self.operand.delayed(cycles))
+
+    def delays(self) -> Dict[str, Tuple[int, int]]:
+        return self.operand.delays()
+
+    def to_sv(self) -> str:
+        return f'(!{self.operand.to_sv()})'
+
+    def evaluate(self, values: Mapping[Tuple[str, int], Any]) -> Any:
+        return ~_truth(self.operand.evaluate(values))
+
+def _expr(value: Operand) -> Expr:
+    if isinstance(value, Expr):
+        return value
+    if isinstance(value, (bool, int, np.integer)):
+        return Const(int(value))
+    raise TypeError(f"Cannot use {value!r} in a property")
+
+def _merge(*delays: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+    merged: Dict[str, Tuple[int, int]] = {}
+    for item in delays:
+        for name, (low, high) in item.items():
+            if name in merged:
+                low, high = min(low, merged[name][0]), max(high, merged[name][1])
+            merged[name] = (low, high)
+    return merged
+
+def _integers(value: Any) -> Any:
+    if isinstance(value, np.ndarray) and value.dtype == bool:
+        return value.astype(np.uint64)
+    if isinstance(value, np.bool_):
+        return np.uint64(value)
+    return value
+
+def _truth(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value if value.dtype == bool else value != 0
+    return np.bool_(value != 0)
+
+def sig(name: str) -> Signal:
+    """Returns the current value of a port; sig('x')[3] and sig('x')[7:4] select bits"""
+    return Signal(name)
+
+def const(value: int) -> Expr:
+    return Const(value)
+
+def not_(operand: Operand) -> Expr:
+    return Not(_expr(operand))
+
+def all_of(*operands: Operand) -> Expr:
+    """Logical and of all operands"""
+    result = _expr(operands[0])
+    for operand in operands[1:]:
+        result = BinaryOp('and', result, _expr(operand))
+    return result
+
+def any_of(*operands: Operand) -> Expr:
+    """Logical or of all operands"""
+    result = _expr(operands[0])
+    for operand in operands[1:]:
+        result = BinaryOp('or', result, _expr(operand))
+    return result
+
+def implies(antecedent: Operand, consequent: Operand) -> Expr:
+    """consequent must hold whenever antecedent holds"""
+    return any_of(not_(antecedent), consequent)
+
+def next_cycle(operand: Operand, cycles: int = 1) -> Expr:
+    """Value at the evaluation point cycles points later"""
+    if cycles < 1:
+        raise ValueError(f"cycles must be at least 1, got {cycles}")
+    return _expr(operand).delayed(-cycles)
+
+def past(operand: Operand, cycles: int = 1) -> Expr:
+    """Value at the evaluation point cycles points earlier"""
+    if cycles < 1:
+        raise ValueError(f"cycles must be at least 1, got {cycles}")
+    return _expr(operand).delayed(cycles)
+
+def stable(operand: Operand) -> Expr:
+    """Value is the same as at the previous evaluation point"""
+    return _expr(operand) == past(operand)
+
+def rose(operand: Operand) -> Expr:
+    """Bit 0 changed from 0 to 1 since the previous evaluation point"""
+    bit = _expr(operand) & 1
+    return all_of(bit == 1, past(bit) == 0)
+
+def fell(operand: Operand) -> Expr:
+    """Bit 0 changed from 1 to 0 since the previous evaluation point"""
+    bit = _expr(operand) & 1
+    return all_of(bit == 0, past(bit) == 1)
+
+def stable_until(operand: Operand, until: Operand, when: Optional[Operand] = None) -> Expr:
+    """
+    operand may only change after a point where until held; with when, only
+    points where when held (and until did not) constrain the next one, e.g.
+    stable_until(sig('data'), sig('ready'), when=sig('valid'))
+    """
+    hold = not_(until) if when is None else all_of(when, not_(until))
+    return implies(past(hold), stable(operand))
+
+class Property:
+    """
+    A named condition that must hold at every evaluation point.
+
+    :param name: Identifier reported on violations
+    :param expr: Condition built from sig(), constants and the operators of this module
+    """
+
+    def __init__(self, name: str, expr: Operand) -> None:
+        if not _NAME_RE.match(name):
+            raise ValueError(f"Property names must be identifiers, got {name!r}")
+        self.name = name
+        self.expr = _expr(expr)
+        delays = self.expr.delays()
+        lookahead = max([0] + [-low for low, _ in delays.values()])
+        # Checked `lookahead` points late, so the expression only looks back
+        self.normalized = self.expr.delayed(lookahead)
+        self.depth = max([0] + [high for _, high in self.normalized.delays().values()])
+
+    def ports(self) -> List[str]:
+        return sorted(self.expr.delays())
+
+    def to_sv(self) -> str:
+        return self.normalized.to_sv()
+
+    def key(self) -> str:
+        """Identifies the compiled property, e.g. in engine caches"""
+        return f'{self.name}={self.to_sv()}'
+
+    def __repr__(self) -> str:
+        return f'Property({self.name!r}, {self.to_sv()!r})'
+
+def check_ports(properties: Sequence[Property], ports_info: Ports) -> None:
+    """
+    Raises ValueError if a property references a port the module does not have
+    """
+    for prop in properties:
+        for port in prop.ports():
+            if port not in ports_info:
+                raise ValueError(f"Property {prop.name} references unknown port {port}")
+
+def checker_code(properties: Sequence[Property], ports_info: Ports) -> List[str]:
+    """
+    Returns SystemVerilog module items checking properties: history registers,
+    counters and the task svapy_check_properties, to be called at every
+    evaluation point with the testbench variable cycle set. The task prints
+    one SVAPY_PROPERTY line per violation and counts them in svapy_violations.
+
+    :param properties: Properties to check
+    :param ports_info: Dictionary containing port information
+    :return: Lines without trailing newlines, indented for the module body
+    """
+    if not properties:
+        return []
+    check_ports(properties, ports_info)
+    history: Dict[str, int] = {}
+    for prop in properties:
+        for port, (_, high) in prop.normalized.delays().items():
+            history[port] = max(history.get(port, 0), high)
+
+    lines = ['    // Property checks (svapy.properties)']
+    for port, depth in history.items():
+        width = int(ports_info[port]['width'])
+        vector = f'[{width - 1}:0] ' if width > 1 else ''
+        for delay in range(1, depth + 1):
+            lines.append(f'    logic {vector}svapy_past{delay}_{port};')
+    lines.append('    integer svapy_points = 0;')
+    lines.append('    integer svapy_violations = 0;')
+    lines.append('')
+    lines.append('    task svapy_check_properties;')
+    lines.append('        begin')
+    for prop in properties:
+        condition = f'svapy_points >= {prop.depth} && !{prop.to_sv()}' if prop.depth else f'!{prop.to_sv()}'
+        lines.append(f'            if ({condition}) begin')
+        lines.append('                svapy_violations = svapy_violations + 1;')
+        lines.append(f'                $display("SVAPY_PROPERTY name={prop.name} cycle=%0d", cycle);')
+        lines.append('                $fflush();')
+        lines.append('            end')
+    for port, depth in history.items():
+        for delay in range(depth, 1, -1):
+            lines.append(f'            svapy_past{delay}_{port} = svapy_past{delay - 1}_{port};')
+        if depth:
+            lines.append(f'            svapy_past1_{port} = {port};')
+    lines.append('            svapy_points = svapy_points + 1;')
+    lines.append('        end')
+    lines.append('    endtask')
+    return lines
+
+def evaluation_mask(ports_info: Ports, values: Mapping[str, Any],
+                    steps: int) -> npt.NDArray[np.bool_]:
+    """
+    Returns the evaluation points of the vector testbench: every step of a
+    combinational module, or steps where the clock fell with reset released
+
+    :param ports_info: Dictionary containing port information
+    :param values: Input values applied at every step, one-dimensional arrays
+    :param steps: Number of steps
+    """
+    from svapy.clocking import clock_ports, reset_ports
+
+    clocks = clock_ports(ports_info)
+    if not clocks or values.get(clocks[0]) is None:
+        return np.ones(steps, dtype=bool)
+    clock = np.asarray(values[clocks[0]])[:steps].astype(np.uint64) & np.uint64(1)
+    previous = np.concatenate([np.zeros(1, dtype=np.uint64), clock[:-1]])
+    mask: npt.NDArray[np.bool_] = (clock == 0) & (previous == 1)
+    for port, active_low in reset_ports(ports_info):
+        reset = values.get(port)
+        if reset is not None:
+            level = np.asarray(reset)[:steps].astype(np.uint64) & np.uint64(1)
+            mask &= level == (1 if active_low else 0)
+    return mask
+
+def evaluate(prop: Property, values: Mapping[str, Any],
+             mask: Optional[npt.NDArray[np.bool_]] = None) -> npt.NDArray[np.bool_]:
+    """
+    Evaluates a property vectorized over NumPy arrays
+
+    :param prop: Property to evaluate
+    :param values: Mapping from port name to an array of shape (..., steps), e.g.
+        a batch of pysim traces; a leading axis holds independent examples
+    :param mask: Evaluation points along the last axis, all steps by default
+    :return: Boolean array of the shape of the values, True where a violation is reported
+    """
+    arrays = {port: np.asarray(values[port]) for port in prop.ports()}
+    if not arrays:
+        raise ValueError(f"Property {prop.name} references no port")
+    steps = min(a.shape[-1] for a in arrays.values())
+    points = np.flatnonzero(mask[:steps]) if mask is not None else np.arange(steps)
+
+    delayed: Dict[Tuple[str, int], Any] = {}
+    for port, (low, high) in prop.normalized.delays().items():
+        at_points = arrays[port][..., :steps][..., points]
+        for delay in range(low, high + 1):
+            # Rolling wraps around, but those points are before the property's depth
+            delayed[(port, delay)] = np.roll(at_points, delay, axis=-1) if delay else at_points
+
+    violated = ~_truth(prop.normalized.evaluate(delayed))
+    shape = next(iter(arrays.values()))[..., :steps].shape
+    violated = np.broadcast_to(violated, shape[:-1] + (len(points),)).copy()
+    violated[..., :prop.depth] = False
+    result = np.zeros(shape, dtype=bool)
+    result[..., points] = violated
+    return result
+
+def find_violations(properties: Iterable[Property], values: Mapping[str, Any],
+                    mask: Optional[npt.NDArray[np.bool_]] = None,
+                    stop_at_first: bool = True) -> List[Violation]:
+    """
+    Returns the violations of one example in step order, like a testbench reports them
+
+    :param properties: Properties to evaluate
+    :param values: Mapping from port name to a one-dimensional array per step
+    :param mask: Evaluation points, all steps by default
+    :param stop_at_first: Only report the violations at the first violating step
+    """
+    found: List[Tuple[int, int, Violation]] = []
+    for order, prop in enumerate(properties):
+        for step in np.flatnonzero(evaluate(prop, values, mask)).tolist():
+            found.append((step, order, Violation(prop.name, step)))
+    found.sort(key=lambda item: item[:2])
+    if stop_at_first and found:
+        first = found[0][0]
+        found = [item for item in found if item[0] == first]
+    return [violation for _, _, violation in found]
@@ -0,0 +1,731 @@
+"""
+In-process cycle simulator for a synthesizable Verilog subset.
+
+The pyverilog AST of one module is compiled once into Python closures over
+NumPy uint64 arrays holding one value per example, so a whole batch of
+stimulus sequences is simulated in parallel without leaving the process.
+
+Supported: parameters and localparams, continuous assigns, ``always @(*)``,
+``always @(posedge/negedge ...)`` with blocking and nonblocking assignments,
+``if``, ``case``, arithmetic, logic, shifts, bit and part selects and
+concatenations on signals of up to 64 bits. Values are two-state and
+uninitialized registers start at 0.
+
+Timing follows the vector testbench: the outputs of cycle i are sampled before
+the inputs of cycle i are applied. Clocked blocks then see the new inputs and
+the combinational values of the previous cycle, and combinational logic
+settles afterwards. iverilog remains the reference for signoff.
+"""
+import os
+import re
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+import pyverilog.vparser.ast as vast
+
+from svapy import instrument
+from svapy.coverage import collect, state_registers
+from svapy.engine import Mismatch, SimulationResult
+from svapy.properties import Property, Violation, check_ports, evaluation_mask, find_violations
+from svapy.refmodel import as_batch
+from svapy.stimulus import Stimulus
+
+MAX_WIDTH = 64
+
+Values = Dict[str, npt.NDArray[np.uint64]]
+Expr = Callable[[Values], Any]
+Stmt = Callable[[Values, Values, npt.NDArray[np.bool_]], None]
+# Bit field of a signal written by an assignment: (shift, unshifted mask)
+Field = Callable[[Values], Tuple[Any, Any]]
+# Compiler of one pyverilog node class, see _STATEMENTS and _EXPRESSIONS
+Handler = TypeVar('Handler')
+
+def _mask(width: int) -> np.uint64:
+    return np.uint64((1 << min(width, MAX_WIDTH)) - 1)
+
+def parse_int_const(text: str) -> Tuple[int, Optional[int]]:
+    """
+    Parses a Verilog integer literal; x and z digits read as 0
+
+    :param text: Literal such as 8'hFF, 'b1 or 42
+    :return: (value, size in bits or None if unsized)
+    """
+    text = text.replace('_', '').lower()
+    if "'" not in text:
+        return int(text), None
+    size, rest = text.split("'", 1)
+    rest = rest.lstrip('s')
+    base = {'h': 16, 'd': 10, 'o': 8, 'b': 2}[rest[0]]
+    digits = re.sub('[xz?]', '0', rest[1:])
+    return int(digits, base), int(size) if size else None
+
+def _unsupported(what: str) -> RuntimeError:
+    return RuntimeError(f"Unsupported construct: {what}")
+
+def _shift_left(a: Any, b: Any) -> Any:
+    return np.where(b < MAX_WIDTH, a << np.minimum(b, MAX_WIDTH - 1), 0).astype(np.uint64)
+
+def _shift_right(a: Any, b: Any) -> Any:
+    return np.where(b < MAX_WIDTH, a >> np.minimum(b, MAX_WIDTH - 1), 0).astype(np.uint64)
+
+def _divide(a: Any, b: Any) -> Any:
+    return np.where(b == 0, 0, a // np.where(b == 0, 1, b)).astype(np.uint64)
+
+def _modulo(a: Any, b: Any) -> Any:
+    return np.where(b == 0, 0, a % np.where(b == 0, 1, b)).astype(np.uint64)
+
+def _flag(x: Any) -> Any:
+    return np.asarray(x, dtype=np.uint64)
+
+
+# Binary operators: node class -> (function, result is one bit)
+_BINARY: Dict[type, Tuple[Callable[[Any, Any], Any], bool]] = {
+    vast.Plus: (lambda a, b: a + b, False),
+    vast.Minus: (lambda a, b: a - b, False),
+    vast.Times: (lambda a, b: a * b, False),
+    vast.Divide: (_divide, False),
+    vast.Mod: (_modulo, False),
+    vast.Power: (lambda a, b: a ** b, False),
+    vast.Sll: (_shift_left, False),
+    vast.Sla: (_shift_left, False),
+    vast.Srl: (_shift_right, False),
+    vast.Sra: (_shift_right, False),
+    vast.And: (lambda a, b: a & b, False),
+    vast.Or: (lambda a, b: a | b, False),
+    vast.Xor: (lambda a, b: a ^ b, False),
+    vast.LessThan: (lambda a, b: _flag(a < b), True),
+    vast.GreaterThan: (lambda a, b: _flag(a > b), True),
+    vast.LessEq: (lambda a, b: _flag(a <= b), True),
+    vast.GreaterEq: (lambda a, b: _flag(a >= b), True),
+    vast.Eq: (lambda a, b: _flag(a == b), True),
+    vast.NotEq: (lambda a, b: _flag(a != b), True),
+    vast.Eql: (lambda a, b: _flag(a == b), True),
+    vast.NotEql: (lambda a, b: _flag(a != b), True),
+    vast.Land: (lambda a, b: _flag((a != 0) & (b != 0)), True),
+    vast.Lor: (lambda a, b: _flag((a != 0) | (b != 0)), True),
+}
+
+# Unary operators: node class -> (function of value and operand mask, result is one bit)
+_UNARY: Dict[type, Tuple[Callable[[Any, np.uint64], Any], bool]] = {
+    vast.Uplus: (lambda a, m: a, False),
+    vast.Uminus: (lambda a, m: (np.uint64(0) - a) & m, False),
+    vast.Unot: (lambda a, m: ~a & m, False),
+    vast.Ulnot: (lambda a, m: _flag(a == 0), True),
+    vast.Uand: (lambda a, m: _flag((a & m) == m), True),
+    vast.Unand: (lambda a, m: _flag((a & m) != m), True),
+    vast.Uor: (lambda a, m: _flag((a & m) != 0), True),
+    vast.Unor: (lambda a, m: _flag((a & m) == 0), True),
+    vast.Uxor: (lambda a, m: _flag(np.bitwise_count(a & m) & 1), True),
+    vast.Uxnor: (lambda a, m: _flag(~np.bitwise_count(a & m) & 1), True),
+}
+
+def _nop(v: Values, p: Values, active: npt.NDArray[np.bool_]) -> None:
+    return None
+
+def _any_equal(value: Any, conds: Sequence[Expr], v: Values) -> npt.NDArray[np.bool_]:
+    # Case items listing several values match any of them
+    hit = np.zeros(np.shape(value), dtype=bool)
+    for cond in conds:
+        hit = hit | (value == cond(v))
+    return hit
+
+def _handler(table: Mapping[type, Handler], node: Any) -> Handler:
+    for cls in type(node).__mro__:
+        if cls in table:
+            return table[cls]
+    raise _unsupported(type(node).__name__)
+
+class CycleSimulator:
+    """
+    Simulates one Verilog module over batches of stimulus sequences.
+    """
+
+    def __init__(self, module: Any) -> None:
+        """
+        :param module: pyverilog ModuleDef node, see svapy.parser.parse_module
+        """
+        self.name: str = module.name
+        self.params: Dict[str, Tuple[int, int]] = {}
+        self.widths: Dict[str, int] = {}
+        self.lsbs: Dict[str, int] = {}
+        self.inputs: List[str] = []
+        self.outputs: List[str] = []
+        self.examples = 0
+        self.values: Values = {}
+        self._started = False
+
+        self._initial: List[Stmt] = []
+        # (block, signals read, signals written)
+        self._comb: List[Tuple[Stmt, Set[str], Set[str]]] = []
+        self._comb_cyclic = False
+        # ([(edge, signal)], block)
+        self._clocked: List[Tuple[List[Tuple[str, str]], Stmt]] = []
+
+        self._declare(module)
+        self._compile(module)
+        self._order_comb()
+        self.reset()
+
+    @classmethod
+    def from_files(cls, module_name: str, design_files: Sequence[str],
+                   include: Optional[Sequence[str]] = None,
+                   define: Optional[Sequence[str]] = None) -> 'CycleSimulator':
+        """
+        Parses a module from Verilog sources and builds its simulator
+        """
+        from svapy.parser import parse_module
+
+        return cls(parse_module(module_name, design_files, include, define))
+
+    # Declarations
+
+    def _items(self, module: Any) -> Iterator[Any]:
+        if module.paramlist is not None:
+            for decl in module.paramlist.params:
+                yield from decl.list
+        if module.portlist is not None:
+            for port in module.portlist.ports:
+                if isinstance(port, vast.Ioport):
+                    yield port.first
+                    if port.second is not None:
+                        yield port.second
+        for item in module.items:
+            if isinstance(item, vast.Decl):
+                yield from item.list
+            else:
+                yield item
+
+    def _declare(self, module: Any) -> None:
+        items = list(self._items(module))
+        # Parameters first, as they may size the signals
+        for item in items:
+            if isinstance(item, (vast.Parameter, vast.Localparam)):
+                self._declare_param(item)
+        for item in items:
+            if isinstance(item, vast.Inout):
+                raise _unsupported(f"inout port {item.name}")
+            if isinstance(item, (vast.Input, vast.Output, vast.Reg, vast.Wire, vast.Integer)):
+                self._declare_signal(item)
+
+    def _declare_param(self, item: Any) -> None:
+        _, width = self._expr(item.value)
+        if item.width is not None:
+            width = self._range(item.name, item.width)[0]
+        self.params[item.name] = (self._const(item.value) & int(_mask(width)), width)
+
+    def _declare_signal(self, item: Any) -> None:
+        if getattr(item, 'dimensions', None) is not None:
+            raise _unsupported(f"memory {item.name}")
+        if isinstance(item, vast.Integer):
+            width, lsb = 32, 0
+        elif item.width is not None:
+            width, lsb = self._range(item.name, item.width)
+        else:
+            width, lsb = 1, 0
+        if item.name not in self.widths or item.width is not None:
+            self.widths[item.name] = width
+            self.lsbs[item.name] = lsb
+        if isinstance(item, vast.Input) and item.name not in self.inputs:
+            self.inputs.append(item.name)
+        if isinstance(item, vast.Output) and item.name not in self.outputs:
+            self.outputs.append(item.name)
+
+    def _range(self, name: str, width: Any) -> Tuple[int, int]:
+        msb, lsb = self._const(width.msb), self._const(width.lsb)
+        size = abs(msb - lsb) + 1
+        if size > MAX_WIDTH:
+            raise _unsupported(f"{name} is wider than {MAX_WIDTH} bits")
+        return size, min(msb, lsb)
+
+    def _const(self, node: Any) -> int:
+        expr, _ = self._expr(node)
+        try:
+            with np.errstate(over='ignore'):
+                return int(expr({}))
+        except KeyError:
+            raise _unsupported("non-constant expression where a constant is required")
+
+    # Compilation of processes
+
+    def _compile(self, module: Any) -> None:
+        for item in self._items(module):
+            if isinstance(item, vast.Assign):
+                block = self._assignment(item.left, item.right, blocking=True)
+                self._comb.append((block, *self._names(item)))
+            elif isinstance(item, vast.Always):
+                self._always(item)
+            elif isinstance(item, vast.Initial):
+                self._initial.append(self._stmt(item.statement))
+            elif isinstance(item, (vast.InstanceList, vast.Function, vast.Task, vast.GenerateStatement)):
+                raise _unsupported(type(item).__name__)
+
+    def _always(self, node: Any) -> None:
+        senses = list(node.sens_list.list) if node.sens_list is not None else []
+        edges = [(s.type, s.sig.name) for s in senses if s.type in ('posedge', 'negedge')]
+        block = self._stmt(node.statement)
+
+        if not edges:
+            self._comb.append((block, *self._names(node.statement)))
+            return
+        if len(edges) != len(senses):
+            raise _unsupported("always block mixing edge and level sensitivity")
+        for _, name in edges:
+            if name not in self.inputs:
+                raise _unsupported(f"clocking on internal signal {name}")
+        self._clocked.append((edges, block))
+
+    def _names(self, node: Any) -> Tuple[Set[str], Set[str]]:
+        """Returns the signals read and written by a process"""
+        reads: Set[str] = set()
+        writes: Set[str] = set()
+        self._visit_names(node, reads, writes)
+        return reads, writes
+
+    def _visit_names(self, node: Any, reads: Set[str], writes: Set[str], target: bool = False) -> None:
+        if isinstance(node, vast.Lvalue):
+            self._visit_names(node.var, reads, writes, target=True)
+        elif isinstance(node, vast.LConcat) and target:
+            for part in node.list:
+                self._visit_names(part, reads, writes, target=True)
+        elif isinstance(node, (vast.Pointer, vast.Partselect)) and target:
+            self._visit_names(node.var, reads, writes, target=True)
+            for child in node.children()[1:]:
+                self._visit_names(child, reads, writes)
+        elif isinstance(node, vast.Identifier):
+            if node.name in self.widths:
+                (writes if target else reads).add(node.name)
+        elif node is not None:
+            for child in node.children():
+                self._visit_names(child, reads, writes)
+
+    def _order_comb(self) -> None:
+        """Sorts combinational processes so that one pass settles them, if they form no loop"""
+        remaining = list(range(len(self._comb)))
+        order: List[int] = []
+        while remaining:
+            ready = [i for i in remaining
+                     if not any(j != i and self._comb[j][2] & self._comb[i][1] for j in remaining)]
+            if not ready:
+                self._comb_cyclic = True
+                order += remaining
+                break
+            order += ready
+            remaining = [i for i in remaining if i not in ready]
+        self._comb = [self._comb[i] for i in order]
+
+    # Statements
+
+    def _stmt(self, node: Any) -> Stmt:
+        if node is None:
+            return _nop
+        return _handler(_STATEMENTS, node)(self, node)
+
+    def _block(self, node: Any) -> Stmt:
+        stmts = [self._stmt(s) for s in node.statements]
+
+        def block(v: Values, p: Values, active: npt.NDArray[np.bool_]) -> None:
+            for stmt in stmts:
+                stmt(v, p, active)
+        return block
+
+    def _if(self, node: Any) -> Stmt:
+        cond, _ = self._expr(node.cond)
+        then = self._stmt(node.true_statement)
+        other = self._stmt(node.false_statement) if node.false_statement is not None else None
+
+        def if_stmt(v: Values, p: Values, active: npt.NDArray[np.bool_]) -> None:
+            taken = cond(v) != 0
+            mask = active & taken
+            if mask.any():
+                then(v, p, mask)
+            if other is not None:
+                mask = active & ~taken
+                if mask.any():
+                    other(v, p, mask)
+        return if_stmt
+
+    def _case(self, node: Any) -> Stmt:
+        comp, _ = self._expr(node.comp)
+        items = [([self._expr(c)[0] for c in item.cond] if item.cond is not None else None,
+                  self._stmt(item.statement)) for item in node.caselist]
+
+        def case_stmt(v: Values, p: Values, active: npt.NDArray[np.bool_]) -> None:
+            value = comp(v)
+            remaining = active
+            for conds, stmt in items:
+                match = remaining if conds is None else remaining & _any_equal(value, conds, v)
+                if match.any():
+                    stmt(v, p, match)
+                    remaining = remaining & ~match
+                    if not remaining.any():
+                        return
+        return case_stmt
+
+    def _blocking(self, node: Any) -> Stmt:
+        return self._assignment(node.left, node.right, blocking=True)
+
+    def _nonblocking(self, node: Any) -> Stmt:
+        return self._assignment(node.left, node.right, blocking=False)
+
+    def _target(self, node: Any) -> Tuple[str, Field, int]:
+        """Compiles an assignment target into (signal, bit field, width of the field)"""
+        if isinstance(node, vast.Identifier):
+            name = self._signal(node.name)
+            mask = _mask(self.widths[name])
+            return name, lambda v: (np.uint64(0), mask), self.widths[name]
+
+        if isinstance(node, vast.Pointer) and isinstance(node.var, vast.Identifier):
+            name = self._signal(node.var.name)
+            index, _ = self._expr(node.ptr)
+            lsb, width = np.uint64(self.lsbs[name]), self.widths[name]
+
+            def bit(v: Values) -> Tuple[Any, Any]:
+                offset = np.asarray(index(v) - lsb, dtype=np.uint64)
+                valid = offset < width
+                return np.where(valid, offset, 0).astype(np.uint64), _flag(valid)
+            return name, bit, 1
+
+        if isinstance(node, vast.Partselect) and isinstance(node.var, vast.Identifier):
+            name = self._signal(node.var.name)
+            high, low = self._const(node.msb), self._const(node.lsb)
+            shift, size = np.uint64(min(high, low) - self.lsbs[name]), abs(high - low) + 1
+            mask = _mask(size)
+            return name, lambda v: (shift, mask), size
+
+        raise _unsupported(f"assignment to {type(node).__name__}")
+
+    def _assignment(self, left: Any, right: Any, blocking: bool) -> Stmt:
+        value, _ = self._expr(right)
+        target = left.var if isinstance(left, vast.Lvalue) else left
+        parts = [self._target(t) for t in (target.list if isinstance(target, vast.LConcat) else [target])]
+
+        # Concatenated targets take their slices of the value, last part first
+        fields = []
+        offset = 0
+        for name, field, width in reversed(parts):
+            fields.append((name, field, np.uint64(offset)))
+            offset += width
+
+        def assign(v: Values, p: Values, active: npt.NDArray[np.bool_]) -> None:
+            result = value(v)
+            dest = v if blocking else p
+            for name, field, offset in fields:
+                current = dest.get(name, v[name])
+                shift, mask = field(v)
+                mask = mask << shift
+                new = (current & ~mask) | (((result >> offset) << shift) & mask)
+                dest[name] = np.where(active, new, current)
+        return assign
+
+    # Expressions
+
+    def _signal(self, name: str) -> str:
+        if name not in self.widths:
+            raise _unsupported(f"unknown signal {name}")
+        return name
+
+    def _expr(self, node: Any) -> Tuple[Expr, int]:
+        """Compiles an expression into (function of the signal values, self-determined width)"""
+        return _handler(_EXPRESSIONS, node)(self, node)
+
+    def _rvalue(self, node: Any) -> Tuple[Expr, int]:
+        return self._expr(node.var)
+
+    def _int_const(self, node: Any) -> Tuple[Expr, int]:
+        value, size = parse_int_const(node.value)
+        const = np.uint64(value & int(_mask(MAX_WIDTH)))
+        return (lambda v: const), min(size or 32, MAX_WIDTH)
+
+    def _identifier(self, node: Any) -> Tuple[Expr, int]:
+        if node.name in self.params:
+            param, width = self.params[node.name]
+            const = np.uint64(param)
+            return (lambda v: const), width
+        name = self._signal(node.name)
+        return (lambda v: v[name]), self.widths[name]
+
+    def _cond(self, node: Any) -> Tuple[Expr, int]:
+        cond, _ = self._expr(node.cond)
+        true_value, true_width = self._expr(node.true_value)
+        false_value, false_width = self._expr(node.false_value)
+        return (lambda v: np.asarray(np.where(cond(v) != 0, true_value(v), false_value(v)), dtype=np.uint64),
+                max(true_width, false_width))
+
+    def _pointer(self, node: Any) -> Tuple[Expr, int]:
+        var, width = self._expr(node.var)
+        index, _ = self._expr(node.ptr)
+        lsb = np.uint64(self.lsbs.get(getattr(node.var, 'name', ''), 0))
+        return (lambda v: _shift_right(var(v), np.asarray(index(v) - lsb, dtype=np.uint64)) & np.uint64(1)), 1
+
+    def _partselect(self, node: Any) -> Tuple[Expr, int]:
+        var, _ = self._expr(node.var)
+        msb, lsb = self._const(node.msb), self._const(node.lsb)
+        shift = np.uint64(min(msb, lsb) - self.lsbs.get(getattr(node.var, 'name', ''), 0))
+        width = abs(msb - lsb) + 1
+        mask = _mask(width)
+        return (lambda v: (var(v) >> shift) & mask), width
+
+    def _concat(self, node: Any) -> Tuple[Expr, int]:
+        parts = [self._expr(part) for part in node.list]
+        width = sum(w for _, w in parts)
+        if width > MAX_WIDTH:
+            raise _unsupported(f"concatenation wider than {MAX_WIDTH} bits")
+
+        def concat(v: Values) -> Any:
+            result = np.uint64(0)
+            for part, w in parts:
+                result = (result << np.uint64(w)) | (part(v) & _mask(w))
+            return result
+        return concat, width
+
+    def _repeat(self, node: Any) -> Tuple[Expr, int]:
+        part, part_width = self._expr(node.value)
+        times = self._const(node.times)
+        if part_width * times > MAX_WIDTH:
+            raise _unsupported(f"replication wider than {MAX_WIDTH} bits")
+
+        def repeat(v: Values) -> Any:
+            value = part(v) & _mask(part_width)
+            result = np.uint64(0)
+            for _ in range(times):
+                result = (result << np.uint64(part_width)) | value
+            return result
+        return repeat, part_width * times
+
+    def _unary(self, node: Any) -> Tuple[Expr, int]:
+        unary, one_bit = _UNARY[type(node)]
+        operand, width = self._expr(node.right)
+        mask = _mask(width)
+        return (lambda v: unary(operand(v), mask)), 1 if one_bit else width
+
+    def _xnor(self, node: Any) -> Tuple[Expr, int]:
+        left, left_width = self._expr(node.left)
+        right, right_width = self._expr(node.right)
+        width = max(left_width, right_width)
+        mask = _mask(width)
+        return (lambda v: ~(left(v) ^ right(v)) & mask), width
+
+    def _binary(self, node: Any) -> Tuple[Expr, int]:
+        binary, one_bit = _BINARY[type(node)]
+        left, left_width = self._expr(node.left)
+        right, right_width = self._expr(node.right)
+        if isinstance(node, (vast.Sll, vast.Sla, vast.Srl, vast.Sra, vast.Power)):
+            width = left_width
+        else:
+            width = max(left_width, right_width)
+        return (lambda v: binary(left(v), right(v))), 1 if one_bit else width
+
+    # Simulation
+
+    def reset(self, examples: int = 1) -> None:
+        """
+        Restores the initial state for a batch of examples: every signal at 0,
+        then the initial blocks, then combinational settling
+        """
+        self.examples = examples
+        self.values = {name: np.zeros(examples, dtype=np.uint64) for name in self.widths}
+        self._started = False
+
+        active = np.ones(examples, dtype=bool)
+        pending: Values = {}
+        with np.errstate(over='ignore'):
+            for stmt in self._initial:
+                stmt(self.values, pending, active)
+            self.values.update(pending)
+            self._settle()
+
+    def _settle(self) -> None:
+        active = np.ones(self.examples, dtype=bool)
+        for _ in range(len(self._comb) + MAX_WIDTH if self._comb_cyclic else 1):
+            before = {name: self.values[name] for _, _, writes in self._comb for name in writes}
+            for block, _, _ in self._comb:
+                pending: Values = {}
+                block(self.values, pending, active)
+                self.values.update(pending)
+            if not self._comb_cyclic or all(np.array_equal(self.values[n], b) for n, b in before.items()):
+                return
+        raise RuntimeError(f"Simulation error: combinational logic of {self.name} does not settle")
+
+    def step(self, inputs: Dict[str, npt.ArrayLike]) -> None:
+        """
+        Applies one cycle of inputs: triggers the clocked processes on the input
+        edges, then settles combinational logic. Inputs not given keep their value.
+
+        :param inputs: Mapping from input port to one value per example
+        """
+        previous = {name: self.values[name] for name in self.inputs}
+        for name, value in inputs.items():
+            if name not in self.inputs:
+                raise ValueError(f"Unknown input port: {name}")
+            array = np.broadcast_to(np.asarray(value, dtype=np.uint64), (self.examples,))
+            self.values[name] = array & _mask(self.widths[name])
+
+        with np.errstate(over='ignore'):
+            pending: Values = {}
+            for edges, block in self._clocked:
+                trigger = np.zeros(self.examples, dtype=bool)
+                for edge, name in edges:
+                    now = (self.values[name] & np.uint64(1)) != 0
+                    # The first cycle leaves the unknown initial state, like x -> 0/1
+                    was = ~now if not self._started else (previous[name] & np.uint64(1)) != 0
+                    trigger |= (~was & now) if edge == 'posedge' else (was & ~now)
+                if trigger.any():
+                    block(self.values, pending, trigger)
+            self.values.update(pending)
+            self._settle()
+        self._started = True
+
+    def run(self, inputs: Mapping[str, npt.ArrayLike], signals: Optional[Sequence[str]] = None,
+            cycles: Optional[int] = None) -> Dict[str, npt.NDArray[np.uint64]]:
+        """
+        Simulates a batch of stimulus sequences from the initial state.
+
+        :param inputs: Mapping from input port to an (examples, cycles) array;
+            missing inputs stay at 0
+        :param signals: Signals to record, defaults to the output ports
+        :param cycles: Number of cycles when no input is given
+        :return: Mapping from signal name to an (examples, cycles) array holding
+            the value sampled at the start of every cycle
+        """
+        names = list(inputs)
+        arrays = dict(zip(names, as_batch(*inputs.values()))) if names else {}
+        examples, num_cycles = next(iter(arrays.values())).shape if arrays else (1, cycles or 0)
+
+        record = list(signals) if signals is not None else list(self.outputs)
+        for name in record:
+            self._signal(name)
+        traces = {name: np.empty((examples, num_cycles), dtype=np.uint64) for name in record}
+
+        self.reset(examples)
+        for cycle in range(num_cycles):
+            for name in record:
+                traces[name][:, cycle] = self.values[name]
+            self.step({name: array[:, cycle] for name, array in arrays.items()})
+        return traces
+
+    def _mismatches(self, stimulus: Stimulus, traces: Mapping[str, npt.NDArray[np.uint64]],
+                    num_cycles: int) -> List[Tuple[int, int, Mismatch]]:
+        """Compares the outputs of one example, returning (cycle, port order, mismatch) per failed check"""
+        failed: List[Tuple[int, int, Mismatch]] = []
+        for order, port in enumerate(self.outputs):
+            values = stimulus.array(port)
+            if values is None:
+                continue
+            expected = values[:num_cycles].astype(np.uint64) & _mask(self.widths[port])
+            actual = traces[port][0]
+            wrong = actual != expected
+            check = stimulus.check(port)
+            if check is not None:
+                wrong &= check[:num_cycles]
+            for cycle in np.flatnonzero(wrong).tolist():
+                mismatch = Mismatch(cycle, port, format(int(expected[cycle]), 'x'), format(int(actual[cycle]), 'x'))
+                failed.append((cycle, order, mismatch))
+        return failed
+
+    def run_sequences(self, sequences: Mapping[str, Optional[Sequence[Any]]],
+                      properties: Sequence[Property] = (), coverage: bool = False) -> SimulationResult:
+        """
+        Simulates one example and checks expected outputs like the vector testbench
+
+        :param sequences: Mapping from port name to a value sequence or None, or a
+            Stimulus; None elements of output sequences are not checked
+        :param properties: Properties checked at the evaluation points of the vector
+            testbench; like the testbench, the run ends at the first violation
+        :param coverage: Collect the toggles of every signal and the values of state
+            registers into result.coverage (see svapy.coverage)
+        :return: Simulation result with one Mismatch per failed check and one
+            Violation per property violated
+        """
+        ports_info = {name: {'width': width} for name, width in self.widths.items()}
+        stimulus = Stimulus.from_sequences(ports_info, sequences)
+        num_cycles = stimulus.cycles
+        inputs: Dict[str, npt.NDArray[Any]] = {}
+        for port in self.inputs:
+            array = stimulus.array(port)
+            if array is not None:
+                inputs[port] = array[:num_cycles]
+        check_ports(properties, ports_info)
+        record = list(self.outputs)
+        record += [port for prop in properties for port in prop.ports()
+                   if port not in self.inputs and port not in record]
+        states = state_registers(self.widths) if coverage else []
+        if coverage:
+            # Toggles of every register and wire are covered too
+            record += [name for name in self.widths if name not in self.inputs and name not in record]
+        with instrument.phase('simulate'):
+            traces = self.run(inputs, signals=record, cycles=num_cycles)
+        instrument.count('simulations')
+        instrument.count('cycles_simulated', num_cycles)
+
+        with instrument.phase('check'):
+            failed = self._mismatches(stimulus, traces, num_cycles)
+
+            violations: List[Violation] = []
+            if properties or coverage:
+                # Inputs as applied at each step, other signals as the testbench samples them
+                values = {port: traces[port][0] for port in record}
+                values.update({port: np.zeros(num_cycles, dtype=np.uint64) for port in self.inputs})
+                values.update(inputs)
+                info = {name: {'direction': 'Input' if name in self.inputs else 'Output', 'width': width}
+                        for name, width in self.widths.items()}
+            if properties:
+                violations = find_violations(properties, values, evaluation_mask(info, values, num_cycles))
+            if violations:
+                # The testbench stops after the step of the first violation
+                num_cycles = violations[0].cycle + 1
+                failed = [item for item in failed if item[0] < num_cycles]
+
+        result = SimulationResult(cycles=num_cycles, completed=True)
+        result.mismatches = [mismatch for _, _, mismatch in sorted(failed, key=lambda f: f[:2])]
+        result.violations = violations
+        result.errors = len(result.mismatches) + len(result.violations)
+        if coverage:
+            result.coverage = collect(info, values, num_cycles, states)
+        return result
+
+
+def _unsupported_node(sim: CycleSimulator, node: Any) -> Any:
+    raise _unsupported(type(node).__name__)
+
+
+# Compilers of statements and expressions: node class -> method, looked up along the class hierarchy
+_STATEMENTS: Dict[type, Callable[[CycleSimulator, Any], Stmt]] = {
+    vast.SystemCall: lambda sim, node: _nop,
+    vast.SingleStatement: lambda sim, node: _nop,
+    vast.Block: CycleSimulator._block,
+    vast.IfStatement: CycleSimulator._if,
+    vast.CaseStatement: CycleSimulator._case,
+    vast.CasexStatement: _unsupported_node,
+    vast.CasezStatement: _unsupported_node,
+    vast.BlockingSubstitution: CycleSimulator._blocking,
+    vast.NonblockingSubstitution: CycleSimulator._nonblocking,
+}
+
+_EXPRESSIONS: Dict[type, Callable[[CycleSimulator, Any], Tuple[Expr, int]]] = {
+    vast.Rvalue: CycleSimulator._rvalue,
+    vast.IntConst: CycleSimulator._int_const,
+    vast.Identifier: CycleSimulator._identifier,
+    vast.Cond: CycleSimulator._cond,
+    vast.Pointer: CycleSimulator._pointer,
+    vast.Partselect: CycleSimulator._partselect,
+    vast.Concat: CycleSimulator._concat,
+    vast.Repeat: CycleSimulator._repeat,
+    vast.Xnor: CycleSimulator._xnor,
+    **{cls: CycleSimulator._unary for cls in _UNARY},
+    **{cls: CycleSimulator._binary for cls in _BINARY},
+}
+
+
+_SIMULATORS: Dict[str, CycleSimulator] = {}
+
+def get_simulator(module_name: str, design_files: Sequence[str], **kwargs: Any) -> CycleSimulator:
+    """
+    Returns a per-process shared simulator for a module, parsing it on first use
+    """
+    key = f'{module_name}:{os.pathsep.join(design_files)}'
+    simulator = _SIMULATORS.get(key)
+    if simulator is None:
+        simulator = CycleSimulator.from_files(module_name, design_files, **kwargs)
+        _SIMULATORS[key] = simulator
+    return simulator
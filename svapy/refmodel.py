@@ -0,0 +1,84 @@
+"""
+Batch calling convention for reference models.
+
+A batch reference model takes one 2-D array per input port, shaped
+(examples, cycles), and returns one array of the same shape per output port.
+Models written in vectorized form check thousands of sequences per call;
+batch_model lifts an existing per-cycle scalar model into the same convention.
+"""
+from typing import Any, Callable, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+
+BatchOutput = Union[npt.NDArray[Any], Tuple[npt.NDArray[Any], ...]]
+
+def as_batch(*inputs: npt.ArrayLike) -> Tuple[npt.NDArray[Any], ...]:
+    """
+    Converts inputs to 2-D arrays of shape (examples, cycles).
+    A single sequence becomes a batch of one example.
+
+    :param inputs: One array-like per input port
+    :return: Tuple of 2-D arrays
+    """
+    arrays = tuple(np.atleast_2d(np.asarray(x)) for x in inputs)
+    for array in arrays:
+        if array.ndim != 2:
+            raise ValueError(f"Expected (examples, cycles) arrays, got shape {array.shape}")
+        if array.shape != arrays[0].shape:
+            raise ValueError(f"Input shapes differ: {arrays[0].shape} and {array.shape}")
+    return arrays
+
+def previous(values: npt.NDArray[Any], fill: Any = 0) -> npt.NDArray[Any]:
+    """
+    Shifts each sequence one cycle later, so that column i holds the value of cycle i-1
+
+    :param values: 2-D array of shape (examples, cycles)
+    :param fill: Value of the first column
+    :return: Shifted array
+    """
+    shifted = np.empty_like(values)
+    shifted[:, :1] = fill
+    shifted[:, 1:] = values[:, :-1]
+    return shifted
+
+def last_index(mask: npt.NDArray[Any]) -> npt.NDArray[np.intp]:
+    """
+    For every cycle, returns the index of the latest cycle at or before it where mask is set,
+    or -1 if there is none
+    """
+    cycles = np.arange(mask.shape[1], dtype=np.intp)
+    return np.maximum.accumulate(np.where(mask, cycles, -1), axis=1)
+
+def hold(values: npt.NDArray[Any], load: npt.NDArray[Any], initial: Any = 0) -> npt.NDArray[Any]:
+    """
+    Models a register: takes values[i] in the cycles where load is set and keeps
+    its previous value otherwise.
+
+    :param values: Value loaded in each cycle
+    :param load: Boolean mask of the cycles where the register loads
+    :param initial: Value before the first load
+    :return: Register value after every cycle
+    """
+    index = last_index(load)
+    held = np.take_along_axis(values, np.maximum(index, 0), axis=1)
+    return np.where(index >= 0, held, initial)
+
+def batch_model(model: Callable[..., Any]) -> Callable[..., BatchOutput]:
+    """
+    Lifts a scalar reference model, which takes one list per input and returns
+    a list (or a tuple of lists) per output, into the batch convention.
+
+    :param model: Scalar reference model
+    :return: Batch reference model calling the scalar model once per example
+    """
+    def run(*inputs: npt.ArrayLike) -> BatchOutput:
+        arrays = as_batch(*inputs)
+        results = [model(*(array[i].tolist() for array in arrays)) for i in range(arrays[0].shape[0])]
+        if results and isinstance(results[0], tuple):
+            return tuple(np.array(column) for column in zip(*results))
+        return np.array(results)
+
+    run.__name__ = f"{getattr(model, '__name__', 'model')}_batch"
+    run.__doc__ = f"Batch form of {run.__name__[:-len('_batch')]}"
+    return run
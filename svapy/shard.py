@@ -0,0 +1,349 @@
+"""
+Sharded Hypothesis runs of generated runners.
+
+A large example budget is split across N pytest processes. Every shard gets
+its share of the examples (SVAPY_MAX_EXAMPLES) and draws from its own random
+seed, and all shards share one directory-based example database
+(SVAPY_HYPOTHESIS_DB), so a failure found and shrunk by one shard is replayed
+by the others and by later runs. With ``--seed S`` shard i runs with
+``--hypothesis-seed=S+i`` instead, which makes a run reproducible but, as in
+Hypothesis itself, leaves the example database unused. The pytest plugin in this module
+writes one JSON report per shard with test outcomes, falsifying examples,
+Hypothesis statistics and the coverage reached (see svapy.coverage); the
+reports are merged into one, ``build/shard-report.json`` by default::
+
+    python -m svapy.shard gen/run_csr.py -n 8 --max-examples 4000
+
+Arguments after ``--`` are passed to every pytest process.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import textwrap
+import time
+from dataclasses import asdict, dataclass
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Generator, Iterator, List, Optional, Sequence, cast
+
+import pluggy
+import pytest
+
+if TYPE_CHECKING:
+    from hypothesis.utils.dynamicvariables import DynamicVariable
+
+# Statistics callback of the running Hypothesis test
+StatisticsCallback = Callable[[Dict[str, Any]], None]
+
+DATABASE_DIR = os.path.join('build', 'hypothesis')
+SHARD_DIR = os.path.join('build', 'shards')
+REPORT_FILE = os.path.join('build', 'shard-report.json')
+
+# Shrunk example in the failure text: "Falsifying example:" up to Hypothesis 6.1xx, "Failing test case:" after
+_EXAMPLE_RE = re.compile(r'(?:Falsifying example|Failing test case): (\w+\((?:\)|\n.*?\n[ \t]*\)))', re.DOTALL)
+_ERROR_PREFIX_RE = re.compile(r'^E {1,7}', re.MULTILINE)
+
+def example_database() -> Any:
+    """
+    Returns the example database of generated runners: a directory shared by
+    all shards when SVAPY_HYPOTHESIS_DB is set, Hypothesis' default otherwise
+    """
+    from hypothesis import settings
+    from hypothesis.database import DirectoryBasedExampleDatabase
+
+    path = os.environ.get('SVAPY_HYPOTHESIS_DB')
+    if path:
+        return DirectoryBasedExampleDatabase(path)
+    return settings().database
+
+def split_budget(max_examples: int, shards: int) -> List[int]:
+    """
+    Splits an example budget as evenly as possible, without empty shards
+
+    :return: Examples per shard; fewer than shards entries if the budget is smaller
+    """
+    if max_examples < 1 or shards < 1:
+        raise ValueError("max_examples and shards must be at least 1")
+    shards = min(shards, max_examples)
+    return [max_examples // shards + (1 if index < max_examples % shards else 0) for index in range(shards)]
+
+def falsifying_examples(text: str) -> List[str]:
+    """
+    Extracts the shrunk examples Hypothesis printed into a failure report
+    """
+    examples = []
+    for match in _EXAMPLE_RE.findall(_ERROR_PREFIX_RE.sub('', text)):
+        call, _, arguments = match.partition('\n')
+        examples.append('\n'.join(filter(None, [call, textwrap.dedent(arguments)])))
+    return examples
+
+@dataclass
+class ShardResult:
+    """One pytest process of a sharded run"""
+    shard: int
+    seed: Optional[int]
+    max_examples: int
+    command: List[str]
+    log: str
+    report: str
+    returncode: int = 0
+    duration: float = 0.0
+
+def shard_env(shard: int, max_examples: int, database: str, report: str,
+              base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Returns the environment of one shard
+    """
+    env = dict(os.environ if base is None else base)
+    env.update({
+        'SVAPY_SHARD': str(shard),
+        'SVAPY_SHARD_REPORT': report,
+        'SVAPY_MAX_EXAMPLES': str(max_examples),
+        'SVAPY_HYPOTHESIS_DB': database,
+    })
+    # Profiles of the shards go to separate files (see svapy.instrument)
+    root, ext = os.path.splitext(env.get('SVAPY_PROFILE_FILE') or os.path.join('build', 'profile.json'))
+    env['SVAPY_PROFILE_FILE'] = f'{root}_shard{shard}{ext}'
+    return env
+
+async def run_shard(result: ShardResult, env: Dict[str, str], stream: Optional[IO[str]] = None) -> ShardResult:
+    """
+    Runs one shard, keeping its output in result.log
+    """
+    start = time.perf_counter()
+    with open(result.log, 'w') as log:
+        proc = await asyncio.create_subprocess_exec(*result.command, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.STDOUT, env=env)
+        assert proc.stdout is not None
+        async for raw in proc.stdout:
+            line = raw.decode(errors='replace')
+            log.write(line)
+            if stream is not None:
+                stream.write(f'[shard{result.shard}] {line}')
+        result.returncode = await proc.wait()
+    result.duration = time.perf_counter() - start
+    return result
+
+async def run_shards(runner: str, shards: int, max_examples: int, seed: Optional[int] = None,
+                     database: str = DATABASE_DIR, shard_dir: str = SHARD_DIR,
+                     pytest_args: Sequence[str] = (), stream: Optional[IO[str]] = None) -> List[ShardResult]:
+    """
+    Runs a generated runner in parallel shards
+
+    :param runner: Runner file, e.g. gen/run_csr.py
+    :param shards: Number of pytest processes
+    :param max_examples: Examples of every Hypothesis test, split across the shards
+    :param seed: Seed of shard 0, shard i uses seed + i; seeded runs leave the database unused.
+        By default every shard draws fresh random seeds
+    :param database: Example database directory shared by the shards
+    :param shard_dir: Directory receiving one log and one JSON report per shard
+    :param pytest_args: Extra arguments of every pytest process
+    :param stream: Where output lines are streamed, e.g. sys.stdout; None keeps them in the logs only
+    :return: One result per shard
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    os.makedirs(database, exist_ok=True)
+    database = os.path.abspath(database)
+
+    tasks = []
+    for shard, examples in enumerate(split_budget(max_examples, shards)):
+        report = os.path.abspath(os.path.join(shard_dir, f'shard{shard}.json'))
+        if os.path.exists(report):
+            os.remove(report)
+        shard_seed = None if seed is None else seed + shard
+        command = [sys.executable, '-m', 'pytest', runner, '-p', 'svapy.shard', '-p', 'no:cacheprovider']
+        if shard_seed is not None:
+            command.append(f'--hypothesis-seed={shard_seed}')
+        command += pytest_args
+        result = ShardResult(shard, shard_seed, examples, command,
+                             os.path.join(shard_dir, f'shard{shard}.log'), report)
+        tasks.append(run_shard(result, shard_env(shard, examples, database, report), stream))
+    return list(await asyncio.gather(*tasks))
+
+def _merge_tests(tests: Dict[str, Dict[str, Any]], entry: Dict[str, Any], shard: int) -> None:
+    merged = tests.setdefault(entry['nodeid'], {
+        'outcome': 'passed', 'shards': [], 'failed_shards': [], 'duration': 0.0,
+        'examples': {'passing': 0, 'failing': 0, 'invalid': 0}, 'falsifying_examples': [], 'failure': '',
+    })
+    merged['shards'].append(shard)
+    merged['duration'] += entry.get('duration', 0.0)
+    for status, count in entry.get('examples', {}).items():
+        merged['examples'][status] = merged['examples'].get(status, 0) + count
+    if entry['outcome'] == 'failed':
+        merged['outcome'] = 'failed'
+        merged['failed_shards'].append(shard)
+        merged['failure'] = merged['failure'] or entry.get('failure', '')
+        for example in entry.get('falsifying_examples', []):
+            if example not in merged['falsifying_examples']:
+                merged['falsifying_examples'].append(example)
+    elif entry['outcome'] == 'skipped' and merged['outcome'] == 'passed' and len(merged['shards']) == 1:
+        merged['outcome'] = 'skipped'
+
+def merge_reports(results: Sequence[ShardResult], duration: float = 0.0) -> Dict[str, Any]:
+    """
+    Merges the shard reports: per-test outcomes, distinct falsifying examples,
+    example counts and the union of the coverage reached
+
+    :param results: Shards as returned by run_shards
+    :param duration: Wall time of the whole run
+    """
+    from svapy.coverage import Coverage
+
+    tests: Dict[str, Dict[str, Any]] = {}
+    coverage: Optional[Coverage] = None
+    shards = []
+    for result in results:
+        data: Dict[str, Any] = {}
+        if os.path.exists(result.report):
+            with open(result.report) as f:
+                data = json.load(f)
+        for entry in data.get('tests', []):
+            _merge_tests(tests, entry, result.shard)
+        if data.get('coverage'):
+            coverage = coverage or Coverage()
+            coverage.merge(Coverage.from_dict(data['coverage']))
+        shard = asdict(result)
+        # A shard that crashed before writing its report failed as a whole
+        shard['completed'] = bool(data)
+        shards.append(shard)
+
+    failed = [nodeid for nodeid, test in tests.items() if test['outcome'] == 'failed']
+    return {
+        'passed': not failed and all(s['completed'] and s['returncode'] in (0, 5) for s in shards),
+        'duration': round(duration, 3),
+        'max_examples': sum(result.max_examples for result in results),
+        'examples': sum(sum(test['examples'].values()) for test in tests.values()),
+        'failed': failed,
+        'tests': tests,
+        'coverage': coverage.to_dict() if coverage is not None else None,
+        'shards': shards,
+    }
+
+def write_report(report: Dict[str, Any], path: str = REPORT_FILE) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    pytest_args: List[str] = []
+    if '--' in argv:
+        pytest_args = argv[argv.index('--') + 1:]
+        argv = argv[:argv.index('--')]
+    parser = argparse.ArgumentParser(description="Run a generated runner in parallel Hypothesis shards")
+    parser.add_argument('runner', help="generated runner, e.g. gen/run_csr.py")
+    parser.add_argument('-n', '--shards', type=int, default=os.cpu_count() or 1, help="pytest processes (default: CPU count)")
+    parser.add_argument('--max-examples', type=int, default=int(os.environ.get('SVAPY_MAX_EXAMPLES', 1000)),
+                        help="examples per test, split across the shards (default: SVAPY_MAX_EXAMPLES or 1000)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed of shard 0, shard i uses seed + i; seeded runs do not use the database")
+    parser.add_argument('--database', default=DATABASE_DIR, help="shared example database directory")
+    parser.add_argument('--shard-dir', default=SHARD_DIR, help="directory for shard logs and reports")
+    parser.add_argument('--report', default=REPORT_FILE, help="merged JSON report path")
+    parser.add_argument('--quiet', action='store_true', help="do not stream shard output")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = asyncio.run(run_shards(args.runner, args.shards, args.max_examples, args.seed, args.database,
+                                     args.shard_dir, pytest_args, None if args.quiet else sys.stdout))
+    report = merge_reports(results, time.perf_counter() - start)
+    write_report(report, args.report)
+
+    for nodeid in report['failed']:
+        test = report['tests'][nodeid]
+        print(f"FAILED {nodeid} (shards {', '.join(map(str, test['failed_shards']))})")
+        for example in test['falsifying_examples']:
+            print(f"  {example}")
+    for shard in report['shards']:
+        if not shard['completed']:
+            print(f"ERROR shard {shard['shard']} exited with {shard['returncode']} (log: {shard['log']})")
+    seeded = f" (seed {results[0].seed})" if results[0].seed is not None else ''
+    print(f"{report['examples']} example(s) in {len(results)} shard(s){seeded}, "
+          f"{len(report['failed'])} failed test(s) in {report['duration']:.2f}s, report: {args.report}")
+    return 0 if report['passed'] else 1
+
+
+# pytest plugin, loaded into every shard with -p svapy.shard
+
+_tests: List[Dict[str, Any]] = []
+
+def _example_counts(stats: Dict[str, Any]) -> Dict[str, int]:
+    counts = {'passing': 0, 'failing': 0, 'invalid': 0}
+    names = {'valid': 'passing', 'interesting': 'failing', 'invalid': 'invalid', 'overrun': 'invalid'}
+    for key, phase in stats.items():
+        if not key.endswith('-phase') or not isinstance(phase, dict):
+            continue
+        for case in phase.get('test-cases', []):
+            status = names.get(case.get('status'), 'invalid')
+            counts[status] += 1
+    return counts
+
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_call(item: Any) -> Iterator[None]:
+    # Innermost wrapper, so the statistics callback of Hypothesis' own plugin is still called
+    from hypothesis.statistics import collector as untyped_collector
+
+    # Hypothesis declares the variable with its None default only
+    collector = cast('DynamicVariable[Optional[StatisticsCallback]]', untyped_collector)
+    previous = collector.value
+
+    def note(stats: Dict[str, Any]) -> None:
+        item._svapy_examples = _example_counts(stats)
+        if previous is not None:
+            previous(stats)
+
+    with collector.with_value(note):
+        yield
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item: Any, call: Any) -> Generator[None, 'pluggy.Result[pytest.TestReport]', None]:
+    outcome = yield
+    setattr(outcome.get_result(), '_svapy_examples', getattr(item, '_svapy_examples', {}))
+
+def pytest_runtest_logreport(report: Any) -> None:
+    if report.when == 'call' or (report.when == 'setup' and not report.passed):
+        text = report.longreprtext if report.failed else ''
+        _tests.append({
+            'nodeid': report.nodeid,
+            'outcome': report.outcome,
+            'duration': report.duration,
+            'examples': getattr(report, '_svapy_examples', {}),
+            'falsifying_examples': falsifying_examples(text),
+            'failure': text,
+        })
+
+def pytest_collectreport(report: Any) -> None:
+    # Runners that fail to import count as failed tests
+    if report.failed:
+        _tests.append({
+            'nodeid': report.nodeid,
+            'outcome': 'failed',
+            'duration': 0.0,
+            'examples': {},
+            'falsifying_examples': [],
+            'failure': report.longreprtext,
+        })
+
+def pytest_sessionfinish(session: Any) -> None:
+    path = os.environ.get('SVAPY_SHARD_REPORT')
+    if not path:
+        return
+    from svapy.coverage import session_coverage
+
+    coverage = session_coverage()
+    data = {
+        'shard': int(os.environ.get('SVAPY_SHARD', 0)),
+        'seed': session.config.getoption('hypothesis_seed', None),
+        'tests': _tests,
+        'coverage': coverage.to_dict() if coverage.bins else None,
+    }
+    write_report(data, path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Array-backed stimulus.
+
+A ``Stimulus`` holds one NumPy array per port, using the smallest unsigned
+dtype that fits the port width (uint8 up to 8 bits, ..., uint64, and Python
+ints beyond 64 bits). Expected outputs that are only checked at some cycles
+also get a boolean check mask. Trimming returns views, and vector files and
+Verilog literals are hex-encoded in bulk, so long stimuli never turn into
+Python lists of ints on their way to the simulator.
+
+``Stimulus`` is also a read-only mapping from port name to sequence, so it can
+be passed wherever a ``{port: sequence or None}`` dictionary was accepted.
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from svapy.ports import Ports
+from svapy.vectors import Field, vector_width
+
+_NEWLINE = ord('\n')
+
+def port_dtype(width: int) -> np.dtype[Any]:
+    """
+    Returns the smallest unsigned dtype holding width bits, or object beyond 64 bits
+    """
+    for bits, dtype in ((8, np.uint8), (16, np.uint16), (32, np.uint32), (64, np.uint64)):
+        if width <= bits:
+            return np.dtype(dtype)
+    return np.dtype(object)
+
+def to_array(values: Any, width: int) -> npt.NDArray[Any]:
+    """
+    Converts a sequence of ints or bools into an array of port_dtype(width).
+    Arrays that already have that dtype are returned as they are, without a copy.
+    """
+    dtype = port_dtype(width)
+    if isinstance(values, np.ndarray):
+        if values.dtype == dtype:
+            return values
+        if dtype != object and values.dtype.kind in 'biu':
+            return values.astype(dtype)
+    if dtype == object:
+        return np.array([int(v) for v in values], dtype=object)
+    try:
+        return np.asarray(values, dtype=dtype)
+    except (OverflowError, TypeError, ValueError):
+        # Negative or too wide values wrap around like a Verilog assignment
+        mask = (1 << (8 * dtype.itemsize)) - 1
+        return np.array([int(v) & mask for v in values], dtype=dtype)
+
+def _split_checks(values: Any) -> Tuple[Any, Optional[npt.NDArray[np.bool_]]]:
+    # None elements of expected outputs are not checked
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return values, None
+    if not any(v is None for v in values):
+        return values, None
+    check = np.fromiter((v is not None for v in values), dtype=bool, count=len(values))
+    return [0 if v is None else v for v in values], check
+
+def _chunks(values: npt.NDArray[Any], width: int) -> Iterator[Tuple[npt.NDArray[np.uint64], int, int]]:
+    # (bits, chunk width, offset) pieces of at most 64 bits
+    if values.dtype != object:
+        yield values.astype(np.uint64) & np.uint64((1 << width) - 1), width, 0
+        return
+    for offset in range(0, width, 64):
+        chunk = min(64, width - offset)
+        mask = (1 << chunk) - 1
+        yield np.array([(int(v) >> offset) & mask for v in values], dtype=np.uint64), chunk, offset
+
+def hex_lines(words: npt.NDArray[np.uint64], digits: int) -> bytes:
+    """
+    Hex-encodes rows of 64-bit limbs, most significant limb first, one line per row
+
+    :param words: Array of shape (rows, limbs)
+    :param digits: Hex digits kept per line (the least significant ones)
+    :return: ASCII text with a newline after every line
+    """
+    rows = words.shape[0]
+    if rows == 0:
+        return b''
+    text = np.ascontiguousarray(words, dtype='>u8').tobytes().hex().encode()
+    chars = np.frombuffer(text, dtype=np.uint8).reshape(rows, -1)[:, -digits:]
+    lines = np.empty((rows, digits + 1), dtype=np.uint8)
+    lines[:, :digits] = chars
+    lines[:, digits] = _NEWLINE
+    return lines.tobytes()
+
+class Stimulus(Mapping):  # type: ignore[type-arg]
+    """
+    Per-port value arrays of one example.
+
+    :param ports_info: Dictionary containing port information
+    :param arrays: Mapping from port name to a value array, or None for ports without a sequence
+    :param checks: Check masks of expected outputs that are not compared at every cycle
+    """
+
+    __slots__ = ('ports_info', 'arrays', 'checks')
+
+    def __init__(self, ports_info: Ports, arrays: Dict[str, Optional[npt.NDArray[Any]]],
+                 checks: Optional[Dict[str, npt.NDArray[np.bool_]]] = None) -> None:
+        self.ports_info = ports_info
+        self.arrays = arrays
+        self.checks = checks or {}
+
+    @classmethod
+    def from_sequences(cls, ports_info: Ports,
+                       sequences: Mapping[str, Optional[Sequence[Any]]]) -> 'Stimulus':
+        """
+        Converts {port: sequence or None} into a Stimulus; a Stimulus is returned as it is
+
+        :param ports_info: Dictionary containing port information
+        :param sequences: Mapping from port name to a value sequence or None;
+            None elements of output sequences are not checked
+        """
+        if isinstance(sequences, Stimulus):
+            return sequences
+        arrays: Dict[str, Optional[npt.NDArray[Any]]] = {}
+        checks: Dict[str, npt.NDArray[np.bool_]] = {}
+        for port, seq in sequences.items():
+            if seq is None:
+                arrays[port] = None
+                continue
+            values, check = _split_checks(seq)
+            arrays[port] = to_array(values, int(ports_info[port]['width']) if port in ports_info else 64)
+            if check is not None:
+                checks[port] = check
+        return cls(ports_info, arrays, checks)
+
+    @property
+    def cycles(self) -> int:
+        """Length of the shortest sequence"""
+        return min((len(a) for a in self.arrays.values() if a is not None), default=0)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the value arrays and check masks"""
+        arrays = [a for a in self.arrays.values() if a is not None] + list(self.checks.values())
+        return sum(a.nbytes for a in arrays)
+
+    def trim(self, num_cycles: int) -> 'Stimulus':
+        """
+        Returns the first num_cycles cycles; the arrays are views, nothing is copied
+        """
+        arrays = {port: None if a is None else a[:num_cycles] for port, a in self.arrays.items()}
+        checks = {port: check[:num_cycles] for port, check in self.checks.items()}
+        return Stimulus(self.ports_info, arrays, checks)
+
+    def array(self, port: str) -> Optional[npt.NDArray[Any]]:
+        """
+        Returns the value array of a port, or None
+        """
+        return self.arrays.get(port)
+
+    def check(self, port: str) -> Optional[npt.NDArray[np.bool_]]:
+        """
+        Returns the check mask of an expected output, or None if every cycle is checked
+        """
+        return self.checks.get(port)
+
+    def __getitem__(self, port: str) -> Union[npt.NDArray[Any], List[Any], None]:
+        values = self.arrays[port]
+        if values is None or port not in self.checks:
+            return values
+        return [v if c else None for v, c in zip(values.tolist(), self.checks[port].tolist())]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.arrays)
+
+    def __len__(self) -> int:
+        return len(self.arrays)
+
+    def hex_literals(self, port: str) -> List[Optional[str]]:
+        """
+        Returns the values of a port as hex digit strings, e.g. for 8'h<digits> literals.
+        Cycles masked out by the check mask of an expected output hold None.
+        """
+        values = self.arrays[port]
+        if values is None:
+            return []
+        width = int(self.ports_info[port]['width'])
+        digits = (width + 3) // 4
+        literals: List[Optional[str]]
+        if values.dtype == object:
+            literals = [format(int(v) & ((1 << width) - 1), f'0{digits}x') for v in values]
+        else:
+            words = (values.astype(np.uint64) & np.uint64((1 << width) - 1)).reshape(-1, 1)
+            literals = list(hex_lines(words, digits).decode().split('\n')[:-1])
+        check = self.checks.get(port)
+        if check is not None:
+            for cycle in np.flatnonzero(~check[:len(literals)]).tolist():
+                literals[cycle] = None
+        return literals
+
+    def vector_words(self, layout: List[Field]) -> npt.NDArray[np.uint64]:
+        """
+        Packs the stimulus into vector words (see svapy.vectors.vector_layout)
+
+        :return: Array of shape (cycles, limbs) of 64-bit limbs, most significant limb first
+        """
+        num_cycles = self.cycles
+        limbs = np.zeros(((vector_width(layout) + 63) // 64, num_cycles), dtype=np.uint64)
+        for port, kind, width, lsb in layout:
+            values = self.arrays.get(port)
+            if values is None:
+                continue
+            check = self.checks.get(port)
+            if kind == 'check':
+                bits = np.ones(num_cycles, dtype=np.uint64) if check is None else check[:num_cycles].astype(np.uint64)
+                chunks: Any = [(bits, 1, 0)]
+            else:
+                values = values[:num_cycles]
+                if kind == 'expected' and check is not None:
+                    values = np.where(check[:num_cycles], values, values.dtype.type(0))
+                chunks = _chunks(values, width)
+            for bits, chunk, offset in chunks:
+                limb, shift = divmod(lsb + offset, 64)
+                limbs[limb] |= bits << np.uint64(shift)
+                if shift + chunk > 64:
+                    limbs[limb + 1] |= bits >> np.uint64(64 - shift)
+        return np.ascontiguousarray(limbs[::-1].T)
+
+    def vector_hex(self, layout: List[Field]) -> bytes:
+        """
+        Returns the $readmemh text of the packed vector words, one line per cycle
+        """
+        return hex_lines(self.vector_words(layout), (vector_width(layout) + 3) // 4)
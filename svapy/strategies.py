@@ -0,0 +1,130 @@
+"""
+Hypothesis strategies for generated runners.
+
+Instead of one ``st.lists(st.integers(...))`` per port, a whole example is
+drawn as a single ``st.binary`` block of ``cycles x frame`` bytes, where a
+frame holds the little-endian bytes of every drawn port. The block is decoded
+into per-port arrays with NumPy (see svapy.stimulus), so drawing and
+shrinking cost the same for a 1-bit port and a 512-bit bus, and shrinking
+the bytes towards zero shrinks every value towards zero.
+
+Hypothesis caps the data it draws per example at a few kilobytes, so at most
+MAX_DRAW_BYTES bytes are drawn. Cycles beyond them are filled from a NumPy
+PRNG seeded with a drawn integer: they are reproducible and replayed from the
+example database like the drawn bytes, but Hypothesis only shrinks the seed,
+not the individual values of the tail.
+"""
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import hypothesis.strategies as st
+
+from svapy import instrument
+from svapy.ports import PortInfo, Ports
+from svapy.stimulus import Stimulus, port_dtype
+
+DEFAULT_MIN_CYCLES = 10
+DEFAULT_MAX_CYCLES = 100
+
+# Bytes of stimulus drawn per example
+MAX_DRAW_BYTES = 4096
+
+def check_cycle_bounds(min_cycles: int, max_cycles: int) -> None:
+    """
+    Raises ValueError unless 1 <= min_cycles <= max_cycles
+    """
+    if min_cycles < 1:
+        raise ValueError(f"min_cycles must be at least 1, got {min_cycles}")
+    if max_cycles < min_cycles:
+        raise ValueError(f"max_cycles ({max_cycles}) must not be less than min_cycles ({min_cycles})")
+
+def frame_layout(ports_info: Ports, ports: Sequence[str]) -> List[Tuple[str, int, int]]:
+    """
+    Describes the bytes of one frame
+
+    :param ports_info: Dictionary containing port information
+    :param ports: Ports drawn per cycle, in frame order
+    :return: List of (port, byte offset, byte count)
+    """
+    layout = []
+    offset = 0
+    for port in ports:
+        size = (int(ports_info[port]['width']) + 7) // 8
+        layout.append((port, offset, size))
+        offset += size
+    return layout
+
+def decode_frames(ports_info: Ports, ports: Sequence[str],
+                  data: bytes, cycles: int, seed: Optional[int] = None) -> Dict[str, npt.NDArray[Any]]:
+    """
+    Decodes frames of little-endian port values into one array per port
+
+    :param ports_info: Dictionary containing port information
+    :param ports: Ports drawn per cycle, in frame order
+    :param data: Whole frames; if there are fewer than cycles they are repeated, unless seed is given
+    :param cycles: Length of the returned arrays
+    :param seed: Seed of the PRNG filling the frames after data, up to cycles
+    :return: Mapping from port name to an array of port_dtype(width)
+    """
+    layout = frame_layout(ports_info, ports)
+    frame = sum(size for _, _, size in layout)
+    if not frame:
+        return {}
+    frames = np.frombuffer(data, dtype=np.uint8)[:len(data) // frame * frame].reshape(-1, frame)
+    if seed is not None and len(frames) < cycles:
+        tail = np.random.default_rng(seed).integers(0, 256, size=(cycles - len(frames), frame), dtype=np.uint8)
+        frames = np.concatenate([frames, tail])
+    elif not len(frames):
+        frames = np.zeros((1, frame), dtype=np.uint8)
+
+    arrays: Dict[str, npt.NDArray[Any]] = {}
+    for port, offset, size in layout:
+        width = int(ports_info[port]['width'])
+        dtype = port_dtype(width)
+        columns = frames[:, offset:offset + size]
+        if dtype == object:
+            mask = (1 << width) - 1
+            values = np.array([int.from_bytes(row.tobytes(), 'little') & mask for row in columns], dtype=object)
+        else:
+            padded = np.zeros((len(frames), dtype.itemsize), dtype=np.uint8)
+            padded[:, :size] = columns
+            values = padded.view(dtype.newbyteorder('<')).reshape(-1).astype(dtype, copy=False)
+            if width % 8:
+                values &= dtype.type((1 << width) - 1)
+        # Without a seed, frames are decoded once and then repeated up to the requested length
+        arrays[port] = values if len(values) == cycles else np.resize(values, cycles)
+    return arrays
+
+@st.composite
+def _stimulus(draw: Any, ports_info: Ports, inputs: Sequence[str],
+              outputs: Sequence[str], min_cycles: int, max_cycles: int) -> Stimulus:
+    with instrument.phase('draw'):
+        cycles = draw(st.integers(min_value=min_cycles, max_value=max_cycles))
+        frame = sum(size for _, _, size in frame_layout(ports_info, inputs))
+        frames = min(cycles, max(1, MAX_DRAW_BYTES // frame)) if frame else 0
+        data = draw(st.binary(min_size=frames * frame, max_size=frames * frame))
+        seed = draw(st.integers(min_value=0, max_value=2**32 - 1)) if frames < cycles else None
+
+        arrays: Dict[str, Optional[npt.NDArray[Any]]] = dict(decode_frames(ports_info, inputs, data, cycles, seed))
+        for port in outputs:
+            arrays[port] = np.zeros(cycles, dtype=port_dtype(int(ports_info[port]['width'])))
+        table = {port: PortInfo.from_mapping(ports_info[port]) for port in arrays}
+    instrument.count('examples')
+    return Stimulus(table, arrays)
+
+def stimulus_strategy(ports_info: Ports, inputs: Sequence[str],
+                      outputs: Sequence[str] = (), min_cycles: int = DEFAULT_MIN_CYCLES,
+                      max_cycles: int = DEFAULT_MAX_CYCLES) -> st.SearchStrategy[Stimulus]:
+    """
+    Returns a strategy drawing one example of stimulus in bulk
+
+    :param ports_info: Dictionary containing port information
+    :param inputs: Input ports drawn per cycle
+    :param outputs: Output ports expected to stay 0
+    :param min_cycles: Shortest sequence length
+    :param max_cycles: Longest sequence length
+    :return: Strategy of Stimulus objects with arrays of the same length for every port
+    """
+    check_cycle_bounds(min_cycles, max_cycles)
+    return _stimulus(ports_info, list(inputs), list(outputs), min_cycles, max_cycles)
@@ -0,0 +1,293 @@
+"""
+Streaming simulation of arbitrarily long stimulus.
+
+Instead of writing a whole example into a vector file before the simulator
+starts, a generator yields stimulus chunks (mappings of per-port sequences,
+or Stimulus objects) that are packed into vector words and written into a
+named pipe while the simulator runs. The vector testbench reads the pipe with
+``$fscanf`` (``+stream=``) until it is closed. Sampled outputs come back
+through a second pipe (``+samples=``, see svapy.outputs) and are handed to a
+callback chunk by chunk, and mismatch reports are parsed as the simulator
+prints them. Memory therefore stays bounded by a chunk whatever the number of
+cycles, and the first mismatch is seen while stimulus is still generated.
+
+For clocked modules the chunks are given per clock cycle, as in drive_<module>:
+reset is only applied before the first chunk, and the check of the last cycle
+of a chunk moves into the first step of the next one, so a stream checks
+exactly what one long vector file would.
+
+Named pipes need ``os.mkfifo``, i.e. a POSIX system.
+"""
+import collections
+import errno
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from svapy import instrument
+from svapy.clocking import clocked_sequences, data_inputs
+from svapy.engine import SimulationResult, parse_simulation_output
+from svapy.outputs import decode_records, record_words, sample_layout
+from svapy.ports import Ports
+from svapy.stimulus import Stimulus, hex_lines, port_dtype, to_array
+from svapy.vectors import Field, direction_name, vector_layout, vector_width
+
+if TYPE_CHECKING:
+    from svapy.engine import SimulationEngine
+
+# Default cycles per chunk of random_chunks and per call of the samples callback
+CHUNK_CYCLES = 1 << 16
+
+# Simulator output lines kept in SimulationResult.output
+OUTPUT_TAIL = 50
+
+SamplesCallback = Callable[[int, Dict[str, npt.NDArray[Any]]], None]
+
+def _output_mask(ports_info: Ports, layout: List[Field]) -> npt.NDArray[np.uint64]:
+    # Vector word with every expected and check bit set
+    ones: Dict[str, Optional[npt.NDArray[Any]]] = {
+        port: to_array([(1 << width) - 1], width) for port, kind, width, _ in layout if kind == 'expected'}
+    return np.asarray(Stimulus(ports_info, ones).vector_words(layout)[0], dtype=np.uint64)
+
+def encode_chunks(ports_info: Ports, chunks: Iterable[Mapping[str, Optional[Sequence[Any]]]],
+                  clocked: bool = False, reset_cycles: int = 2) -> Iterator[bytes]:
+    """
+    Packs stimulus chunks into vector file lines, one block of bytes per chunk
+
+    :param ports_info: Dictionary containing port information
+    :param chunks: Mappings from port name to a value sequence or None, or Stimulus objects
+    :param clocked: Chunks are given per clock cycle and expanded with clocked_sequences
+    :param reset_cycles: Clock cycles with reset asserted before the first chunk
+    :return: Iterator of $readmemh-style text, one word per line
+    """
+    layout = vector_layout(ports_info)
+    digits = (vector_width(layout) + 3) // 4
+    if clocked:
+        words = _clocked_words(ports_info, chunks, layout, reset_cycles)
+    else:
+        words = (stimulus.trim(stimulus.cycles).vector_words(layout)
+                 for stimulus in (Stimulus.from_sequences(ports_info, chunk) for chunk in chunks))
+    for block in words:
+        yield hex_lines(block, digits)
+
+def _clocked_words(ports_info: Ports, chunks: Iterable[Mapping[str, Optional[Sequence[Any]]]],
+                   layout: List[Field], reset_cycles: int) -> Iterator[npt.NDArray[np.uint64]]:
+    # The last step of every chunk is held back and carries its checks into the first step of the next one
+    mask = _output_mask(ports_info, layout)
+    last: Optional[npt.NDArray[np.uint64]] = None
+    for chunk in chunks:
+        stimulus = Stimulus.from_sequences(ports_info, chunk)
+        if not stimulus.cycles:
+            continue
+        steps = clocked_sequences(ports_info, stimulus, stimulus.cycles, reset_cycles if last is None else 0)
+        words = steps.vector_words(layout)
+        if last is not None:
+            # Check the last cycle of the previous chunk after its clock edge
+            words[0] |= last & mask
+        last = words[-1].copy()
+        yield words[:-1]
+    if last is not None:
+        yield last.reshape(1, -1)
+
+def random_chunks(ports_info: Ports, cycles: int, chunk_cycles: int = CHUNK_CYCLES,
+                  ports: Optional[Sequence[str]] = None, seed: Optional[int] = None) -> Iterator[Stimulus]:
+    """
+    Yields uniformly random input values, e.g. for soak tests, without expected outputs
+
+    :param ports_info: Dictionary containing port information
+    :param cycles: Total number of cycles
+    :param chunk_cycles: Cycles per chunk
+    :param ports: Inputs to randomise, defaults to every input that is not a clock or reset
+    :param seed: Seed of the random generator
+    :return: Iterator of Stimulus chunks
+    """
+    rng = np.random.default_rng(seed)
+    ports = list(ports) if ports is not None else data_inputs(ports_info)
+    for start in range(0, cycles, chunk_cycles):
+        length = min(chunk_cycles, cycles - start)
+        arrays: Dict[str, Optional[npt.NDArray[Any]]] = {}
+        for port in ports:
+            width = int(ports_info[port]['width'])
+            dtype = port_dtype(width)
+            if dtype == object:
+                arrays[port] = np.array([int.from_bytes(rng.bytes((width + 7) // 8), 'little') & ((1 << width) - 1)
+                                         for _ in range(length)], dtype=object)
+            else:
+                high = np.iinfo(np.uint64).max if width == 64 else (1 << width) - 1
+                arrays[port] = rng.integers(0, high, length, dtype=np.uint64, endpoint=True).astype(dtype)
+        if not arrays:
+            # Without data inputs the clock still has to run
+            arrays = {port: np.zeros(length, dtype=np.uint8) for port, info in ports_info.items()
+                      if direction_name(info['direction']) == 'Input'}
+        yield Stimulus(ports_info, arrays)
+
+def _open_writer(path: str, proc: 'subprocess.Popen[str]') -> Optional[int]:
+    # Opening the write end blocks until the simulator opens the read end, so poll instead
+    while True:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            if e.errno != errno.ENXIO:
+                raise
+            if proc.poll() is not None:
+                return None
+            time.sleep(0.001)
+            continue
+        os.set_blocking(fd, True)
+        return fd
+
+def _feed(path: str, proc: 'subprocess.Popen[str]', blocks: Iterator[bytes], stop: threading.Event,
+          errors: List[BaseException]) -> None:
+    try:
+        fd = _open_writer(path, proc)
+        if fd is None:
+            return
+        with os.fdopen(fd, 'wb') as f:
+            for block in blocks:
+                if stop.is_set():
+                    break
+                f.write(block)
+                instrument.count('bytes_written', len(block))
+    except BrokenPipeError:
+        # The simulator stopped reading
+        pass
+    except BaseException as e:
+        errors.append(e)
+
+def _drain(path: str, layout: Any, on_samples: SamplesCallback, chunk_cycles: int, opened: threading.Event,
+           errors: List[BaseException]) -> None:
+    words = record_words(layout)
+    record_bytes = 4 * words
+    first = 0
+    with open(path, 'rb') as f:
+        opened.set()
+        while True:
+            data = f.read(record_bytes * chunk_cycles)
+            count = len(data) // record_bytes
+            if not count:
+                break
+            if errors:
+                # Keep reading so the simulator never blocks on a full pipe
+                continue
+            records = np.frombuffer(data, dtype='<u4', count=count * words).reshape(count, words)
+            try:
+                on_samples(first, decode_records(records, layout))
+            except BaseException as e:
+                errors.append(e)
+            first += count
+
+def _stream_command(engine: 'SimulationEngine', fifo_dir: str, dump_path: Optional[str],
+                    sampled: bool) -> Tuple[List[str], str, Optional[str]]:
+    # Simulator command reading stimulus from a named pipe in fifo_dir, and writing samples to another if sampled
+    cmd = engine.command(engine.compile())
+    if dump_path:
+        cmd += engine.waves.run_args(engine.backend)
+    stream_path = os.path.join(fifo_dir, 'stimulus')
+    os.mkfifo(stream_path)
+    cmd.append(f'+stream={stream_path}')
+    if dump_path:
+        cmd.append(f'+dump={dump_path}')
+    samples_path = None
+    if sampled:
+        samples_path = os.path.join(fifo_dir, 'samples')
+        os.mkfifo(samples_path)
+        cmd.append(f'+samples={samples_path}')
+    return cmd, stream_path, samples_path
+
+def _read_output(proc: 'subprocess.Popen[str]', result: SimulationResult, max_mismatches: int,
+                 stop: Optional[threading.Event]) -> 'collections.deque[str]':
+    # Mismatches are parsed line by line, keeping only the first max_mismatches; stop is set on the first one
+    tail: collections.deque[str] = collections.deque(maxlen=OUTPUT_TAIL)
+    assert proc.stdout is not None
+    for line in proc.stdout:
+        parsed = parse_simulation_output(line)
+        if parsed.mismatches or parsed.violations:
+            result.errors += 1
+            if len(result.mismatches) + len(result.violations) < max_mismatches:
+                result.mismatches.extend(parsed.mismatches)
+                result.violations.extend(parsed.violations)
+            if stop is not None:
+                stop.set()
+            continue
+        if parsed.completed:
+            result.completed = True
+            result.cycles = parsed.cycles
+            result.errors = parsed.errors
+        tail.append(line)
+    return tail
+
+def _join(threads: List[threading.Thread], opened: threading.Event, samples_path: Optional[str]) -> None:
+    for thread in threads[1:]:
+        # If the simulator exited before opening the samples pipe, let the reader see end of file
+        while not opened.is_set() and thread.is_alive():
+            try:
+                os.close(os.open(samples_path or '', os.O_WRONLY | os.O_NONBLOCK))
+            except OSError:
+                pass
+            thread.join(0.01)
+    for thread in threads:
+        thread.join()
+
+def run_stream(engine: 'SimulationEngine', chunks: Iterable[Mapping[str, Optional[Sequence[Any]]]],
+               on_samples: Optional[SamplesCallback] = None, clocked: bool = False, reset_cycles: int = 2,
+               chunk_cycles: int = CHUNK_CYCLES, max_mismatches: int = 100, stop_on_failure: bool = False,
+               dump_path: Optional[str] = None) -> SimulationResult:
+    """
+    Simulates stimulus chunks while they are generated, through named pipes
+
+    :param engine: Engine whose compiled vector testbench runs the stream
+    :param chunks: Mappings from port name to a value sequence or None, or Stimulus objects;
+        None elements of output sequences are not checked
+    :param on_samples: Called with (first step, {port: array}) for every chunk_cycles
+        steps of the sampled ports (engine.sample_ports)
+    :param clocked: Chunks are given per clock cycle (see clocked_sequences)
+    :param reset_cycles: Clock cycles with reset asserted before the first chunk
+    :param chunk_cycles: Steps per call of on_samples
+    :param max_mismatches: Mismatches and property violations kept in the result; all of them
+        are counted in errors
+    :param stop_on_failure: Stop feeding stimulus after the first mismatch or property violation
+    :param dump_path: Optional file to dump waveforms into, in the format of the wave policy
+    :return: Simulation result over every step simulated
+    """
+    if not hasattr(os, 'mkfifo'):
+        raise RuntimeError("Streaming needs named pipes (os.mkfifo), which this platform does not support")
+
+    with tempfile.TemporaryDirectory(prefix=f'svapy_{engine.module_name}_') as fifo_dir:
+        sampled = on_samples is not None and bool(engine.sample_ports)
+        cmd, stream_path, samples_path = _stream_command(engine, fifo_dir, dump_path, sampled)
+
+        result = SimulationResult()
+        errors: List[BaseException] = []
+        stop = threading.Event()
+        opened = threading.Event()
+        with instrument.phase('simulate'):
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            blocks = encode_chunks(engine.ports_info, chunks, clocked, reset_cycles)
+            threads = [threading.Thread(target=_feed, args=(stream_path, proc, blocks, stop, errors), daemon=True)]
+            if samples_path and on_samples is not None:
+                layout = sample_layout(engine.ports_info, engine.sample_ports)
+                threads.append(threading.Thread(target=_drain, daemon=True,
+                                                args=(samples_path, layout, on_samples, chunk_cycles, opened, errors)))
+            for thread in threads:
+                thread.start()
+
+            tail = _read_output(proc, result, max_mismatches, stop if stop_on_failure else None)
+            returncode = proc.wait()
+            stop.set()
+            _join(threads, opened, samples_path)
+
+    if errors:
+        raise errors[0]
+    result.output = ''.join(tail)
+    if returncode != 0 and not result.completed:
+        raise RuntimeError(f"Simulation error: {result.output.strip()}")
+    instrument.count('simulations')
+    instrument.count('cycles_simulated', result.cycles)
+    result.dump = dump_path or ''
+    return result
@@ -0,0 +1,199 @@
+"""
+Streaming VCD reader and comparator.
+
+Unlike loading a whole dump into memory, the reader walks the file once and
+yields value changes or per-cycle samples as generators, keeping only the
+current value of the selected signals. Memory use therefore does not depend
+on the size of the dump.
+"""
+from dataclasses import dataclass
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+@dataclass
+class VcdSignal:
+    """A signal declared in the VCD header"""
+    identifier: str
+    name: str
+    width: int
+
+@dataclass
+class VcdMismatch:
+    """First difference found by compare_vcd"""
+    index: int
+    time: int
+    signal: str
+    expected: int
+    actual: Optional[str]
+
+def to_int(value: Optional[str]) -> Optional[int]:
+    """
+    Converts a VCD value string to an integer, or None if it contains x/z bits
+    """
+    if value is None or not value:
+        return None
+    try:
+        return int(value, 2)
+    except ValueError:
+        return None
+
+class VcdReader:
+    """
+    Reads a VCD file incrementally.
+
+    Signals can be selected by full hierarchical name (``counter_tb.dut.count``)
+    or by any dotted suffix of it (``dut.count`` or ``count``).
+    """
+
+    def __init__(self, path: str, signals: Optional[Iterable[str]] = None) -> None:
+        self.path = path
+        self.filter = list(signals) if signals is not None else None
+        self.timescale = ''
+        self.signals: List[VcdSignal] = []
+        # identifier code -> selected signal names sharing it
+        self._names: Dict[str, List[str]] = {}
+        self._file: Optional[IO[str]] = None
+        # Last timestamp seen, set once changes() reaches the end of the file
+        self.end_time = 0
+
+    def _selected(self, name: str) -> bool:
+        if self.filter is None:
+            return True
+        return any(name == s or name.endswith('.' + s) for s in self.filter)
+
+    def _tokens(self) -> Iterator[str]:
+        assert self._file is not None
+        for line in self._file:
+            yield from line.split()
+
+    @staticmethod
+    def _block(tokens: Iterator[str]) -> List[str]:
+        """Consumes the tokens of a header block up to its $end"""
+        fields = []
+        for token in tokens:
+            if token == '$end':
+                break
+            fields.append(token)
+        return fields
+
+    def _read_header(self, tokens: Iterator[str]) -> None:
+        scope: List[str] = []
+        for token in tokens:
+            if token == '$scope':
+                scope.append(self._block(tokens)[1])
+            elif token == '$upscope':
+                self._block(tokens)
+                scope.pop()
+            elif token == '$timescale':
+                self.timescale = ''.join(self._block(tokens))
+            elif token == '$var':
+                # $var <type> <width> <id> <reference> [<range>] $end
+                fields = self._block(tokens)
+                width, identifier, reference = int(fields[1]), fields[2], fields[3]
+                name = '.'.join(scope + [reference])
+                self.signals.append(VcdSignal(identifier, name, width))
+                if self._selected(name):
+                    self._names.setdefault(identifier, []).append(name)
+            elif token == '$enddefinitions':
+                self._block(tokens)
+                return
+            else:
+                # $date, $version, $comment and other blocks
+                self._block(tokens)
+
+    def changes(self) -> Iterator[Tuple[int, str, str]]:
+        """
+        Yields (time, signal name, value) for every change of a selected signal.
+        Values are binary strings, possibly containing x or z.
+        """
+        with open(self.path, 'r') as f:
+            self._file = f
+            tokens = self._tokens()
+            self._read_header(tokens)
+
+            time = 0
+            names = self._names
+            for token in tokens:
+                head = token[0]
+                if head == '#':
+                    time = int(token[1:])
+                elif head in '01xzXZ':
+                    for name in names.get(token[1:], ()):
+                        yield time, name, head.lower()
+                elif head in 'bBrR':
+                    identifier = next(tokens)
+                    for name in names.get(identifier, ()):
+                        yield time, name, token[1:].lower()
+                elif token == '$comment':
+                    self._block(tokens)
+            self.end_time = time
+            self._file = None
+
+    def samples(self, period: int, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Optional[str]]]]:
+        """
+        Yields (time, values) at offset, offset + period, ... up to the last
+        timestamp of the dump, with the value each selected signal holds after
+        all changes at that time. Signals that have no value yet map to None.
+
+        :param period: Sampling period in VCD time units
+        :param offset: Time of the first sample
+        """
+        if period <= 0:
+            raise ValueError("period must be positive")
+
+        values: Dict[str, str] = {}
+        next_sample = offset
+        for time, name, value in self.changes():
+            while time > next_sample:
+                yield next_sample, self._snapshot(values)
+                next_sample += period
+            values[name] = value
+        while next_sample <= self.end_time:
+            yield next_sample, self._snapshot(values)
+            next_sample += period
+
+    def _snapshot(self, values: Dict[str, str]) -> Dict[str, Optional[str]]:
+        return {name: values.get(name) for names in self._names.values() for name in names}
+
+def _resolve(signal: str, names: Iterable[str]) -> str:
+    # Signals may be given by their full dotted name or by a suffix of it
+    for name in names:
+        if name == signal or name.endswith('.' + signal):
+            return name
+    raise ValueError(f"Signal not found in VCD: {signal}")
+
+def compare_vcd(path: str, expected: Dict[str, Sequence[Optional[int]]], period: int,
+                offset: int = 0) -> Optional[VcdMismatch]:
+    """
+    Compares sampled signals against expected sequences, stopping at the first mismatch.
+
+    :param path: VCD file
+    :param expected: Mapping from signal name (or dotted suffix) to expected values;
+        None entries are not checked
+    :param period: Sampling period in VCD time units
+    :param offset: Time of the first sample
+    :return: The first mismatch, or None if every expected value matched
+    """
+    reader = VcdReader(path, signals=expected.keys())
+    length = max((len(seq) for seq in expected.values()), default=0)
+    resolved: Dict[str, str] = {}
+
+    index = 0
+    for time, values in reader.samples(period, offset):
+        if index >= length:
+            return None
+        for signal, seq in expected.items():
+            if index >= len(seq) or seq[index] is None:
+                continue
+            if signal not in resolved:
+                resolved[signal] = _resolve(signal, values)
+            actual = values[resolved[signal]]
+            if to_int(actual) != seq[index]:
+                return VcdMismatch(index, time, signal, int(seq[index] or 0), actual)
+        index += 1
+
+    # The dump ended before every expected value was seen
+    for signal, seq in expected.items():
+        for i in range(index, len(seq)):
+            if seq[i] is not None:
+                return VcdMismatch(i, offset + i * period, signal, int(seq[i] or 0), None)
+    return None
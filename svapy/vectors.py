@@ -0,0 +1,119 @@
+"""
+Vector files for data-driven testbenches.
+
+Stimulus and expected values are packed into one word per cycle and written
+as a ``$readmemh`` file. A fixed-size testbench (see
+``svapy.core.generate_vector_testbench``) loops over that memory, so the
+testbench source no longer grows with the number of simulated cycles.
+"""
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from svapy import instrument
+
+if TYPE_CHECKING:
+    from svapy.ports import Ports
+
+# (port, kind, width, lsb) where kind is 'input', 'expected' or 'check'
+Field = Tuple[str, str, int, int]
+
+VECTOR_DIR = os.path.join('gen', 'vectors')
+
+def direction_name(direction: Any) -> str:
+    """
+    Returns the port direction name for a pyverilog class or a plain string
+
+    :param direction: pyverilog direction class (Input, Output, ...) or its name
+    :return: Direction name such as 'Input' or 'Output'
+    """
+    if isinstance(direction, str):
+        return direction
+    return str(direction.__name__)
+
+def vector_layout(ports_info: 'Ports') -> List[Field]:
+    """
+    Describes the bit fields of one vector word, most significant field first.
+
+    Inputs come first, followed by the expected value of every output and
+    finally one check-enable bit per output.
+
+    :param ports_info: Dictionary containing port information
+    :return: List of (port, kind, width, lsb) tuples
+    """
+    input_ports = [p for p, info in ports_info.items() if direction_name(info['direction']) == 'Input']
+    output_ports = [p for p, info in ports_info.items() if direction_name(info['direction']) == 'Output']
+
+    fields: List[Tuple[str, str, int]] = []
+    fields += [(p, 'input', int(ports_info[p]['width'])) for p in input_ports]
+    fields += [(p, 'expected', int(ports_info[p]['width'])) for p in output_ports]
+    fields += [(p, 'check', 1) for p in output_ports]
+
+    layout: List[Field] = []
+    lsb = sum(width for _, _, width in fields)
+    for port, kind, width in fields:
+        lsb -= width
+        layout.append((port, kind, width, lsb))
+    return layout
+
+def vector_width(layout: List[Field]) -> int:
+    """
+    Returns the width in bits of a vector word (at least one bit)
+    """
+    return max(1, sum(field[2] for field in layout))
+
+def vector_depth(num_cycles: int, minimum: int = 1024) -> int:
+    """
+    Rounds a cycle count up to a power of two used as vector memory depth.
+
+    Rounding keeps the rendered testbench identical for sequences of similar
+    length.
+    """
+    depth = minimum
+    while depth < num_cycles:
+        depth <<= 1
+    return depth
+
+def pack_vectors(ports_info: 'Ports',
+                 sequences: Dict[str, Optional[Sequence[Any]]],
+                 num_cycles: int) -> List[str]:
+    """
+    Packs per-port sequences into hex words, one per cycle.
+
+    Outputs whose sequence, or whose value at a given cycle, is None are not checked.
+
+    :param ports_info: Dictionary containing port information
+    :param sequences: Mapping from port name to a value sequence or None, or a Stimulus
+    :param num_cycles: Number of cycles to pack
+    :return: List of hex strings suitable for $readmemh
+    """
+    from svapy.stimulus import Stimulus
+
+    stimulus = Stimulus.from_sequences(ports_info, sequences).trim(num_cycles)
+    return stimulus.vector_hex(vector_layout(ports_info)).decode().split()
+
+def write_vector_file(path: str,
+                      ports_info: 'Ports',
+                      sequences: Dict[str, Optional[Sequence[Any]]]) -> int:
+    """
+    Writes a $readmemh vector file for the given sequences.
+
+    All provided sequences are trimmed to the shortest one.
+
+    :param path: Destination file path
+    :param ports_info: Dictionary containing port information
+    :param sequences: Mapping from port name to a value sequence or None, or a Stimulus
+    :return: Number of cycles written
+    """
+    from svapy.stimulus import Stimulus
+
+    stimulus = Stimulus.from_sequences(ports_info, sequences)
+    num_cycles = stimulus.cycles
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with instrument.phase('write'):
+        with open(path, 'wb') as f:
+            written = f.write(stimulus.trim(num_cycles).vector_hex(vector_layout(ports_info)))
+    instrument.count('bytes_written', written)
+    return num_cycles
@@ -0,0 +1,131 @@
+"""
+Waveform dumping policies.
+
+Testbenches only dump when they are given a ``+dump=<file>`` plusarg, so a
+passing run does no waveform I/O unless the policy asks for it:
+
+- ``none``: never dump.
+- ``failure`` (default): re-run a failing example with dumping enabled. Inside
+  Hypothesis only the final replay of the shrunk example is re-run.
+- ``all``: dump every example, as earlier versions did.
+
+What is dumped can be narrowed to a ``$dumpvars`` depth or to a list of
+signals below the testbench (``dut.count``, ``dut.u_alu``), and dumps can be
+written as compressed FST where the simulator supports it (vvp ``-fst``,
+Verilator ``--trace-fst``). Settings come from SVAPY_WAVES,
+SVAPY_WAVE_FORMAT, SVAPY_WAVE_DEPTH and SVAPY_WAVE_SIGNALS.
+"""
+import itertools
+import os
+from dataclasses import dataclass
+from typing import List, Mapping, Optional, Tuple
+
+NONE = 'none'
+FAILURE = 'failure'
+ALL = 'all'
+POLICIES = (NONE, FAILURE, ALL)
+FORMATS = ('vcd', 'fst')
+
+_dump_counter = itertools.count()
+
+@dataclass(frozen=True)
+class WavePolicy:
+    """
+    When and what to dump.
+
+    :param policy: One of POLICIES
+    :param format: 'vcd' or 'fst'
+    :param depth: $dumpvars depth below the testbench, 0 dumps the whole hierarchy
+    :param signals: Signals or scopes relative to the testbench; empty dumps the testbench scope
+    """
+    policy: str = FAILURE
+    format: str = 'vcd'
+    depth: int = 0
+    signals: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown waveform policy: {self.policy} (expected one of {', '.join(POLICIES)})")
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown waveform format: {self.format} (expected one of {', '.join(FORMATS)})")
+        if self.depth < 0:
+            raise ValueError(f"Waveform depth must not be negative, got {self.depth}")
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> 'WavePolicy':
+        """
+        Reads SVAPY_WAVES, SVAPY_WAVE_FORMAT, SVAPY_WAVE_DEPTH and SVAPY_WAVE_SIGNALS (comma separated)
+        """
+        environ = os.environ if environ is None else environ
+        signals = tuple(s.strip() for s in environ.get('SVAPY_WAVE_SIGNALS', '').split(',') if s.strip())
+        return cls(policy=environ.get('SVAPY_WAVES', FAILURE), format=environ.get('SVAPY_WAVE_FORMAT', 'vcd'),
+                   depth=int(environ.get('SVAPY_WAVE_DEPTH', 0)), signals=signals)
+
+    @property
+    def dump_always(self) -> bool:
+        """Whether passing examples are dumped too"""
+        return self.policy == ALL
+
+    @property
+    def dump_failures(self) -> bool:
+        """Whether failing examples are dumped, possibly by re-running them"""
+        return self.policy != NONE
+
+    @property
+    def extension(self) -> str:
+        return f'.{self.format}'
+
+    def dump_path(self, path: str) -> str:
+        """
+        Returns path with the extension of the dump format
+        """
+        return os.path.splitext(path)[0] + self.extension
+
+    def dumpvars(self, scope: str) -> List[str]:
+        """
+        Returns the $dumpvars statements for a testbench scope
+        """
+        if self.signals:
+            return [f'$dumpvars({self.depth}, {scope}.{signal});' for signal in self.signals]
+        return [f'$dumpvars({self.depth}, {scope});']
+
+    def run_args(self, simulator: str) -> List[str]:
+        """
+        Returns the extra run arguments of a simulator for this dump format
+        """
+        if simulator == 'iverilog' and self.format == 'fst':
+            # vvp extended argument, given after the compiled file
+            return ['-fst']
+        return []
+
+    def build_flags(self, simulator: str) -> List[str]:
+        """
+        Returns the extra build flags of a simulator for this dump format
+        """
+        if simulator == 'verilator':
+            return ['--trace-fst'] if self.format == 'fst' else ['--trace']
+        return []
+
+def final_example() -> bool:
+    """
+    Returns False while Hypothesis is generating or shrinking examples, True
+    for its final replay of the shrunk example and outside Hypothesis
+    """
+    try:
+        from hypothesis.control import current_build_context, currently_in_test_context
+    except ImportError:
+        return True
+    if not currently_in_test_context():
+        return True
+    return bool(current_build_context().is_final)
+
+def new_dump_path(module_name: str, policy: WavePolicy, dump_dir: Optional[str] = None) -> str:
+    """
+    Returns a fresh dump path for one simulation of a module, unique per worker and process
+    """
+    from svapy.artifacts import DUMP_DIR, worker_id
+
+    dump_dir = dump_dir or DUMP_DIR
+    os.makedirs(dump_dir, exist_ok=True)
+    name = f'{module_name}_{worker_id()}_{os.getpid()}_{next(_dump_counter)}'
+    return os.path.join(dump_dir, name + policy.extension)
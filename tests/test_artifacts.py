@@ -0,0 +1,109 @@
+import pytest
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from svapy.artifacts import ArtifactAllocator, manifest_testbenches, read_manifest, worker_id
+from svapy.core import generate_module
+
+
+def allocate_many(root, worker, count):
+    os.environ['PYTEST_XDIST_WORKER'] = worker
+    allocator = ArtifactAllocator('counter', test_dir=os.path.join(root, 'tests'),
+                                  dump_dir=os.path.join(root, 'dump'),
+                                  manifest_dir=os.path.join(root, 'manifest'))
+    return [allocator.allocate(cycles=i).testbench for i in range(count)]
+
+
+class TestArtifacts:
+    """Test cases for testbench allocation and the manifest."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.dirs = {
+            'test_dir': os.path.join(self.temp_dir, 'tests'),
+            'dump_dir': os.path.join(self.temp_dir, 'dump'),
+            'vector_dir': os.path.join(self.temp_dir, 'vectors'),
+            'manifest_dir': os.path.join(self.temp_dir, 'manifest'),
+        }
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_worker_id(self, monkeypatch):
+        """Test worker ids inside and outside pytest-xdist."""
+        monkeypatch.delenv('PYTEST_XDIST_WORKER', raising=False)
+        assert worker_id() == 'main'
+        monkeypatch.setenv('PYTEST_XDIST_WORKER', 'gw12')
+        assert worker_id() == 'gw12'
+    
+    def test_allocate(self):
+        """Test that allocations claim files and are recorded."""
+        allocator = ArtifactAllocator('counter', worker='gw0', token='abcd', **self.dirs)
+        first = allocator.allocate('unrolled', 8)
+        second = allocator.allocate('vectors', 16)
+        
+        assert first.example == 'gw0_abcd_0'
+        assert first.testbench == os.path.join(self.dirs['test_dir'], 'counter_tb_gw0_abcd_0.sv')
+        assert os.path.getsize(first.testbench) == 0
+        assert first.dump.endswith('counter_tb_gw0_abcd_0.vcd')
+        assert first.vectors == ''
+        assert second.vectors == os.path.join(self.dirs['vector_dir'], 'counter_tb_gw0_abcd_1.hex')
+        
+        index = read_manifest(self.dirs['manifest_dir'])
+        assert set(index) == {'gw0_abcd_0', 'gw0_abcd_1'}
+        assert index['gw0_abcd_1']['cycles'] == 16
+        assert manifest_testbenches(self.dirs['manifest_dir'], 'counter') == [first.testbench, second.testbench]
+        assert read_manifest(self.dirs['manifest_dir'], 'multiplier') == {}
+    
+    def test_namespace_clash(self):
+        """Test that an existing file is never reused."""
+        first = ArtifactAllocator('counter', worker='gw0', token='same', **self.dirs)
+        second = ArtifactAllocator('counter', worker='gw0', token='same', **self.dirs)
+        paths = [first.allocate().testbench, second.allocate().testbench, first.allocate().testbench]
+        assert len(set(paths)) == 3
+    
+    def test_truncated_manifest_line(self):
+        """Test that a partial last line of a shard is skipped."""
+        allocator = ArtifactAllocator('counter', worker='gw0', token='abcd', **self.dirs)
+        allocator.allocate()
+        with open(allocator.manifest, 'a') as f:
+            f.write('{"example": "gw0_ab')
+        assert list(read_manifest(self.dirs['manifest_dir'])) == ['gw0_abcd_0']
+    
+    def test_concurrent_workers(self):
+        """Test that many processes allocate without collisions."""
+        workers = [f'gw{i}' for i in range(8)]
+        with ProcessPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(allocate_many, [self.temp_dir] * 8, workers, [50] * 8))
+        
+        paths = [path for result in results for path in result]
+        assert len(set(paths)) == 400
+        assert len(os.listdir(self.dirs['test_dir'])) == 400
+        
+        index = read_manifest(self.dirs['manifest_dir'], 'counter')
+        assert len(index) == 400
+        assert {record['worker'] for record in index.values()} == set(workers)
+        assert len(os.listdir(self.dirs['manifest_dir'])) == 8
+    
+    def test_generated_interface(self, monkeypatch):
+        """Test that drive_<module> writes its testbench to an allocated path."""
+        ports_info = {
+            'clk': {'direction': 'Input', 'width': 1},
+            'count': {'direction': 'Output', 'width': 8},
+        }
+        namespace = {}
+        exec(generate_module('counter', ports_info), namespace)
+        monkeypatch.chdir(self.temp_dir)
+        monkeypatch.setenv('PYTEST_XDIST_WORKER', 'gw3')
+        
+        namespace['drive_counter']([0, 1, 0, 1], [0, 0, 1, 1], mode='unrolled')
+        namespace['drive_counter']([0, 1], mode='vectors')
+        
+        records = sorted(read_manifest(os.path.join('gen', 'manifest')).values(), key=lambda r: r['example'])
+        assert [(r['worker'], r['mode'], r['cycles']) for r in records] == [('gw3', 'unrolled', 4), ('gw3', 'vectors', 2)]
+        with open(records[0]['testbench']) as f:
+            assert 'module counter_tb;' in f.read()
+        assert os.path.exists(records[1]['vectors'])
@@ -0,0 +1,162 @@
+import pytest
+import dataclasses
+import svapy.engine
+from svapy.batch import VectorBatch, find_clock_port, find_reset_port
+from svapy.core import generate_module
+from svapy.engine import Mismatch, SimulationResult
+from svapy.properties import Property, Violation, sig
+from svapy.waves import WavePolicy
+from pyverilog.vparser.ast import Input, Output
+
+
+class FakeEngine:
+    """Engine double recording the merged sequences it was asked to run."""
+    
+    def __init__(self, result, waves=None):
+        self.result = result
+        self.module_name = 'test'
+        self.waves = waves or WavePolicy()
+        self.depth = 1 << 16
+        self.calls = []
+        self.dumps = []
+        self.keep_going = []
+    
+    def run_sequences(self, sequences, vector_path, dump_path=None, keep_going=False):
+        self.calls.append(sequences)
+        self.dumps.append(dump_path)
+        self.keep_going.append(keep_going)
+        return dataclasses.replace(self.result, dump=dump_path or '')
+
+
+class TestBatch:
+    """Test cases for batching sequences into one simulation."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.ports_info = {
+            'clk': {'direction': Input, 'width': 1},
+            'rst_n': {'direction': Input, 'width': 1},
+            'data': {'direction': Input, 'width': 8},
+            'result': {'direction': Output, 'width': 8}
+        }
+    
+    def test_find_reset_and_clock(self):
+        """Test reset and clock detection by name."""
+        assert find_reset_port(self.ports_info) == ('rst_n', True)
+        assert find_reset_port({'reset': {'direction': 'Input', 'width': 1}}) == ('reset', False)
+        assert find_reset_port({'data': {'direction': 'Input', 'width': 1}}) is None
+        assert find_clock_port(self.ports_info) == 'clk'
+    
+    def test_merged_sequences(self):
+        """Test that segments are separated by reset pulses."""
+        batch = VectorBatch(self.ports_info, reset_cycles=2)
+        assert batch.add({'clk': [1, 0, 1], 'rst_n': [1, 1, 1], 'data': [5, 6], 'result': None}) == 0
+        assert batch.add({'clk': [0], 'rst_n': [1], 'data': [7], 'result': [3]}) == 1
+        
+        assert len(batch) == 2
+        assert batch.cycles == 7
+        
+        merged = batch.sequences()
+        assert merged['clk'] == [0, 1, 1, 0, 0, 1, 0]
+        assert merged['rst_n'] == [0, 0, 1, 1, 0, 0, 1]
+        assert merged['data'] == [0, 0, 5, 6, 0, 0, 7]
+        assert merged['result'] == [None, None, None, None, None, None, 3]
+    
+    def test_split_maps_mismatches(self):
+        """Test that mismatches are reported against the originating segment."""
+        batch = VectorBatch(self.ports_info, reset_cycles=2)
+        batch.add({'clk': [1, 0], 'rst_n': [1, 1], 'data': [1, 2], 'result': [0, 0]})
+        batch.add({'clk': [1, 0, 1], 'rst_n': [1, 1, 1], 'data': [1, 2, 3], 'result': [0, 0, 0]})
+        
+        result = SimulationResult(cycles=9, errors=1, completed=True,
+                                  mismatches=[Mismatch(7, 'result', '0', '2')])
+        results = batch.split(result)
+        
+        assert results[0].passed
+        assert not results[1].passed
+        assert results[1].mismatches[0].cycle == 1
+        assert results[1].segment.sequences['data'] == [1, 2, 3]
+    
+    def test_split_maps_violations(self):
+        """Test that property violations fail the originating segment only."""
+        batch = VectorBatch(self.ports_info, reset_cycles=2)
+        batch.add({'clk': [1, 0], 'rst_n': [1, 1], 'data': [1, 2], 'result': None})
+        batch.add({'clk': [1, 0, 1], 'rst_n': [1, 1, 1], 'data': [1, 2, 3], 'result': None})
+        
+        engine = FakeEngine(SimulationResult(cycles=9, errors=1, completed=True, violations=[Violation('small', 8)]))
+        results = batch.run(engine, 'batch.hex')
+        
+        assert results[0].passed
+        assert not results[1].passed
+        assert results[1].violations == [Violation('small', 2)]
+        # Every segment is checked, not only those before the first violation
+        assert engine.keep_going[0]
+    
+    def test_interface_checks_properties(self, monkeypatch, tmp_path):
+        """Test that the batch mode of a generated interface fails on a violated property."""
+        monkeypatch.chdir(tmp_path)
+        namespace = {}
+        exec(generate_module('counter', self.ports_info, ['counter.v']), namespace)
+        namespace['PROPERTIES'] = [Property('small', sig('result') < 3)]
+        
+        engines = []
+        
+        def get_engine(module_name, ports_info, design_files, **kwargs):
+            engines.append(kwargs)
+            return FakeEngine(SimulationResult(cycles=7, errors=1, completed=True, violations=[Violation('small', 6)]))
+        
+        monkeypatch.setattr(svapy.engine, 'get_engine', get_engine)
+        assert namespace['drive_counter'](data_seq=[1, 2], result_seq=None, mode='batch') == 0
+        results = namespace['flush_counter']()
+        
+        assert all(kwargs['properties'] == namespace['PROPERTIES'] for kwargs in engines)
+        assert not results[0].passed
+        assert results[0].violations == [Violation('small', 4)]
+    
+    def test_run_clears_batch(self):
+        """Test that a batch is simulated once and then emptied."""
+        batch = VectorBatch(self.ports_info)
+        for _ in range(5):
+            batch.add({'clk': [1], 'rst_n': [1], 'data': [1], 'result': None})
+        
+        engine = FakeEngine(SimulationResult(cycles=15, completed=True))
+        results = batch.run(engine, 'batch.hex')
+        
+        assert len(engine.calls) == 1
+        assert len(results) == 5
+        assert all(r.passed for r in results)
+        assert len(batch) == 0
+        assert batch.run(engine, 'batch.hex') == []
+    
+    def test_incomplete_run_fails_all_segments(self):
+        """Test that a crashed simulation does not pass any segment."""
+        batch = VectorBatch(self.ports_info)
+        batch.add({'clk': [1], 'rst_n': [1], 'data': [1], 'result': None})
+        
+        results = batch.run(FakeEngine(SimulationResult()), 'batch.hex')
+        assert not results[0].passed
+    
+    def test_failing_segment_dump(self, monkeypatch, tmp_path):
+        """Test that only the last failing segment is re-run with dumping."""
+        monkeypatch.chdir(tmp_path)
+        batch = VectorBatch(self.ports_info, reset_cycles=2)
+        for data in (1, 2, 3):
+            batch.add({'clk': [1, 0], 'rst_n': [1, 1], 'data': [data, data], 'result': [0, 0]})
+        
+        result = SimulationResult(cycles=12, errors=2, completed=True,
+                                  mismatches=[Mismatch(3, 'result', '0', '1'), Mismatch(7, 'result', '0', '2')])
+        engine = FakeEngine(result)
+        results = batch.run(engine, 'batch.hex')
+        
+        assert [r.passed for r in results] == [False, False, True]
+        assert results[0].dump == ''
+        assert results[1].dump.endswith('.vcd')
+        assert engine.dumps[0] is None
+        assert engine.calls[1]['data'] == [0, 0, 2, 2]
+        
+        # Without dumping nothing is re-run
+        batch.add({'clk': [1], 'rst_n': [1], 'data': [1], 'result': [0]})
+        engine = FakeEngine(SimulationResult(cycles=3, errors=1, completed=True,
+                                             mismatches=[Mismatch(2, 'result', '0', '1')]), WavePolicy('none'))
+        assert not batch.run(engine, 'batch.hex')[0].passed
+        assert len(engine.calls) == 1
@@ -0,0 +1,89 @@
+import pytest
+import json
+import shutil
+import svapy.benchmark
+from svapy.benchmark import (
+    BenchmarkResult,
+    Scale,
+    compare,
+    load_results,
+    main,
+    run_benchmarks,
+    synthetic_module,
+    synthetic_ports,
+    write_results
+)
+
+
+TINY = Scale(cycles=(4, 8), ports=(2, 4), widths=(1, 70), modules=(1, 2), repeat=1)
+
+
+class TestBenchmark:
+    """Test cases for the performance benchmark suite."""
+    
+    def test_synthetic_ports(self):
+        """Test synthetic port tables and their Verilog source."""
+        ports = synthetic_ports(5, 16)
+        assert list(ports) == ['in0', 'in1', 'out0', 'out1', 'out2']
+        source = synthetic_module('wide', 4, 128)
+        assert 'input wire [127:0] in1' in source
+        assert 'assign out1 = in1 ^ in0;' in source
+        assert 'input wire in0' in synthetic_module('narrow', 2, 1)
+    
+    @pytest.mark.skipif(shutil.which('iverilog') is None, reason="iverilog preprocessor not available")
+    def test_parse_synthetic(self, tmp_path):
+        """Test that synthetic modules parse into the expected port tables."""
+        from svapy.parser import extract_all_module_ports
+        
+        path = tmp_path / 'wide.v'
+        path.write_text(synthetic_module('wide', 4, 128))
+        modules = extract_all_module_ports([str(path)], use_cache=False)
+        assert {port: info['width'] for port, info in modules['wide'].items()} == {
+            'in0': 128, 'in1': 128, 'out0': 128, 'out1': 128}
+    
+    def test_run_stages(self, monkeypatch):
+        """Test running the generate and write stages and skipping the simulator."""
+        monkeypatch.setattr(svapy.benchmark, 'has_simulator', lambda: False)
+        messages = []
+        results, skipped = run_benchmarks(['generate', 'write', 'simulate'], TINY, log=messages.append)
+        
+        assert skipped == ['simulate'] and 'iverilog' in messages[0]
+        names = [r.name for r in results]
+        assert 'generate/runner/ports=4,width=70' in names
+        assert 'write/unrolled/cycles=8,ports=4,width=70' in names
+        assert 'write/vectors/cycles=4,ports=2,width=1' in names
+        assert all(len(r.times) == 1 and r.median >= 0 for r in results)
+        
+        with pytest.raises(ValueError):
+            run_benchmarks(['compile'], TINY)
+    
+    def test_compare(self, tmp_path):
+        """Test regressions against a stored baseline."""
+        results = [BenchmarkResult('a', 'write', {}, [1.0, 3.0, 2.0]), BenchmarkResult('b', 'write', {}, [1.0])]
+        path = str(tmp_path / 'baseline.json')
+        write_results(path, results, ['simulate'])
+        assert load_results(path) == {'a': 2.0, 'b': 1.0}
+        
+        slower = [BenchmarkResult('a', 'write', {}, [3.5]), BenchmarkResult('b', 'write', {}, [1.2]),
+                  BenchmarkResult('new', 'write', {}, [9.0])]
+        regressions = compare(slower, load_results(path), threshold=1.5)
+        assert [(r.name, r.ratio) for r in regressions] == [('a', 1.75)]
+    
+    def test_main(self, tmp_path, monkeypatch, capsys):
+        """Test the command line entry point with a baseline round trip."""
+        monkeypatch.setattr(svapy.benchmark, 'QUICK', TINY)
+        output, baseline = str(tmp_path / 'out.json'), str(tmp_path / 'base.json')
+        args = ['--quick', '--stages', 'generate', '--output', output, '--baseline', baseline]
+        
+        assert main(args) == 0
+        assert 'No baseline' in capsys.readouterr().out
+        assert main(args + ['--save-baseline']) == 0
+        with open(baseline) as f:
+            document = json.load(f)
+        assert document['scale']['ports'] == [2, 4]
+        assert 'python' in document['environment']
+        
+        # A generous threshold passes, an impossible one reports every case
+        assert main(args + ['--threshold', '1000']) == 0
+        assert main(args + ['--threshold', '0']) == 1
+        assert 'REGRESSION generate/module/ports=2,width=1' in capsys.readouterr().out
@@ -0,0 +1,101 @@
+import pytest
+import tempfile
+import os
+import shutil
+import time
+from svapy.cache import ResultCache, default_cache_dir, file_digest, get_cache
+
+
+class TestCache:
+    """Test cases for the on-disk result cache."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_default_cache_dir(self, monkeypatch):
+        """Test cache directory selection."""
+        monkeypatch.delenv('SVAPY_CACHE_DIR', raising=False)
+        assert default_cache_dir('results') == os.path.join('gen', 'cache', 'results')
+        
+        monkeypatch.setenv('SVAPY_CACHE_DIR', self.temp_dir)
+        assert default_cache_dir('parse') == os.path.join(self.temp_dir, 'parse')
+    
+    def test_file_digest(self):
+        """Test that file digests follow the content."""
+        path = os.path.join(self.temp_dir, 'vectors.hex')
+        with open(path, 'w') as f:
+            f.write('01\n')
+        first = file_digest(path)
+        
+        with open(path, 'w') as f:
+            f.write('02\n')
+        assert file_digest(path) != first
+    
+    def test_key_is_stable(self):
+        """Test that keys depend on every part and their boundaries."""
+        assert ResultCache.key('a', 'b') == ResultCache.key('a', 'b')
+        assert ResultCache.key('a', 'b') != ResultCache.key('ab', '')
+    
+    def test_get_cache(self, monkeypatch):
+        """Test that each cache directory has one shared instance."""
+        monkeypatch.setenv('SVAPY_CACHE_DIR', self.temp_dir)
+        cache = get_cache('parse')
+        assert get_cache('parse') is cache
+        assert cache.directory == os.path.join(self.temp_dir, 'parse')
+        assert get_cache('results') is not cache
+        
+        monkeypatch.setenv('SVAPY_CACHE_DIR', os.path.join(self.temp_dir, 'other'))
+        assert get_cache('parse') is not cache
+    
+    def test_get_put(self):
+        """Test storing and loading values."""
+        cache = ResultCache(self.temp_dir)
+        key = cache.key('design', 'sim', 'vectors')
+        
+        assert cache.get(key) is None
+        cache.put(key, {'errors': 0, 'cycles': 10})
+        assert cache.get(key) == {'errors': 0, 'cycles': 10}
+        
+        # A new cache instance sees the persisted entry
+        assert ResultCache(self.temp_dir).get(key) == {'errors': 0, 'cycles': 10}
+    
+    def test_corrupt_entry_is_a_miss(self):
+        """Test that unreadable entries are treated as misses."""
+        cache = ResultCache(self.temp_dir)
+        key = cache.key('corrupt')
+        cache.put(key, {})
+        with open(cache._path(key), 'w') as f:
+            f.write('{not json')
+        assert cache.get(key) is None
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted first."""
+        cache = ResultCache(self.temp_dir, max_bytes=10 ** 6)
+        payload = {'output': 'x' * 100}
+        keys = [cache.key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, payload)
+            os.utime(cache._path(key), (1000 + i, 1000 + i))
+        
+        # Touch the oldest entry so the second one becomes least recently used
+        assert cache.get(keys[0]) is not None
+        
+        cache.max_bytes = 2 * os.path.getsize(cache._path(keys[0]))
+        cache.evict()
+        
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) is not None
+    
+    def test_clear(self):
+        """Test removing all entries."""
+        cache = ResultCache(self.temp_dir)
+        key = cache.key('entry')
+        cache.put(key, {'value': 1})
+        cache.clear()
+        assert cache.get(key) is None
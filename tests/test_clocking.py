@@ -0,0 +1,132 @@
+import pytest
+import os
+import shutil
+import tempfile
+from svapy.clocking import assign_port_roles, clock_ports, clocked_sequences, port_role, reset_ports
+from svapy.core import generate_module
+
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'example')
+
+
+class TestClocking:
+    """Test cases for clock and reset roles."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.ports_info = {
+            'clk': {'direction': 'Input', 'width': 1},
+            'rst_n': {'direction': 'Input', 'width': 1},
+            'data': {'direction': 'Input', 'width': 8},
+            'result': {'direction': 'Output', 'width': 8},
+        }
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_port_role(self):
+        """Test role detection from port names."""
+        for name in ('clk', 'clock', 'CLK', 'aclk', 'sys_clk', 'clk_i', 'i_clk'):
+            assert port_role(name, 'Input') == 'clock', name
+        for name in ('rst_n', 'reset_n', 'rstn', 'aresetn', 'nrst', 'rst_ni', 'i_rst_n', 'reset_b'):
+            assert port_role(name, 'Input') == 'reset_n', name
+        for name in ('rst', 'reset', 'srst', 'sync_rst', 'rst_i'):
+            assert port_role(name, 'Input') == 'reset', name
+        for name in ('clk_en', 'clkdiv', 'first', 'rst_count', 'data'):
+            assert port_role(name, 'Input') == 'data', name
+        
+        # Only 1-bit inputs are clocks or resets
+        assert port_role('clk', 'Output') == 'data'
+        assert port_role('rst_n', 'Input', width=2) == 'data'
+    
+    def test_assign_port_roles(self):
+        """Test user roles overriding the name heuristics."""
+        ports = assign_port_roles(self.ports_info, {'rst_n': 'data', 'missing': 'clock'})
+        assert ports['clk']['role'] == 'clock'
+        assert ports['rst_n']['role'] == 'data'
+        assert reset_ports(ports) == []
+        assert clock_ports(ports) == ['clk']
+        
+        with pytest.raises(ValueError, match="Unknown port role"):
+            assign_port_roles(self.ports_info, {'clk': 'strobe'})
+    
+    def test_clocked_sequences(self):
+        """Test expansion of per-cycle sequences into time steps."""
+        steps = clocked_sequences(self.ports_info, {'data': [5, 6], 'result': [1, None]}, 2, reset_cycles=1)
+        assert steps['clk'].tolist() == [0, 1, 0, 1, 0, 1, 0]
+        assert steps['rst_n'].tolist() == [0, 0, 1, 1, 1, 1, 1]
+        assert steps['data'].tolist() == [0, 0, 5, 5, 6, 6, 6]
+        assert steps['result'] == [None, None, None, None, 1, None, None]
+        
+        # An explicit reset sequence drives reset after the initial pulse
+        steps = clocked_sequences(self.ports_info, {'rst_n': [1, 0], 'result': None}, 2, reset_cycles=1)
+        assert steps['rst_n'].tolist() == [0, 0, 1, 1, 0, 0, 0]
+        assert steps['result'] is None
+        
+        # Without a reset port there is no reset pulse
+        del self.ports_info['rst_n']
+        steps = clocked_sequences(self.ports_info, {'data': [5]}, 1, reset_cycles=4)
+        assert steps['clk'].tolist() == [0, 1, 0]
+        assert steps['data'].tolist() == [5, 5, 5]
+    
+    def test_generated_interface(self, monkeypatch):
+        """Test driving the example counter per clock cycle."""
+        ports_info = {
+            'clk': {'direction': 'Input', 'width': 1},
+            'rst_n': {'direction': 'Input', 'width': 1},
+            'count': {'direction': 'Output', 'width': 8},
+        }
+        namespace = {}
+        exec(generate_module('counter', ports_info, [os.path.join(EXAMPLE_DIR, 'counter.v')]), namespace)
+        drive_counter = namespace['drive_counter']
+        monkeypatch.chdir(self.temp_dir)
+        
+        result = drive_counter(count_seq=[1, 2, 3, 4], mode='pysim', reset_cycles=3)
+        assert result.passed
+        assert not drive_counter(count_seq=[1, 2, 4], mode='pysim').passed
+        
+        # Clock and reset given explicitly keep the per-step behaviour
+        assert drive_counter([0, 1, 0, 1], [0, 1, 1, 1], [0, 0, 1, None], mode='pysim').passed
+        
+        drive_counter(cycles=3, mode='unrolled')
+        testbench = os.path.join('gen', 'tests', os.listdir(os.path.join('gen', 'tests'))[0])
+        with open(testbench) as f:
+            source = f.read()
+        assert 'always #1 clk = ~clk;' in source
+        assert 'repeat (2) @(negedge clk);' in source
+        assert source.count('@(negedge clk);') == 4
+        assert 'delay_cycle' not in source
+    
+    def test_generated_interface_roles(self, monkeypatch):
+        """Test that user-chosen roles reach the data-driven modes of a generated interface."""
+        source = os.path.join(self.temp_dir, 'ticker.v')
+        with open(source, 'w') as f:
+            f.write('module ticker (\n'
+                    '    input wire tick,\n'
+                    '    input wire clear,\n'
+                    '    output reg [7:0] count\n'
+                    ');\n'
+                    '    initial begin\n'
+                    '        count = 0;\n'
+                    '    end\n'
+                    '    always @(posedge tick) begin\n'
+                    '        if (clear) count <= 0;\n'
+                    '        else count <= count + 1;\n'
+                    '    end\n'
+                    'endmodule\n')
+        ports_info = {
+            'tick': {'direction': 'Input', 'width': 1, 'role': 'clock'},
+            'clear': {'direction': 'Input', 'width': 1, 'role': 'reset'},
+            'count': {'direction': 'Output', 'width': 8},
+        }
+        namespace = {}
+        exec(generate_module('ticker', ports_info, [source]), namespace)
+        assert namespace['PORTS']['tick']['role'] == 'clock'
+        assert namespace['PORTS']['clear']['role'] == 'reset'
+        monkeypatch.chdir(self.temp_dir)
+        
+        drive_ticker = namespace['drive_ticker']
+        assert drive_ticker(count_seq=[1, 2, 3], mode='pysim', reset_cycles=2).passed
+        assert not drive_ticker(count_seq=[1, 3], mode='pysim').passed
@@ -1,10 +1,13 @@
 import pytest
 import tempfile
 import os
+import subprocess
+import sys
 from svapy.core import (
     generate_module_docstring,
     generate_module,
     generate_runner,
+    generate_vector_testbench,
     get_template_environment
 )
 from pyverilog.vparser.ast import Input, Output
@@ -27,6 +30,19 @@ class TestCore:
         env = get_template_environment()
         assert env is not None
         assert hasattr(env, 'get_template')
+        assert env.bytecode_cache is not None
+    
+    def test_template_environment_is_shared(self):
+        """Test that the template environment is built once per process."""
+        assert get_template_environment() is get_template_environment()
+    
+    def test_import_is_lazy(self):
+        """Test that importing the generators does not load pyverilog or jinja2."""
+        code = ("import sys, svapy.core, svapy.parser; "
+                "print(any(m.startswith(('pyverilog', 'jinja2')) for m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert result.stdout.strip() == 'False'
     
     def test_generate_module_docstring(self):
         """Test module docstring generation."""
@@ -59,10 +75,21 @@ class TestCore:
         
         assert '@given' in runner_code
         assert 'def test_test_module' in runner_code
-        assert 'st.lists' in runner_code
-        assert 'st.booleans' in runner_code
-        assert 'st.integers' in runner_code
+        assert 'stimulus_strategy(' in runner_code
         assert 'hypothesis' in runner_code
+        assert "MIN_CYCLES = int(os.environ.get('SVAPY_MIN_CYCLES', 10))" in runner_code
+        
+        # clk and rst_n are generated, only data is drawn
+        assert "inputs=['data']" in runner_code
+        assert 'clk_seq' not in runner_code
+        assert "data_seq=stimulus.array('data')" in runner_code
+        
+        runner_code = generate_runner('test_module', self.sample_ports_info, min_cycles=1000, max_cycles=100000,
+                                      max_examples=5)
+        assert "MAX_CYCLES = int(os.environ.get('SVAPY_MAX_CYCLES', 100000))" in runner_code
+        assert "MAX_EXAMPLES = int(os.environ.get('SVAPY_MAX_EXAMPLES', 5))" in runner_code
+        with pytest.raises(ValueError):
+            generate_runner('test_module', self.sample_ports_info, min_cycles=10, max_cycles=5)
     
     def test_generate_with_empty_ports(self):
         """Test generation with empty ports info."""
@@ -87,8 +114,10 @@ class TestCore:
         interface = generate_module('single_port', single_port)
         assert 'clk_seq' in interface
         
+        # A clock is generated, the runner only draws the number of cycles
         runner = generate_runner('single_port', single_port)
-        assert 'clk_seq' in runner
+        assert 'clk_seq' not in runner
+        assert 'drive_single_port(cycles=stimulus.cycles)' in runner
     
     def test_generate_with_wide_bus(self):
         """Test generation with wide bus."""
@@ -102,7 +131,12 @@ class TestCore:
         
         runner = generate_runner('wide_bus', wide_bus)
         assert 'data_seq' in runner
-        assert 'max_value=' in runner  # Should have max_value for wide bus
+        assert "inputs=['data']" in runner  # Widths come from PORTS, values are drawn as bytes
+        
+        # Unrolled output checks compare the full width of the widest output
+        wide_output = {'a': {'direction': Input, 'width': 1}, 'y': {'direction': Output, 'width': 40}}
+        interface = generate_module('wide_output', wide_output)
+        assert 'logic [39:0] actual, logic [39:0] expected' in interface
     
     def test_template_rendering_consistency(self):
         """Test that templates render consistently."""
@@ -120,3 +154,84 @@ class TestCore:
         runner1 = generate_runner(module_name, self.sample_ports_info)
         runner2 = generate_runner(module_name, self.sample_ports_info)
         assert runner1 == runner2
+    
+    def test_generate_vector_testbench(self):
+        """Test fixed-size vector testbench generation."""
+        tb = generate_vector_testbench('test_module', self.sample_ports_info,
+                                       default_vectors='vec.hex', default_cycles=10)
+        
+        assert 'module test_module_tb;' in tb
+        assert '$readmemh(vector_file, vectors' in tb
+        assert '"vec.hex"' in tb
+        assert 'num_cycles = 10;' in tb
+        assert 'result_check' in tb
+        assert 'logic [7:0] result_expected;' in tb
+        assert '$fwrite(sample_fd, "%u", result);' in tb
+        # Stimulus can also be streamed from a file or FIFO
+        assert '$value$plusargs("stream=%s", stream_file)' in tb
+        assert '$fscanf(stream_fd, "%h\\n", word)' in tb
+    
+    def test_vector_testbench_sample_selection(self):
+        """Test choosing which ports are written to the sample file."""
+        tb = generate_vector_testbench('test_module', self.sample_ports_info, sample_ports=['data', 'result'])
+        assert '$fwrite(sample_fd, "%u%u", data, result);' in tb
+        
+        tb = generate_vector_testbench('test_module', self.sample_ports_info, sample_ports=[])
+        assert 'sample_fd' not in tb
+    
+    def test_vector_testbench_size_is_constant(self):
+        """Test that the vector testbench does not grow with the cycle count."""
+        short_tb = generate_vector_testbench('test_module', self.sample_ports_info, default_cycles=10)
+        long_tb = generate_vector_testbench('test_module', self.sample_ports_info, default_cycles=100000)
+        
+        assert abs(len(long_tb) - len(short_tb)) < 16
+    
+    def test_generate_module_vector_mode(self):
+        """Test that the interface supports the vector-file mode."""
+        interface_code = generate_module('test_module', self.sample_ports_info)
+        
+        assert "PORTS = {" in interface_code
+        assert "'data': {'direction': 'Input', 'width': 8, 'role': 'data'}" in interface_code
+        assert "mode=None" in interface_code
+        assert "write_vector_file" in interface_code
+    
+    def test_generate_module_design_files(self):
+        """Test that design files are embedded for the engine mode."""
+        interface_code = generate_module('test_module', self.sample_ports_info, ['rtl/test_module.v'])
+        
+        assert '"rtl/test_module.v",' in interface_code
+        assert "'engine'" in interface_code
+        assert "'pysim'" in interface_code
+    
+    def test_generate_batch_mode(self):
+        """Test that interface and runner support the batch mode."""
+        interface_code = generate_module('test_module', self.sample_ports_info)
+        runner_code = generate_runner('test_module', self.sample_ports_info)
+        
+        assert 'def flush_test_module():' in interface_code
+        assert "'batch'" in interface_code
+        assert 'flush_test_module()' in runner_code
+        assert 'SVAPY_MAX_EXAMPLES' in runner_code
+    
+    def test_runner_fails_on_mismatch(self, tmp_path):
+        """Test that a simulated mismatch fails the generated runner."""
+        ports_info = {
+            'clk': {'direction': Input, 'width': 1},
+            'rst_n': {'direction': Input, 'width': 1},
+            'count': {'direction': Output, 'width': 8},
+        }
+        package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = str(tmp_path)
+        with open(os.path.join(out, 'counter_interface.py'), 'w') as f:
+            f.write(generate_module('counter', ports_info, [os.path.join(package_dir, 'example', 'counter.v')]))
+        # The runner expects count to stay 0, which the counter does not
+        runner = os.path.join(out, 'run_counter.py')
+        with open(runner, 'w') as f:
+            f.write(generate_runner('counter', ports_info, min_cycles=2, max_cycles=4, max_examples=5))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([out, package_dir]), SVAPY_TB_MODE='pysim')
+        
+        proc = subprocess.run([sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider', runner],
+                              capture_output=True, text=True, cwd=out, env=env)
+        assert proc.returncode == 1, proc.stdout + proc.stderr
+        assert 'error(s), mismatches: [Mismatch(' in proc.stdout
+        assert 'Falsifying example' in proc.stdout or 'Failing test case' in proc.stdout
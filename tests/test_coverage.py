@@ -0,0 +1,160 @@
+import pytest
+import tempfile
+import os
+import shutil
+import subprocess
+import sys
+import numpy as np
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from svapy.clocking import clocked_sequences
+from svapy.coverage import Corpus, Coverage, CoverageFeedback, collect, run_coverage, state_registers, toggles
+from svapy.engine import SimulationResult
+from svapy.generate import write_module_files
+from svapy.pysim import CycleSimulator
+from svapy.stimulus import Stimulus
+from pyverilog.vparser.ast import Input, Output
+
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'example')
+
+
+class TestCoverage:
+    """Test cases for coverage collection and the corpus."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.ports_info = {
+            'clk': {'direction': 'Input', 'width': 1},
+            'rst_n': {'direction': 'Input', 'width': 1},
+            'mode': {'direction': 'Input', 'width': 2},
+            'state': {'direction': 'Output', 'width': 2},
+            'wide': {'direction': 'Output', 'width': 72}
+        }
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_toggles(self):
+        """Test rising and falling bit masks."""
+        assert toggles(np.array([0b0011, 0b0110, 0b0100], dtype=np.uint8)) == (0b0100, 0b0011)
+        assert toggles(np.array([5], dtype=np.uint8)) == (0, 0)
+        assert toggles(np.array([1 << 70, 1], dtype=object)) == (1, 1 << 70)
+        assert state_registers({'state': 4, 'next_state': 3, 'status': 4, 'state_log': 64}) == ['state', 'next_state']
+    
+    def test_collect(self):
+        """Test that clocked runs are covered at the evaluation points only."""
+        stimulus = clocked_sequences(self.ports_info, {'mode': [1, 2, 3, 0]}, 4, 2)
+        steps = stimulus.cycles
+        values = {
+            'clk': stimulus.array('clk'),
+            'rst_n': stimulus.array('rst_n'),
+            'mode': stimulus.array('mode'),
+            # Glitches between evaluation points are not covered
+            'state': np.array([3, 3, 3, 3, 0, 3, 1, 3, 2, 3, 1, 3, 1], dtype=np.uint8)[:steps],
+        }
+        coverage = collect(self.ports_info, values, steps, states=['state'])
+        assert set(coverage.toggles) == {'mode', 'state'}
+        assert coverage.states == {'state': {0, 1, 2}}
+        assert coverage.transitions == {'state': {(0, 1), (1, 2), (2, 1)}}
+        
+        inputs = run_coverage(self.ports_info, stimulus, {})
+        assert set(inputs.toggles) == {'mode'}
+    
+    def test_merge(self):
+        """Test counting new bins and the dictionary round trip."""
+        total = Coverage()
+        first = Coverage(toggles={'a': (0b01, 0)}, states={'s': {1}}, transitions={'s': set()})
+        second = Coverage(toggles={'a': (0b11, 0b10)}, states={'s': {1, 2}}, transitions={'s': {(1, 2)}})
+        assert total.merge(first) == 2
+        assert total.merge(second) == 4
+        assert total.merge(second) == 0
+        assert total.bins == 6
+        assert Coverage.from_dict(total.to_dict()) == total
+        assert 'states 1, 2' in total.summary()
+    
+    def test_corpus(self):
+        """Test saving and replaying examples, including ports wider than 64 bits."""
+        corpus = Corpus('fsm', self.ports_info, self.temp_dir)
+        assert len(corpus) == 0
+        stimulus = Stimulus(self.ports_info, {
+            'mode': np.array([1, 2, 3], dtype=np.uint8),
+            'wide': np.array([1 << 71, 0, 5], dtype=object),
+            'state': None,
+        })
+        path = corpus.add(stimulus)
+        assert corpus.add(stimulus) == path
+        assert os.path.dirname(path) == os.path.join(self.temp_dir, 'fsm')
+        
+        loaded, = list(corpus)
+        assert set(loaded) == {'mode', 'wide'}
+        assert loaded.array('mode').tolist() == [1, 2, 3]
+        assert loaded.array('wide').tolist() == [1 << 71, 0, 5]
+    
+    def test_feedback(self):
+        """Test targeting bins inside Hypothesis and saving new coverage."""
+        feedback = CoverageFeedback('fsm', self.ports_info, self.temp_dir)
+        seen = []
+        
+        @settings(max_examples=20, database=None)
+        @given(value=st.integers(min_value=0, max_value=3))
+        def check(value):
+            stimulus = Stimulus(self.ports_info, {'mode': np.array([0, value], dtype=np.uint8)})
+            result = SimulationResult(completed=True)
+            result.coverage = run_coverage(self.ports_info, stimulus, {})
+            seen.append(feedback.observe(stimulus, result))
+        
+        check()
+        assert sum(seen) == feedback.total.bins == 2
+        assert 1 <= len(feedback.corpus) <= 2
+        assert feedback.observe(None, SimulationResult()) == 0
+    
+    def test_pysim(self):
+        """Test that pysim covers internal registers and FSM states."""
+        sim = CycleSimulator.from_files('csr', [os.path.join(EXAMPLE_DIR, 'csr.v')])
+        ports_info = {port: {'direction': 'Input' if port in sim.inputs else 'Output', 'width': sim.widths[port]}
+                      for port in sim.inputs + sim.outputs}
+        # Write CONFIG, then start processing through CTRL
+        stimulus = clocked_sequences(ports_info, {
+            'addr': [0x08, 0x00, 0x00, 0x00, 0x00, 0x00],
+            'wdata': [2, 1, 0, 0, 0, 0],
+            'wr_en': [1, 1, 0, 0, 0, 0],
+            'rd_en': [0, 0, 0, 0, 0, 0],
+        }, 6, 2)
+        result = sim.run_sequences(stimulus, coverage=True)
+        assert 'counter' in result.coverage.toggles
+        assert result.coverage.states['state'] == {0b0001, 0b0010, 0b0100}
+        assert (0b0001, 0b0010) in result.coverage.transitions['state']
+        assert sim.run_sequences(stimulus).coverage is None
+    
+    def test_runner(self):
+        """Test that a generated runner fills the corpus and replays it."""
+        ports = {
+            'clk': {'direction': Input, 'width': 1},
+            'reset_n': {'direction': Input, 'width': 1},
+            'addr': {'direction': Input, 'width': 8},
+            'wdata': {'direction': Input, 'width': 32},
+            'wr_en': {'direction': Input, 'width': 1},
+            'rd_en': {'direction': Input, 'width': 1},
+        }
+        # Without output ports the runner expects nothing, so every example passes
+        out = os.path.join(self.temp_dir, 'gen')
+        runner = write_module_files('csr', ports, [os.path.join(EXAMPLE_DIR, 'csr.v')], out)[1]
+        corpus_dir = os.path.join(self.temp_dir, 'corpus')
+        package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([out, package_dir]), SVAPY_TB_MODE='pysim',
+                   SVAPY_COVERAGE='1', SVAPY_CORPUS_DIR=corpus_dir, SVAPY_MAX_EXAMPLES='10',
+                   SVAPY_MIN_CYCLES='4', SVAPY_MAX_CYCLES='8')
+        command = [sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider', runner]
+        
+        proc = subprocess.run(command, capture_output=True, text=True, cwd=self.temp_dir, env=env)
+        assert proc.returncode == 0, proc.stdout + proc.stderr
+        saved = sorted(os.listdir(os.path.join(corpus_dir, 'csr')))
+        assert saved
+        
+        # The second run replays the corpus as explicit examples first
+        proc = subprocess.run(command, capture_output=True, text=True, cwd=self.temp_dir, env=env)
+        assert proc.returncode == 0, proc.stdout + proc.stderr
+        assert set(saved) <= set(os.listdir(os.path.join(corpus_dir, 'csr')))
@@ -0,0 +1,326 @@
+import pytest
+import tempfile
+import os
+import shutil
+import stat
+import sys
+from svapy import instrument
+from svapy.cache import ResultCache
+from svapy.engine import (
+    SimulationEngine,
+    VerilatorEngine,
+    design_hash,
+    get_engine,
+    parse_simulation_output,
+    SimulationResult
+)
+from svapy.properties import Violation
+from svapy.waves import WavePolicy
+from pyverilog.vparser.ast import Input, Output
+
+
+FAKE_IVERILOG = """#!{python}
+import sys
+args = sys.argv[1:]
+with open(args[args.index('-o') + 1], 'w') as f:
+    f.write('binary')
+with open({log!r}, 'a') as f:
+    f.write('compile\\n')
+"""
+
+FAKE_VVP = """#!{python}
+import sys
+with open({log!r}, 'a') as f:
+    f.write('run\\n')
+samples = [a.split('=', 1)[1] for a in sys.argv if a.startswith('+samples=')]
+if samples:
+    with open(samples[0], 'wb') as f:
+        f.write(bytes([5, 0, 0, 0, 6, 0, 0, 0]))
+dumps = [a.split('=', 1)[1] for a in sys.argv if a.startswith('+dump=')]
+if dumps:
+    with open(dumps[0], 'w') as f:
+        f.write('fst' if '-fst' in sys.argv else 'vcd')
+cycles = [a.split('=', 1)[1] for a in sys.argv if a.startswith('+cycles=')][0]
+print('SVAPY_MISMATCH cycle=1 port=count expected=1 actual=0')
+print('SVAPY_DONE cycles=%s errors=1' % cycles)
+"""
+
+FAKE_VERILATOR = """#!{python}
+import os, sys
+args = sys.argv[1:]
+obj_dir = args[args.index('-Mdir') + 1]
+top = args[args.index('--top-module') + 1]
+os.makedirs(obj_dir, exist_ok=True)
+model = os.path.join(obj_dir, 'V' + top)
+with open(model, 'w') as f:
+    f.write({vvp!r})
+os.chmod(model, 0o755)
+with open({log!r}, 'a') as f:
+    f.write(' '.join(args) + '\\n')
+"""
+
+
+def write_script(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+class TestEngine:
+    """Test cases for the compile-once simulation engine."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.ports_info = {
+            'clk': {'direction': Input, 'width': 1},
+            'rst_n': {'direction': Input, 'width': 1},
+            'count': {'direction': Output, 'width': 8}
+        }
+        self.design = os.path.join(self.temp_dir, 'counter.v')
+        with open(self.design, 'w') as f:
+            f.write('module counter(input clk, input rst_n, output reg [7:0] count); endmodule\n')
+        
+        self.log = os.path.join(self.temp_dir, 'compile.log')
+        self.run_log = os.path.join(self.temp_dir, 'run.log')
+        self.iverilog = os.path.join(self.temp_dir, 'iverilog')
+        self.vvp = os.path.join(self.temp_dir, 'vvp')
+        write_script(self.iverilog, FAKE_IVERILOG.format(python=sys.executable, log=self.log))
+        write_script(self.vvp, FAKE_VVP.format(python=sys.executable, log=self.run_log))
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def make_engine(self, cache=None, waves=None):
+        return SimulationEngine('counter', self.ports_info, [self.design],
+                                build_dir=os.path.join(self.temp_dir, 'build'),
+                                iverilog=self.iverilog, vvp=self.vvp, cache=cache, waves=waves)
+    
+    def count_lines(self, path):
+        if not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            return len(f.readlines())
+    
+    def compile_count(self):
+        return self.count_lines(self.log)
+    
+    def test_parse_simulation_output(self):
+        """Test parsing of testbench result lines."""
+        output = (
+            "SVAPY_MISMATCH cycle=3 port=count expected=4 actual=5\n"
+            "some other line\n"
+            "SVAPY_DONE cycles=10 errors=1\n"
+        )
+        result = parse_simulation_output(output)
+        
+        assert result.completed
+        assert result.cycles == 10
+        assert result.errors == 1
+        assert not result.passed
+        assert result.mismatches[0].cycle == 3
+        assert result.mismatches[0].port == 'count'
+    
+    def test_parse_incomplete_output(self):
+        """Test that a run without SVAPY_DONE does not pass."""
+        result = parse_simulation_output("")
+        assert not result.completed
+        assert not result.passed
+    
+    def test_parse_property_violations(self):
+        """Test parsing of property violations, also in cached results."""
+        result = parse_simulation_output("SVAPY_PROPERTY name=ack_after_req cycle=7\n")
+        assert result.violations == [Violation('ack_after_req', 7)]
+        assert result.errors == 1
+        assert not result.passed
+        
+        result = parse_simulation_output("SVAPY_PROPERTY name=small cycle=4\nSVAPY_DONE cycles=5 errors=1\n")
+        assert result.completed and result.errors == 1
+        assert SimulationResult.from_dict(result.to_dict()) == result
+    
+    def test_design_hash(self):
+        """Test that the design hash follows the sources."""
+        first = design_hash([self.design], 'tb')
+        assert first == design_hash([self.design], 'tb')
+        assert first != design_hash([self.design], 'other tb')
+        
+        with open(self.design, 'a') as f:
+            f.write('// changed\n')
+        assert first != design_hash([self.design], 'tb')
+    
+    def test_compile_once_run_many(self):
+        """Test that several runs share one compilation."""
+        engine = self.make_engine()
+        vec_path = os.path.join(self.temp_dir, 'vectors.hex')
+        
+        for _ in range(3):
+            result = engine.run_sequences({'clk': [0, 1], 'rst_n': [1, 1], 'count': [0, 1]}, vec_path)
+            assert result.cycles == 2
+            assert result.errors == 1
+        
+        assert self.compile_count() == 1
+        
+        # A new engine for the same design reuses the binary on disk
+        self.make_engine().compile()
+        assert self.compile_count() == 1
+    
+    def test_run_exceeding_depth(self):
+        """Test that sequences longer than the vector memory are rejected."""
+        engine = self.make_engine()
+        with pytest.raises(ValueError):
+            engine.run('vectors.hex', engine.depth + 1)
+    
+    def test_compile_error(self):
+        """Test that compiler failures are reported."""
+        write_script(self.iverilog, f"#!{sys.executable}\nimport sys\nsys.stderr.write('syntax error')\nsys.exit(1)\n")
+        engine = self.make_engine()
+        with pytest.raises(RuntimeError, match='syntax error'):
+            engine.compile()
+    
+    def test_get_engine_is_shared(self):
+        """Test that engines are shared per module and design files."""
+        first = get_engine('counter', self.ports_info, [self.design], build_dir=self.temp_dir)
+        second = get_engine('counter', self.ports_info, [self.design], build_dir=self.temp_dir)
+        assert first is second
+        
+        # Any other setting gets an engine of its own
+        other = get_engine('counter', self.ports_info, [self.design], build_dir=self.temp_dir, depth=16)
+        assert other is not first and other.depth == 16
+        waves = WavePolicy('all')
+        assert get_engine('counter', self.ports_info, [self.design], build_dir=self.temp_dir, waves=waves).waves == waves
+        assert get_engine('counter', self.ports_info, [self.design], build_dir=self.temp_dir,
+                          sample_ports=['count']) is not first
+        ports_info = dict(self.ports_info, count={'direction': Output, 'width': 16})
+        assert get_engine('counter', ports_info, [self.design], build_dir=self.temp_dir).ports_info is ports_info
+    
+    def test_result_round_trip(self):
+        """Test serialising results for the cache."""
+        result = parse_simulation_output("SVAPY_MISMATCH cycle=1 port=count expected=1 actual=0\n"
+                                         "SVAPY_DONE cycles=2 errors=1\n")
+        restored = SimulationResult.from_dict(result.to_dict())
+        assert restored == result
+    
+    def test_cached_runs_skip_simulator(self):
+        """Test that identical vector files are served from the result cache."""
+        cache = ResultCache(os.path.join(self.temp_dir, 'cache'))
+        engine = self.make_engine(cache)
+        vec_path = os.path.join(self.temp_dir, 'vectors.hex')
+        sequences = {'clk': [0, 1], 'rst_n': [1, 1], 'count': [0, 1]}
+        
+        first = engine.run_sequences(sequences, vec_path)
+        second = engine.run_sequences(sequences, vec_path)
+        assert not first.cached
+        assert second.cached
+        assert second.errors == first.errors
+        assert self.count_lines(self.run_log) == 1
+        
+        # A fresh engine hits the cache without even compiling
+        self.make_engine(cache).run_sequences(sequences, vec_path)
+        assert self.count_lines(self.run_log) == 1
+        assert self.compile_count() == 1
+        
+        # Different vectors miss the cache
+        engine.run_sequences({'clk': [1, 0], 'rst_n': [1, 1], 'count': [0, 1]}, vec_path)
+        assert self.count_lines(self.run_log) == 2
+    
+    def test_profiled_runs(self):
+        """Test compile, simulate and cache counters recorded while profiling."""
+        profiler = instrument.enable(report_at_exit=False)
+        try:
+            engine = self.make_engine(ResultCache(os.path.join(self.temp_dir, 'cache')))
+            vec_path = os.path.join(self.temp_dir, 'vectors.hex')
+            sequences = {'clk': [0, 1], 'rst_n': [1, 1], 'count': [0, 1]}
+            first = engine.run_sequences(sequences, vec_path)
+            engine.run_sequences(sequences, vec_path)
+            self.make_engine().compile()
+        finally:
+            instrument.disable()
+        
+        assert profiler.phases['compile'].calls == 1
+        assert profiler.phases['simulate'].calls == 1
+        assert profiler.phases['check'].calls == 1
+        assert profiler.counters['compiles'] == 1
+        assert profiler.counters['binary_reuses'] == 1
+        assert profiler.counters['cache_misses'] == 1
+        assert profiler.counters['cache_hits'] == 1
+        assert profiler.counters['cycles_simulated'] == first.cycles
+        assert profiler.counters['bytes_written'] == 2 * os.path.getsize(vec_path)
+    
+    def test_samples(self):
+        """Test that sample files are requested and loaded, bypassing the cache."""
+        cache = ResultCache(os.path.join(self.temp_dir, 'cache'))
+        engine = self.make_engine(cache)
+        vec_path = os.path.join(self.temp_dir, 'vectors.hex')
+        samples_path = os.path.join(self.temp_dir, 'samples.bin')
+        sequences = {'clk': [0, 1], 'rst_n': [1, 1], 'count': None}
+        
+        assert '$fwrite(sample_fd, "%u", count);' in engine.testbench
+        for _ in range(2):
+            engine.run_sequences(sequences, vec_path, samples_path=samples_path)
+        assert self.count_lines(self.run_log) == 2
+        assert engine.load_samples(samples_path)['count'].tolist() == [5, 6]
+    
+    def test_wave_policies(self, monkeypatch):
+        """Test that failing examples are re-run with dumping under the wave policies."""
+        monkeypatch.chdir(self.temp_dir)
+        vec_path = os.path.join(self.temp_dir, 'vectors.hex')
+        sequences = {'clk': [0, 1], 'rst_n': [1, 1], 'count': [0, 1]}
+        
+        result = self.make_engine(waves=WavePolicy('none')).run_example(sequences, vec_path)
+        assert not result.passed and result.dump == ''
+        assert self.count_lines(self.run_log) == 1
+        assert not os.path.exists(os.path.join('gen', 'dump'))
+        
+        # The failing example is simulated again with a dump
+        result = self.make_engine(waves=WavePolicy('failure')).run_example(sequences, vec_path)
+        assert result.errors == 1
+        assert self.count_lines(self.run_log) == 3
+        with open(result.dump) as f:
+            assert f.read() == 'vcd'
+        
+        # FST dumps of every run need no re-run
+        engine = self.make_engine(waves=WavePolicy('all', 'fst', depth=1, signals=('dut',)))
+        assert '$dumpvars(1, counter_tb.dut);' in engine.testbench
+        result = engine.run_example(sequences, vec_path)
+        assert self.count_lines(self.run_log) == 4
+        assert result.dump.endswith('.fst')
+        with open(result.dump) as f:
+            assert f.read() == 'fst'
+    
+    def test_verilator_backend(self):
+        """Test building and running the model with Verilator."""
+        verilator = os.path.join(self.temp_dir, 'verilator')
+        model = FAKE_VVP.format(python=sys.executable, log=self.run_log)
+        write_script(verilator, FAKE_VERILATOR.format(python=sys.executable, vvp=model, log=self.log))
+        engine = VerilatorEngine('counter', self.ports_info, [self.design],
+                                 build_dir=os.path.join(self.temp_dir, 'build'), verilator=verilator)
+        vec_path = os.path.join(self.temp_dir, 'vectors.hex')
+        
+        for _ in range(2):
+            result = engine.run_sequences({'clk': [0, 1], 'rst_n': [1, 1], 'count': [0, 1]}, vec_path)
+            assert result.cycles == 2
+            assert result.mismatches[0].port == 'count'
+        
+        assert self.compile_count() == 1
+        assert self.count_lines(self.run_log) == 2
+        assert engine.binary_path.endswith('.vlt')
+        assert not os.path.exists(engine.binary_path + '.obj')
+        with open(self.log) as f:
+            assert '--binary --timing' in f.read()
+        
+        # Backends never share compiled models
+        assert engine.design_hash != self.make_engine().design_hash
+    
+    def test_get_engine_backend_switch(self, monkeypatch):
+        """Test selecting the simulator backend by argument or environment."""
+        monkeypatch.setattr('svapy.engine._ENGINES', {})
+        assert type(get_engine('counter', self.ports_info, [self.design])) is SimulationEngine
+        
+        monkeypatch.setenv('SVAPY_SIM', 'verilator')
+        engine = get_engine('counter', self.ports_info, [self.design])
+        assert isinstance(engine, VerilatorEngine)
+        assert get_engine('counter', self.ports_info, [self.design], simulator='iverilog') is not engine
+        
+        with pytest.raises(ValueError):
+            get_engine('counter', self.ports_info, [self.design], simulator='modelsim')
@@ -0,0 +1,200 @@
+import pytest
+import json
+import os
+import svapy.generate
+from svapy.generate import (
+    discover_sources,
+    generate_tree,
+    load_state,
+    read_manifest,
+    template_hash,
+    template_sources,
+    write_module_files
+)
+from pyverilog.vparser.ast import Input, Output
+
+
+COUNTER_V = """
+module counter (input wire clk, input wire rst_n, output reg [7:0] count);
+endmodule
+"""
+
+PAIR_V = """
+module left (input wire a, output wire y);
+endmodule
+module right (input wire [3:0] b, output wire z);
+endmodule
+"""
+
+
+class TestGenerate:
+    """Test cases for interface/runner generation of whole trees."""
+    
+    @pytest.fixture(autouse=True)
+    def rtl_tree(self, tmp_path, monkeypatch):
+        """Create a small RTL tree and isolate the parse cache."""
+        monkeypatch.setenv('SVAPY_CACHE_DIR', str(tmp_path / 'cache'))
+        self.rtl = tmp_path / 'rtl'
+        (self.rtl / 'sub').mkdir(parents=True)
+        (self.rtl / '.hidden').mkdir()
+        (self.rtl / 'counter.v').write_text(COUNTER_V)
+        (self.rtl / 'sub' / 'pair.sv').write_text(PAIR_V)
+        (self.rtl / '.hidden' / 'skip.v').write_text(COUNTER_V)
+        (self.rtl / 'notes.txt').write_text('not verilog')
+        self.out = str(tmp_path / 'gen')
+    
+    def test_write_module_files(self):
+        """Test writing interface and runner for one module."""
+        ports = {'clk': {'direction': Input, 'width': 1}, 'q': {'direction': Output, 'width': 4}}
+        paths = write_module_files('single', ports, ['single.v'], self.out)
+        
+        assert paths == [os.path.join(self.out, 'single_interface.py'), os.path.join(self.out, 'run_single.py')]
+        with open(paths[0]) as f:
+            assert 'def drive_single(' in f.read()
+    
+    def test_discover_sources(self):
+        """Test finding Verilog files below a directory."""
+        sources = discover_sources(str(self.rtl))
+        assert sources == [str(self.rtl / 'counter.v'), str(self.rtl / 'sub' / 'pair.sv')]
+    
+    def test_read_manifest(self, tmp_path):
+        """Test reading a manifest relative to its location."""
+        manifest = self.rtl / 'files.txt'
+        manifest.write_text("# design files\ncounter.v\n\nsub/pair.sv\n")
+        
+        assert read_manifest(str(manifest)) == [str(self.rtl / 'counter.v'), str(self.rtl / 'sub' / 'pair.sv')]
+    
+    def test_template_hash_is_stable(self):
+        """Test that the template hash only changes with the templates."""
+        assert template_hash() == template_hash()
+        names = {os.path.basename(path) for path in template_sources()}
+        assert {'module_interface.j2', 'core.py', 'ports.py', 'vectors.py', 'strategies.py'} <= names
+    
+    def test_hierarchy_across_files(self):
+        """Test that every file of the tree is a design file of every module."""
+        (self.rtl / 'top.v').write_text("module top (input wire a, output wire y);\n  left u (.a(a), .y(y));\nendmodule\n")
+        sources = discover_sources(str(self.rtl))
+        generate_tree(sources, jobs=1, out_dir=self.out)
+        with open(os.path.join(self.out, 'top_interface.py')) as f:
+            interface = f.read()
+        for source in sources:
+            assert json.dumps(source) in interface
+        
+        # A new file changes the design files of every module
+        (self.rtl / 'extra.v').write_text("module extra (input wire b, output wire z);\nendmodule\n")
+        results = generate_tree(discover_sources(str(self.rtl)), jobs=1, out_dir=self.out)
+        assert not any(r.skipped for r in results)
+    
+    def test_duplicate_modules(self):
+        """Test that a module defined in two files is an error and nothing is written."""
+        (self.rtl / 'copy.v').write_text(COUNTER_V)
+        with pytest.raises(ValueError, match="Module 'counter' is defined in both"):
+            generate_tree(discover_sources(str(self.rtl)), jobs=1, out_dir=self.out)
+        assert not os.path.exists(os.path.join(self.out, 'run_counter.py'))
+    
+    @pytest.mark.parametrize('jobs', [1, 2])
+    def test_generate_tree_incremental(self, jobs):
+        """Test that unchanged files are skipped on the next run."""
+        sources = discover_sources(str(self.rtl))
+        
+        results = generate_tree(sources, jobs=jobs, out_dir=self.out)
+        assert all(r.error is None and not r.skipped for r in results)
+        assert sorted(m for r in results for m in r.modules) == ['counter', 'left', 'right']
+        for module in ('counter', 'left', 'right'):
+            assert os.path.exists(os.path.join(self.out, f'run_{module}.py'))
+        
+        results = generate_tree(sources, jobs=jobs, out_dir=self.out)
+        assert all(r.skipped for r in results)
+        
+        # Touching one source regenerates only that file
+        with open(sources[0], 'a') as f:
+            f.write('// changed\n')
+        results = generate_tree(sources, jobs=jobs, out_dir=self.out)
+        assert [r.skipped for r in results] == [False, True]
+        
+        # Forcing regenerates everything
+        results = generate_tree(sources, jobs=jobs, out_dir=self.out, force=True)
+        assert not any(r.skipped for r in results)
+    
+    def test_template_change_regenerates(self, monkeypatch):
+        """Test that a template change invalidates every file."""
+        sources = discover_sources(str(self.rtl))
+        generate_tree(sources, jobs=1, out_dir=self.out)
+        
+        monkeypatch.setattr(svapy.generate, 'template_hash', lambda: 'changed')
+        results = generate_tree(sources, jobs=1, out_dir=self.out)
+        assert not any(r.skipped for r in results)
+    
+    def test_header_change_regenerates(self):
+        """Test that editing an included header regenerates the files including it."""
+        include_dir = self.rtl.parent / 'include'
+        include_dir.mkdir()
+        (include_dir / 'defs.vh').write_text('`define WIDTH 8\n')
+        (self.rtl / 'counter.v').write_text('`include "defs.vh"\n' + COUNTER_V)
+        sources = discover_sources(str(self.rtl))
+        generate_tree(sources, include=[str(include_dir)], jobs=1, out_dir=self.out)
+        
+        results = generate_tree(sources, include=[str(include_dir)], jobs=1, out_dir=self.out)
+        assert all(r.skipped for r in results)
+        
+        (include_dir / 'defs.vh').write_text('`define WIDTH 16\n')
+        results = generate_tree(sources, include=[str(include_dir)], jobs=1, out_dir=self.out)
+        assert [r.skipped for r in results] == [False, True]
+    
+    def test_runner_settings_regenerate(self):
+        """Test that changed runner settings invalidate every file."""
+        sources = discover_sources(str(self.rtl))
+        generate_tree(sources, jobs=1, out_dir=self.out)
+        
+        settings = {'min_cycles': 1000, 'max_cycles': 5000, 'max_examples': 3}
+        results = generate_tree(sources, jobs=1, out_dir=self.out, runner_settings=settings)
+        assert not any(r.skipped for r in results)
+        with open(os.path.join(self.out, 'run_counter.py')) as f:
+            assert "SVAPY_MAX_CYCLES', 5000" in f.read()
+        
+        results = generate_tree(sources, jobs=1, out_dir=self.out, runner_settings=settings)
+        assert all(r.skipped for r in results)
+    
+    def test_roles_regenerate(self):
+        """Test that port roles reach tree generation and invalidate every file when changed."""
+        sources = discover_sources(str(self.rtl))
+        generate_tree(sources, jobs=1, out_dir=self.out)
+        
+        results = generate_tree(sources, jobs=1, out_dir=self.out, roles={'rst_n': 'data'})
+        assert not any(r.skipped for r in results)
+        with open(os.path.join(self.out, 'counter_interface.py')) as f:
+            assert "'rst_n': {'direction': 'Input', 'width': 1, 'role': 'data'}" in f.read()
+        
+        results = generate_tree(sources, jobs=1, out_dir=self.out, roles={'rst_n': 'data'})
+        assert all(r.skipped for r in results)
+        
+        with pytest.raises(ValueError, match="Unknown port role"):
+            generate_tree(sources, jobs=1, out_dir=self.out, roles={'clk': 'strobe'})
+    
+    def test_deleted_output_regenerates(self):
+        """Test that missing outputs are regenerated even if sources are unchanged."""
+        sources = discover_sources(str(self.rtl))
+        generate_tree(sources, jobs=1, out_dir=self.out)
+        os.remove(os.path.join(self.out, 'run_counter.py'))
+        
+        results = generate_tree(sources, jobs=1, out_dir=self.out)
+        assert [r.skipped for r in results] == [False, True]
+        
+        # The runner imports the interface, so a missing interface regenerates too
+        os.remove(os.path.join(self.out, 'left_interface.py'))
+        results = generate_tree(sources, jobs=1, out_dir=self.out)
+        assert [r.skipped for r in results] == [True, False]
+        assert os.path.exists(os.path.join(self.out, 'left_interface.py'))
+    
+    def test_errors_are_collected(self):
+        """Test that one broken file does not stop the others."""
+        broken = self.rtl / 'broken.v'
+        broken.write_text('module broken (')
+        sources = discover_sources(str(self.rtl))
+        
+        results = generate_tree(sources, jobs=1, out_dir=self.out)
+        by_source = {r.source: r for r in results}
+        
+        assert by_source[str(broken)].error is not None
+        assert by_source[str(self.rtl / 'counter.v')].error is None
+        assert str(broken) not in load_state(self.out)
@@ -0,0 +1,121 @@
+import pytest
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from hypothesis import given, settings
+from svapy import instrument
+from svapy.core import generate_module
+from svapy.instrument import Profiler
+from svapy.strategies import stimulus_strategy
+
+
+class TestInstrument:
+    """Test cases for per-phase profiling."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.ports_info = {
+            'a': {'direction': 'Input', 'width': 8},
+            'y': {'direction': 'Output', 'width': 8},
+        }
+        instrument.disable()
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        instrument.disable()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_profiler(self):
+        """Test phase timers, counters, the summary table and JSON results."""
+        profiler = Profiler()
+        for _ in range(3):
+            with profiler.phase('write'):
+                pass
+        with pytest.raises(RuntimeError):
+            with profiler.phase('simulate'):
+                raise RuntimeError("simulator crashed")
+        profiler.count('bytes_written', 100)
+        profiler.count('bytes_written', 28)
+        
+        assert profiler.phases['write'].calls == 3
+        assert profiler.phases['simulate'].calls == 1
+        assert profiler.counters == {'bytes_written': 128}
+        summary = profiler.summary()
+        assert summary.splitlines()[0].split() == ['phase', 'calls', 'total', 's', 'mean', 'ms', 'max', 'ms', 'share']
+        assert 'bytes_written' in summary and 'wall' in summary
+        
+        path = os.path.join(self.temp_dir, 'profile', 'profile.json')
+        profiler.write(path)
+        with open(path) as f:
+            data = json.load(f)
+        assert set(data['phases']) == {'write', 'simulate'}
+        assert data['phases']['write']['calls'] == 3
+        assert data['counters'] == {'bytes_written': 128}
+        
+        profiler.reset()
+        assert not profiler.phases and not profiler.counters
+    
+    def test_disabled(self, monkeypatch):
+        """Test that module-level hooks do nothing until profiling is enabled."""
+        assert not instrument.enabled()
+        with instrument.phase('draw'):
+            instrument.count('examples')
+        assert instrument.report() is None
+        
+        profiler = instrument.enable(os.path.join(self.temp_dir, 'profile.json'), report_at_exit=False)
+        assert instrument.enable() is profiler
+        with instrument.phase('draw'):
+            instrument.count('examples')
+        assert profiler.phases['draw'].calls == 1 and profiler.counters == {'examples': 1}
+        
+        monkeypatch.setenv('PYTEST_XDIST_WORKER', 'gw3')
+        assert instrument.report_path('build/profile.json') == os.path.join('build', 'profile_gw3.json')
+    
+    def test_runner_phases(self, monkeypatch):
+        """Test that drawing, conversion and testbench writes are recorded."""
+        namespace = {}
+        exec(generate_module('inc', self.ports_info), namespace)
+        drive_inc = namespace['drive_inc']
+        monkeypatch.chdir(self.temp_dir)
+        profiler = instrument.enable(report_at_exit=False)
+        
+        @settings(max_examples=5, database=None)
+        @given(stimulus=stimulus_strategy(self.ports_info, inputs=['a'], outputs=['y'], min_cycles=4, max_cycles=8))
+        def check(stimulus):
+            drive_inc(a_seq=stimulus.array('a'), y_seq=stimulus.array('y'), mode='vectors')
+        
+        check()
+        assert profiler.counters['examples'] >= 5
+        assert profiler.phases['draw'].calls == profiler.counters['examples']
+        assert profiler.phases['convert'].calls == 5
+        # One vector file and one testbench per example
+        assert profiler.phases['write'].calls == 10
+        written = sum(os.path.getsize(os.path.join(directory, name))
+                      for directory in (os.path.join('gen', 'tests'), os.path.join('gen', 'vectors'))
+                      for name in os.listdir(directory))
+        assert profiler.counters['bytes_written'] == written
+    
+    def test_pytest_plugin(self):
+        """Test the pytest options, JSON export and summary section."""
+        test_file = os.path.join(self.temp_dir, 'test_profiled.py')
+        with open(test_file, 'w') as f:
+            f.write('from svapy import instrument\n\n'
+                    'def test_phase():\n'
+                    '    with instrument.phase("simulate"):\n'
+                    '        instrument.count("cycles_simulated", 42)\n')
+        results = os.path.join(self.temp_dir, 'profile.json')
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(instrument.__file__)))
+        env.pop('SVAPY_PROFILE', None)
+        proc = subprocess.run([sys.executable, '-m', 'pytest', '-p', 'svapy.instrument', '--svapy-profile',
+                               '--svapy-profile-file', results, '-q', '-p', 'no:cacheprovider', test_file],
+                              capture_output=True, text=True, cwd=self.temp_dir, env=env)
+        assert proc.returncode == 0, proc.stdout + proc.stderr
+        assert 'svapy profile' in proc.stdout
+        with open(results) as f:
+            data = json.load(f)
+        assert data['phases']['simulate']['calls'] == 1
+        assert data['counters'] == {'cycles_simulated': 42}
@@ -1,6 +1,7 @@
 import pytest
 import tempfile
 import os
+import shutil
 import subprocess
 import sys
 from pathlib import Path
@@ -215,3 +216,115 @@ generate:
         assert 'def test_simple(' in runner_content
         assert 'clk_seq' in interface_content
         assert 'out_seq' in interface_content
+    
+    def test_multiple_modules_single_invocation(self):
+        """Test generating several modules from several files in one run."""
+        with open('blocks.v', 'w') as f:
+            f.write("""
+            module adder (input wire [3:0] a, input wire [3:0] b, output wire [4:0] sum);
+                assign sum = a + b;
+            endmodule
+            module inverter (input wire x, output wire y);
+                assign y = ~x;
+            endmodule
+            """)
+        with open('buffer.v', 'w') as f:
+            f.write("""
+            module buffer (input wire d, output wire q);
+                assign q = d;
+            endmodule
+            """)
+        
+        result = subprocess.run([
+            sys.executable, 'main.py', 'adder,inverter', 'blocks.v'
+        ], capture_output=True, text=True)
+        assert result.returncode == 0
+        assert os.path.exists('gen/adder_interface.py')
+        assert os.path.exists('gen/run_inverter.py')
+        assert not os.path.exists('gen/buffer_interface.py')
+        
+        result = subprocess.run([
+            sys.executable, 'main.py', '--all', 'blocks.v', 'buffer.v'
+        ], capture_output=True, text=True)
+        assert result.returncode == 0
+        for module in ('adder', 'inverter', 'buffer'):
+            assert os.path.exists(f'gen/{module}_interface.py')
+            assert os.path.exists(f'gen/run_{module}.py')
+        
+        result = subprocess.run([
+            sys.executable, 'main.py', 'missing', 'blocks.v'
+        ], capture_output=True, text=True)
+        assert result.returncode == 1
+        assert 'not found' in result.stdout
+    
+    @pytest.mark.skipif(shutil.which('iverilog') is None or shutil.which('vvp') is None,
+                        reason="iverilog not installed")
+    def test_engine_simulation_counter(self):
+        """Test compile-once simulation of the example counter."""
+        from svapy.engine import SimulationEngine
+        from svapy.parser import extract_module_ports
+        
+        design = os.path.join(self.original_cwd, 'example', 'counter.v')
+        ports = extract_module_ports('counter', design)
+        engine = SimulationEngine('counter', ports, [design])
+        
+        result = engine.run_sequences({'clk': [0, 1, 0, 1], 'rst_n': [0, 1, 1, 1], 'count': None}, 'vectors.hex')
+        assert result.passed
+        assert result.cycles == 4
+        
+        result = engine.run_sequences({'clk': [0, 1], 'rst_n': [0, 0], 'count': [5, 5]}, 'vectors.hex')
+        assert not result.passed
+        assert result.mismatches[0].port == 'count'
+    
+    @pytest.mark.skipif(shutil.which('iverilog') is None or shutil.which('vvp') is None,
+                        reason="iverilog not installed")
+    def test_pysim_matches_iverilog(self):
+        """Test that the in-process simulator agrees with iverilog on the examples."""
+        import numpy as np
+        from svapy.engine import SimulationEngine
+        from svapy.parser import extract_module_ports
+        from svapy.pysim import CycleSimulator
+        
+        rng = np.random.default_rng(3)
+        for module in ('counter', 'multiplier_pipe', 'csr'):
+            design = os.path.join(self.original_cwd, 'example', f'{module}.v')
+            ports = extract_module_ports(module, design)
+            engine = SimulationEngine(module, ports, [design])
+            sim = CycleSimulator.from_files(module, [design])
+            
+            inputs = {port: rng.integers(0, 1 << min(ports[port]['width'], 32), 40) for port in sim.inputs}
+            inputs['clk'] = np.tile([0, 1], 20)
+            inputs[sim.inputs[1]] = np.r_[0, np.ones(39, dtype=np.int64)]
+            outputs = sim.run({port: values[None, :] for port, values in inputs.items()})
+            
+            sequences = {port: values.tolist() for port, values in inputs.items()}
+            # Cycle 0 samples the simulator's unknown start state, which pysim reads as 0
+            sequences.update({port: [None] + outputs[port][0, 1:].tolist() for port in sim.outputs})
+            result = engine.run_sequences(sequences, f'{module}.hex')
+            assert result.passed, result.mismatches[:3]
+    
+    def test_tree_generation(self):
+        """Test parallel, incremental generation for a directory of sources."""
+        os.makedirs('rtl')
+        for name in ('first', 'second', 'third'):
+            with open(os.path.join('rtl', f'{name}.v'), 'w') as f:
+                f.write(f"module {name} (input wire clk, output reg [3:0] q);\nendmodule\n")
+        
+        result = subprocess.run([
+            sys.executable, 'main.py', '--tree', 'rtl', '-j', '2'
+        ], capture_output=True, text=True)
+        assert result.returncode == 0
+        assert 'Generated 3 module(s), skipped 0 unchanged' in result.stdout
+        for name in ('first', 'second', 'third'):
+            assert os.path.exists(f'gen/run_{name}.py')
+        
+        result = subprocess.run([
+            sys.executable, 'main.py', '--tree=rtl'
+        ], capture_output=True, text=True)
+        assert result.returncode == 0
+        assert 'Generated 0 module(s), skipped 3 unchanged' in result.stdout
+        
+        # Missing arguments are reported by argparse
+        result = subprocess.run([sys.executable, 'main.py', 'first'], capture_output=True, text=True)
+        assert result.returncode == 2
+        assert 'expected a module name and at least one Verilog file' in result.stderr
@@ -0,0 +1,178 @@
+import pytest
+import asyncio
+import io
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from svapy.orchestrator import (
+    build_commands,
+    discover_testbenches,
+    main,
+    run_testbenches,
+    summarize,
+    top_module
+)
+from svapy.waves import WavePolicy
+
+
+FAKE_IVERILOG = """#!{python}
+import sys
+args = sys.argv[1:]
+if any('broken' in a for a in args):
+    print('syntax error')
+    sys.exit(2)
+with open(args[args.index('-o') + 1], 'w') as f:
+    f.write(args[-1])
+"""
+
+FAKE_VVP = """#!{python}
+import sys, time
+binary = [a for a in sys.argv[1:] if a.endswith('.vvp')][0]
+with open(binary) as f:
+    testbench = f.read()
+dumps = [a.split('=', 1)[1] for a in sys.argv if a.startswith('+dump=')]
+if dumps:
+    with open(dumps[0], 'w') as f:
+        f.write(' '.join(sys.argv[1:]))
+time.sleep(0.4)
+print('cycle 0')
+if 'failing' in testbench:
+    print('ERROR: ' + testbench + ':12: Cycle 0: count mismatch')
+"""
+
+
+def write_script(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+class TestOrchestrator:
+    """Test cases for the concurrent testbench runner."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.tests = os.path.join(self.temp_dir, 'tests')
+        self.build = os.path.join(self.temp_dir, 'build')
+        os.makedirs(self.tests)
+        self.design = os.path.join(self.temp_dir, 'counter.v')
+        open(self.design, 'w').close()
+        
+        self.executables = {
+            'iverilog': os.path.join(self.temp_dir, 'iverilog'),
+            'vvp': os.path.join(self.temp_dir, 'vvp'),
+        }
+        write_script(self.executables['iverilog'], FAKE_IVERILOG.format(python=sys.executable))
+        write_script(self.executables['vvp'], FAKE_VVP.format(python=sys.executable))
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def add_testbench(self, name):
+        path = os.path.join(self.tests, f'{name}.sv')
+        with open(path, 'w') as f:
+            f.write('`timescale 1ns/1ps\n\nmodule counter_tb;\nendmodule\n')
+        return path
+    
+    def run(self, testbenches, **kwargs):
+        return asyncio.run(run_testbenches(testbenches, [self.design], build_dir=self.build,
+                                           **self.executables, **kwargs))
+    
+    def test_discover_testbenches(self):
+        """Test that discovery sees files created after import time."""
+        assert discover_testbenches(self.tests) == []
+        second = self.add_testbench('counter_tb_1')
+        first = self.add_testbench('counter_tb_0')
+        assert discover_testbenches(self.tests) == [first, second]
+    
+    def test_build_commands(self):
+        """Test compile and simulate commands for both backends."""
+        tb = self.add_testbench('counter_tb_0')
+        assert top_module(tb) == 'counter_tb'
+        
+        compile_cmd, run_cmd = build_commands(tb, ['counter.v'], 'bin')
+        assert compile_cmd[:4] == ['iverilog', '-g2012', '-o', os.path.join('bin', 'counter_tb_0.vvp')]
+        assert run_cmd == ['vvp', '-n', os.path.join('bin', 'counter_tb_0.vvp')]
+        
+        compile_cmd, run_cmd = build_commands(tb, ['counter.v'], 'bin', simulator='verilator')
+        assert '--top-module' in compile_cmd and 'counter_tb' in compile_cmd
+        assert run_cmd == [os.path.join('bin', 'counter_tb_0.obj', 'Vcounter_tb')]
+        
+        with pytest.raises(ValueError):
+            build_commands(tb, ['counter.v'], 'bin', simulator='modelsim')
+    
+    def test_concurrent_runs(self):
+        """Test that testbenches run concurrently up to the job limit."""
+        testbenches = [self.add_testbench(f'counter_tb_{i}') for i in range(4)]
+        
+        start = time.perf_counter()
+        results = self.run(testbenches, jobs=4)
+        parallel = time.perf_counter() - start
+        assert all(r.passed for r in results)
+        assert [r.testbench for r in results] == testbenches
+        
+        start = time.perf_counter()
+        self.run(testbenches, jobs=1)
+        serial = time.perf_counter() - start
+        assert parallel < serial * 0.6
+    
+    def test_failures_and_logs(self):
+        """Test that compile errors and $error lines fail a testbench."""
+        testbenches = [self.add_testbench(name) for name in ('broken_tb_0', 'failing_tb_0', 'counter_tb_0')]
+        stream = io.StringIO()
+        broken, failing, passing = self.run(testbenches, stream=stream)
+        
+        assert not broken.passed and len(broken.steps) == 1 and broken.steps[0].returncode == 2
+        assert not failing.passed and failing.errors == 1
+        assert passing.passed
+        assert '[failing_tb_0] ERROR:' in stream.getvalue()
+        with open(failing.log) as f:
+            assert 'count mismatch' in f.read()
+        
+        summary = summarize([broken, failing, passing], 1.0)
+        assert (summary['total'], summary['passed'], summary['failed']) == (3, 1, 2)
+        assert summary['testbenches'][0]['steps'][0]['returncode'] == 2
+    
+    def test_wave_policies(self):
+        """Test that failing testbenches are re-run with dumping."""
+        testbenches = [self.add_testbench(name) for name in ('failing_tb_0', 'counter_tb_0')]
+        failing, passing = self.run(testbenches, waves=WavePolicy('failure', 'fst'))
+        
+        assert not failing.passed and failing.errors == 1
+        assert failing.dump == os.path.join(self.build, 'dump', 'failing_tb_0.fst')
+        with open(failing.dump) as f:
+            assert '-fst +dump=' in f.read()
+        with open(failing.log) as f:
+            assert '# re-run with waveform dumping' in f.read()
+        assert passing.passed and passing.dump == ''
+        assert not os.path.exists(os.path.join(self.build, 'dump', 'counter_tb_0.fst'))
+        
+        results = self.run(testbenches, waves=WavePolicy('none'))
+        assert [r.dump for r in results] == ['', '']
+        
+        results = self.run(testbenches, waves=WavePolicy('all'))
+        assert all(os.path.exists(r.dump) for r in results)
+        assert len(results[0].steps) == 2
+        
+        compile_cmd, _ = build_commands(testbenches[0], ['counter.v'], 'bin', simulator='verilator',
+                                        waves=WavePolicy(format='fst'))
+        assert '--trace-fst' in compile_cmd
+    
+    def test_main_writes_summary(self, monkeypatch, capsys):
+        """Test the command line entry point."""
+        self.add_testbench('counter_tb_0')
+        monkeypatch.setenv('PATH', self.temp_dir + os.pathsep + os.environ['PATH'])
+        summary_path = os.path.join(self.temp_dir, 'summary.json')
+        
+        code = main(['--design', self.design, '--tests', self.tests, '--build', self.build,
+                     '--summary', summary_path, '-j', '2'])
+        assert code == 0
+        assert '[counter_tb_0] cycle 0' in capsys.readouterr().out
+        with open(summary_path) as f:
+            assert json.load(f)['passed'] == 1
@@ -0,0 +1,78 @@
+import pytest
+import tempfile
+import os
+import numpy as np
+from svapy.outputs import load_samples, record_words, sample_layout, sample_ports
+from pyverilog.vparser.ast import Input, Output
+
+
+def write_records(path, records):
+    np.asarray(records, dtype='<u4').tofile(path)
+
+
+class TestOutputs:
+    """Test cases for binary output sample files."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'samples.bin')
+        self.ports_info = {
+            'clk': {'direction': Input, 'width': 1},
+            'count': {'direction': Output, 'width': 8},
+            'wide': {'direction': Output, 'width': 40},
+            'huge': {'direction': Output, 'width': 70}
+        }
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_sample_ports(self):
+        """Test default and explicit port selection."""
+        assert sample_ports(self.ports_info) == ['count', 'wide', 'huge']
+        assert sample_ports(self.ports_info, ['clk']) == ['clk']
+        with pytest.raises(ValueError):
+            sample_ports(self.ports_info, ['missing'])
+    
+    def test_sample_layout(self):
+        """Test word offsets of sampled ports."""
+        layout = sample_layout(self.ports_info)
+        assert layout == [('count', 8, 0, 1), ('wide', 40, 1, 2), ('huge', 70, 3, 3)]
+        assert record_words(layout) == 6
+    
+    def test_load_narrow_ports_as_views(self):
+        """Test that ports up to 32 bits are returned without copying."""
+        write_records(self.path, [[1], [2], [255]])
+        
+        for mmap in (True, False):
+            samples = load_samples(self.path, self.ports_info, ['count'], mmap=mmap)
+            assert samples['count'].tolist() == [1, 2, 255]
+            assert samples['count'].base is not None
+    
+    def test_load_wide_ports(self):
+        """Test reassembly of ports wider than 32 bits."""
+        huge = (1 << 69) | (0xABCDEF << 32) | 7
+        write_records(self.path, [
+            [3, 0x89ABCDEF, 0x12, 7, 0xABCDEF, 0x20],
+            [4, 0, 0, 0, 0, 0],
+        ])
+        samples = load_samples(self.path, self.ports_info)
+        
+        assert samples['count'].tolist() == [3, 4]
+        assert samples['wide'].dtype == np.uint64
+        assert samples['wide'].tolist() == [0x1289ABCDEF, 0]
+        assert samples['huge'].tolist() == [huge, 0]
+    
+    def test_load_truncated_file(self):
+        """Test that a partially written last record is ignored."""
+        write_records(self.path, [[1], [2], [3]])
+        samples = load_samples(self.path, self.ports_info, ['count', 'wide'])
+        assert len(samples['count']) == 1
+    
+    def test_load_empty_file(self):
+        """Test loading a run without cycles."""
+        open(self.path, 'wb').close()
+        samples = load_samples(self.path, self.ports_info)
+        assert len(samples['count']) == 0
@@ -1,13 +1,20 @@
 import pytest
 import tempfile
 import os
-from svapy.parser import extract_module_ports
+import svapy.parser
+from svapy.parser import extract_all_module_ports, extract_module_ports, include_digests, parse_module
 from pyverilog.vparser.ast import Input, Output
 
 
 class TestParser:
     """Test cases for Verilog parser functionality."""
     
+    @pytest.fixture(autouse=True)
+    def isolated_cache(self, tmp_path, monkeypatch):
+        """Keep the persistent parse cache out of the working tree."""
+        monkeypatch.setenv('SVAPY_CACHE_DIR', str(tmp_path / 'cache'))
+        monkeypatch.setattr(svapy.parser, '_PARSE_CACHE', {})
+    
     def test_parse_counter_module(self):
         """Test parsing a simple counter module."""
         verilog_code = """
@@ -151,3 +158,208 @@ class TestParser:
             # This test may need adjustment based on actual implementation
         finally:
             os.unlink(temp_file)
+    
+    def test_parse_cache(self, monkeypatch):
+        """Test that unchanged files are parsed only once."""
+        verilog_code = """
+        module first (input wire clk, output wire [3:0] q);
+        endmodule
+        module second (input wire [7:0] d, output wire y);
+        endmodule
+        """
+        
+        calls = []
+        real_parse = svapy.parser._parse
+        
+        def counting_parse(*args, **kwargs):
+            calls.append(args)
+            return real_parse(*args, **kwargs)
+        
+        monkeypatch.setattr(svapy.parser, '_parse', counting_parse)
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.v', delete=False) as f:
+            f.write(verilog_code)
+            temp_file = f.name
+        
+        try:
+            first = extract_module_ports('first', temp_file)
+            second = extract_module_ports('second', temp_file)
+            assert len(calls) == 1
+            assert first['q']['width'] == 4
+            assert second['d']['width'] == 8
+            
+            # The on-disk cache survives a cleared in-memory cache
+            monkeypatch.setattr(svapy.parser, '_PARSE_CACHE', {})
+            assert extract_module_ports('first', temp_file) == first
+            assert extract_module_ports('first', temp_file)['clk']['direction'] == Input
+            assert len(calls) == 1
+            
+            # Different defines and disabled caching parse again
+            extract_module_ports('first', temp_file, define=['FOO=1'])
+            extract_module_ports('first', temp_file, use_cache=False)
+            assert len(calls) == 3
+            
+            # Changing the file invalidates the cache
+            with open(temp_file, 'a') as f:
+                f.write('// changed\n')
+            extract_module_ports('first', temp_file)
+            assert len(calls) == 4
+        finally:
+            os.unlink(temp_file)
+    
+    def test_included_headers(self, tmp_path, monkeypatch):
+        """Test that editing an included header invalidates the parse cache."""
+        calls = []
+        real_parse = svapy.parser._parse
+        
+        def counting_parse(*args, **kwargs):
+            calls.append(args)
+            return real_parse(*args, **kwargs)
+        
+        monkeypatch.setattr(svapy.parser, '_parse', counting_parse)
+        
+        include_dir = tmp_path / 'include'
+        include_dir.mkdir()
+        (include_dir / 'defs.vh').write_text('`define WIDTH 4\n`include "nested.vh"\n')
+        (include_dir / 'nested.vh').write_text('`define DEPTH 2\n')
+        source = tmp_path / 'top.v'
+        source.write_text('`include "defs.vh"\nmodule top (input wire clk, output wire q);\nendmodule\n')
+        
+        digests = include_digests([str(source)], [str(include_dir)])
+        assert [entry.split(':')[0] for entry in digests] == ['defs.vh', 'nested.vh']
+        assert include_digests([str(source)], []) == ['defs.vh:missing']
+        
+        extract_module_ports('top', str(source), include=[str(include_dir)])
+        extract_module_ports('top', str(source), include=[str(include_dir)])
+        assert len(calls) == 1
+        
+        # Headers are digested through nested includes
+        (include_dir / 'nested.vh').write_text('`define DEPTH 3\n')
+        extract_module_ports('top', str(source), include=[str(include_dir)])
+        assert len(calls) == 2
+        
+        (include_dir / 'defs.vh').write_text('`define WIDTH 8\n`include "nested.vh"\n')
+        extract_module_ports('top', str(source), include=[str(include_dir)])
+        assert len(calls) == 3
+    
+    def test_cached_ports_are_copies(self):
+        """Test that callers cannot corrupt cached port tables."""
+        verilog_code = """
+        module copy_test (input wire clk);
+        endmodule
+        """
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.v', delete=False) as f:
+            f.write(verilog_code)
+            temp_file = f.name
+        
+        try:
+            ports_info = extract_module_ports('copy_test', temp_file)
+            ports_info['clk']['width'] = 99
+            assert extract_module_ports('copy_test', temp_file)['clk']['width'] == 1
+        finally:
+            os.unlink(temp_file)
+    
+    def test_missing_module(self):
+        """Test that a missing module is reported."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.v', delete=False) as f:
+            f.write("module present (input wire clk);\nendmodule\n")
+            temp_file = f.name
+        
+        try:
+            with pytest.raises(RuntimeError, match="not found"):
+                extract_module_ports('absent', temp_file)
+        finally:
+            os.unlink(temp_file)
+    
+    def test_extract_all_module_ports(self, monkeypatch):
+        """Test extracting every module of several files with one parse."""
+        calls = []
+        real_parse = svapy.parser._parse
+        
+        def counting_parse(*args, **kwargs):
+            calls.append(args)
+            return real_parse(*args, **kwargs)
+        
+        monkeypatch.setattr(svapy.parser, '_parse', counting_parse)
+        
+        temp_files = []
+        for code in ("module alpha (input wire clk, output wire [1:0] q);\nendmodule\n"
+                     "module beta (input wire [15:0] d);\nendmodule\n",
+                     "module gamma (output wire y);\nendmodule\n"):
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.v', delete=False) as f:
+                f.write(code)
+                temp_files.append(f.name)
+        
+        try:
+            modules = extract_all_module_ports(temp_files)
+            
+            assert sorted(modules) == ['alpha', 'beta', 'gamma']
+            assert modules['alpha']['q']['width'] == 2
+            assert modules['beta']['d']['width'] == 16
+            assert modules['gamma']['y']['direction'] == Output
+            assert len(calls) == 1
+            
+            assert extract_all_module_ports(temp_files) == modules
+            assert len(calls) == 1
+        finally:
+            for temp_file in temp_files:
+                os.unlink(temp_file)
+    
+    def test_extract_all_missing_file(self):
+        """Test that missing files are reported."""
+        with pytest.raises(FileNotFoundError):
+            extract_all_module_ports(['does_not_exist.v'])
+    
+    def test_parser_is_reused(self):
+        """Test that consecutive parses share one pyverilog parser and report fresh results."""
+        temp_files = []
+        for name in ('reuse_a', 'reuse_b'):
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.v', delete=False) as f:
+                f.write(f"module {name} (input wire [{len(name)}:0] d);\nendmodule\n")
+                temp_files.append(f.name)
+        
+        try:
+            first = extract_module_ports('reuse_a', temp_files[0])
+            parser = svapy.parser._VERILOG_PARSER
+            second = extract_module_ports('reuse_b', temp_files[1])
+            
+            assert parser is not None
+            assert svapy.parser._VERILOG_PARSER is parser
+            assert first['d']['width'] == 8
+            assert second['d']['width'] == 8
+        finally:
+            for temp_file in temp_files:
+                os.unlink(temp_file)
+    
+    def test_port_roles(self):
+        """Test clock and reset roles detected by name or given by the user."""
+        path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'example', 'csr.v')
+        ports_info = extract_module_ports('csr', path)
+        assert ports_info['clk']['role'] == 'clock'
+        assert ports_info['reset_n']['role'] == 'reset_n'
+        assert ports_info['wr_en']['role'] == 'data'
+        assert ports_info['rdata']['role'] == 'data'
+        
+        ports_info = extract_module_ports('csr', path, roles={'reset_n': 'data', 'wr_en': 'reset'})
+        assert ports_info['reset_n']['role'] == 'data'
+        assert ports_info['wr_en']['role'] == 'reset'
+        
+        # Overrides do not leak into the cached port table
+        assert extract_module_ports('csr', path)['wr_en']['role'] == 'data'
+    
+    def test_parse_module(self):
+        """Test returning the AST of one module."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.v', delete=False) as f:
+            f.write("module first (input wire a);\nendmodule\nmodule second (output wire y);\nendmodule\n")
+            temp_file = f.name
+        
+        try:
+            module = parse_module('second', temp_file)
+            assert module.name == 'second'
+            with pytest.raises(RuntimeError, match="not found"):
+                parse_module('third', [temp_file])
+            with pytest.raises(FileNotFoundError):
+                parse_module('first', 'does_not_exist.v')
+        finally:
+            os.unlink(temp_file)
@@ -0,0 +1,184 @@
+import pytest
+import tempfile
+import os
+import shutil
+import numpy as np
+from svapy.clocking import clocked_sequences
+from svapy.core import generate_module, generate_vector_testbench
+from svapy.pysim import CycleSimulator
+from svapy.properties import (
+    Expr,
+    Property,
+    Violation,
+    all_of,
+    checker_code,
+    evaluate,
+    evaluation_mask,
+    find_violations,
+    implies,
+    next_cycle,
+    past,
+    rose,
+    sig,
+    stable_until
+)
+
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'example')
+
+
+class TestProperties:
+    """Test cases for the property DSL and its two evaluators."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.ports_info = {
+            'clk': {'direction': 'Input', 'width': 1},
+            'rst_n': {'direction': 'Input', 'width': 1},
+            'count': {'direction': 'Output', 'width': 8}
+        }
+        self.handshake = {
+            'req': {'direction': 'Input', 'width': 1},
+            'ack': {'direction': 'Output', 'width': 1},
+            'data': {'direction': 'Output', 'width': 16}
+        }
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_compile(self):
+        """Test that next_cycle is compiled into a delayed check over past values."""
+        prop = Property('ack_after_req', implies(sig('req'), next_cycle(sig('ack'))))
+        assert prop.ports() == ['ack', 'req']
+        assert prop.depth == 1
+        assert prop.to_sv() == '((!svapy_past1_req) || ack)'
+        
+        assert Property('nibble', sig('data')[7:4] != 15).to_sv() == "(data[7:4] != 4'd15)"
+        assert Property('bit', past(sig('data')[0], 2) == 1).to_sv() == "(svapy_past2_data[0] == 1'd1)"
+        
+        with pytest.raises(TypeError):
+            bool(sig('req') == 1)
+        with pytest.raises(ValueError):
+            Property('bad name', sig('req'))
+        with pytest.raises(ValueError):
+            sig('data')[3:4]
+        with pytest.raises(TypeError):
+            Expr()
+    
+    def test_evaluate(self):
+        """Test vectorized evaluation, reporting at the latest point looked at."""
+        prop = Property('ack_after_req', implies(sig('req'), next_cycle(sig('ack'))))
+        values = {'req': np.array([1, 0, 1, 0, 0]), 'ack': np.array([0, 1, 0, 0, 1])}
+        assert evaluate(prop, values).tolist() == [False, False, False, True, False]
+        
+        # A leading axis holds independent examples
+        batch = {port: np.stack([array, array ^ 1]) for port, array in values.items()}
+        assert evaluate(prop, batch).tolist() == [[False, False, False, True, False],
+                                                  [False, False, False, False, True]]
+        
+        # Only evaluation points count as cycles
+        mask = np.array([True, False, True, True, False])
+        assert evaluate(prop, values, mask).tolist() == [False, False, True, True, False]
+    
+    def test_temporal_operators(self):
+        """Test stable_until and rose."""
+        held = Property('data_held', stable_until(sig('data'), sig('ack'), when=sig('req')))
+        values = {
+            'req': np.array([1, 1, 1, 0, 0, 1, 1]),
+            'ack': np.array([0, 0, 1, 0, 0, 0, 0]),
+            'data': np.array([5, 5, 5, 6, 7, 7, 8], dtype=np.uint16),
+        }
+        assert np.flatnonzero(evaluate(held, values)).tolist() == [6]
+        
+        edges = Property('rising', implies(rose(sig('req')), sig('ack') == 0))
+        assert np.flatnonzero(evaluate(edges, values)).tolist() == []
+        
+        wide = Property('wide', sig('data')[15:8] == 0)
+        big = {'data': np.array([1 << 65, 3], dtype=object)}
+        ports = {'data': {'direction': 'Output', 'width': 80}}
+        assert checker_code([wide], ports)
+        assert evaluate(Property('top', sig('data')[65] == 0), big).tolist() == [True, False]
+        assert evaluate(wide, {'data': np.array([0x1ff, 0xff], dtype=np.uint16)}).tolist() == [True, False]
+    
+    def test_checker_code(self):
+        """Test the history registers and the check task."""
+        props = [
+            Property('small', sig('count') < 200),
+            Property('steady', implies(all_of(sig('rst_n'), past(sig('count'), 2) == 3), sig('count') != 0)),
+        ]
+        code = '\n'.join(checker_code(props, self.ports_info))
+        assert 'logic [7:0] svapy_past1_count;' in code
+        assert 'logic [7:0] svapy_past2_count;' in code
+        assert 'task svapy_check_properties;' in code
+        assert "if (!(count < 8'd200)) begin" in code
+        assert 'if (svapy_points >= 2 && !' in code
+        assert '$display("SVAPY_PROPERTY name=steady cycle=%0d", cycle);' in code
+        assert code.index('svapy_past2_count = svapy_past1_count;') < code.index('svapy_past1_count = count;')
+        
+        assert checker_code([], self.ports_info) == []
+        with pytest.raises(ValueError, match='unknown port'):
+            checker_code([Property('ghost', sig('missing') == 0)], self.ports_info)
+    
+    def test_evaluation_mask(self):
+        """Test that clocked modules are checked on falling edges with reset released."""
+        stimulus = clocked_sequences(self.ports_info, {'count': [1, 2, 3]}, 3, 2)
+        values = {port: stimulus.array(port) for port in ('clk', 'rst_n')}
+        mask = evaluation_mask(self.ports_info, values, stimulus.cycles)
+        assert np.flatnonzero(mask).tolist() == [4, 6, 8, 10]
+        assert evaluation_mask(self.handshake, {'req': np.zeros(4)}, 4).all()
+    
+    def test_find_violations(self):
+        """Test step ordering and stopping at the first violating step."""
+        props = [Property('low', sig('data') < 8), Property('even', (sig('data') & 1) == 0)]
+        values = {'data': np.array([2, 9, 3, 10], dtype=np.uint16)}
+        assert find_violations(props, values) == [Violation('low', 1), Violation('even', 1)]
+        assert find_violations(props, values, stop_at_first=False) == [
+            Violation('low', 1), Violation('even', 1), Violation('even', 2), Violation('low', 3)]
+    
+    def test_pysim(self):
+        """Test that pysim runs stop at the first violation like the testbench."""
+        sim = CycleSimulator.from_files('counter', [os.path.join(EXAMPLE_DIR, 'counter.v')])
+        stimulus = clocked_sequences(self.ports_info, {'count': list(range(1, 11))}, 10, 2)
+        assert sim.run_sequences(stimulus).passed
+        
+        props = [
+            Property('small', sig('count') < 5),
+            Property('skip', implies(sig('count') == 3, next_cycle(sig('count')) == 5)),
+        ]
+        result = sim.run_sequences(stimulus, properties=props)
+        assert result.violations == [Violation('skip', 12)]
+        assert result.errors == 1
+        assert result.cycles == 13
+        assert not result.passed
+        
+        with pytest.raises(ValueError):
+            sim.run_sequences(stimulus, properties=[Property('ghost', sig('missing') == 0)])
+    
+    def test_testbenches(self):
+        """Test that generated testbenches call the checker."""
+        props = [Property('small', sig('count') < 5)]
+        tb = generate_vector_testbench('counter', self.ports_info, properties=props)
+        assert 'task svapy_check_properties;' in tb
+        assert 'keep_going = $test$plusargs("keep_going");' in tb
+        assert "if (clk == 1'b0 && svapy_clock_prev == 1'b1 && rst_n == 1'b1) svapy_check_properties;" in tb
+        assert 'if (!keep_going) running = 0;' in tb
+        assert "if (rst_n == 1'b0) svapy_points = 0;" in tb
+        assert 'svapy_check_properties' not in generate_vector_testbench('counter', self.ports_info)
+        
+        namespace = {}
+        exec(generate_module('counter', self.ports_info), namespace)
+        assert namespace['PROPERTIES'] == []
+        namespace['PROPERTIES'] = props
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            namespace['drive_counter'](count_seq=[1, 2, 3], mode='unrolled')
+            test_dir = os.path.join('gen', 'tests')
+            with open(os.path.join(test_dir, os.listdir(test_dir)[0])) as f:
+                unrolled = f.read()
+        finally:
+            os.chdir(cwd)
+        assert 'task svapy_check_properties;' in unrolled
+        assert unrolled.count('if (svapy_violations != 0) $finish;') == 3
@@ -0,0 +1,192 @@
+import pytest
+import tempfile
+import os
+import numpy as np
+from svapy.pysim import CycleSimulator, parse_int_const
+from ref_model.ref_counter import reference_counter_batch
+from ref_model.ref_multiplier import reference_multiplier_batch
+
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'example')
+
+OPERATORS = """
+module ops (
+    input [7:0] a,
+    input [7:0] b,
+    input [1:0] sel,
+    output reg [7:0] y,
+    output [13:0] cat,
+    output [3:0] flags
+);
+    parameter SHIFT = 2;
+    wire [7:0] sum = a + b;
+
+    assign cat = {a[3:0], b[7:4], 2'b10, {3{sel[0]}}, ^a};
+    assign flags = {&a, |b, a == b, a > b};
+
+    always @(*) begin
+        case (sel)
+            2'd0: y = sum;
+            2'd1: y = a - b;
+            2'd2: y = (a << SHIFT) | (b >> 1);
+            default: y = ~a;
+        endcase
+    end
+endmodule
+"""
+
+
+class TestPysim:
+    """Test cases for the in-process cycle simulator."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.rng = np.random.default_rng(7)
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def write_design(self, source):
+        path = os.path.join(self.temp_dir, 'design.v')
+        with open(path, 'w') as f:
+            f.write(source)
+        return path
+    
+    def clock(self, examples, cycles):
+        return np.tile([0, 1], (examples, cycles // 2))
+    
+    def test_parse_int_const(self):
+        """Test parsing of Verilog literals."""
+        assert parse_int_const('42') == (42, None)
+        assert parse_int_const("8'hFF") == (255, 8)
+        assert parse_int_const("32'h0001_0002") == (0x10002, 32)
+        assert parse_int_const("4'b1x01") == (9, 4)
+        assert parse_int_const("'d7") == (7, None)
+    
+    def test_counter_matches_reference(self):
+        """Test the example counter against its batch reference model."""
+        sim = CycleSimulator.from_files('counter', [os.path.join(EXAMPLE_DIR, 'counter.v')])
+        assert sim.inputs == ['clk', 'rst_n']
+        assert sim.outputs == ['count']
+        
+        clk = self.clock(300, 64)
+        rst_n = (self.rng.random(clk.shape) < 0.95).astype(np.int64)
+        count = sim.run({'clk': clk, 'rst_n': rst_n})['count']
+        assert count.shape == (300, 64)
+        assert np.array_equal(count, reference_counter_batch(clk, rst_n) & 0xFF)
+    
+    def test_multiplier_matches_reference(self):
+        """Test the example multiplier against its batch reference model."""
+        sim = CycleSimulator.from_files('multiplier_pipe', [os.path.join(EXAMPLE_DIR, 'multiplier_pipe.v')])
+        clk = self.clock(300, 64)
+        inputs = {
+            'clk': clk,
+            'rst_n': (self.rng.random(clk.shape) < 0.95).astype(np.int64),
+            'valid_in': self.rng.integers(0, 2, clk.shape),
+            'data_in': self.rng.integers(0, 256, clk.shape),
+        }
+        outputs = sim.run(inputs)
+        valid_out, data_out = reference_multiplier_batch(*inputs.values())
+        
+        # The reference model reports registers after each cycle, the simulator samples before it
+        assert np.array_equal(outputs['valid_out'][:, 1:], valid_out[:, :-1])
+        assert np.array_equal(outputs['data_out'][:, 1:], data_out[:, :-1])
+    
+    def test_csr_state_machine(self):
+        """Test register writes, the state machine and reads of the example CSR block."""
+        sim = CycleSimulator.from_files('csr', [os.path.join(EXAMPLE_DIR, 'csr.v')])
+        operations = [
+            {'reset_n': 0},
+            {'wr_en': 1, 'addr': 0x08, 'wdata': 2},
+            {'wr_en': 1, 'addr': 0x00, 'wdata': 1},
+            {}, {}, {}, {},
+            {'rd_en': 1, 'addr': 0xFC},
+            {'rd_en': 1, 'addr': 0x08},
+            {'rd_en': 1, 'addr': 0x03},
+        ]
+        inputs = {port: [] for port in ('clk', 'reset_n', 'addr', 'wdata', 'wr_en', 'rd_en')}
+        for operation in operations:
+            for clk in (0, 1):
+                values = {'clk': clk, 'reset_n': 1, 'addr': 0, 'wdata': 0, 'wr_en': 0, 'rd_en': 0}
+                values.update(operation)
+                values['clk'] = clk
+                for port in inputs:
+                    inputs[port].append(values[port])
+        
+        trace = sim.run(inputs, signals=['rdata', 'state', 'counter'])
+        assert trace['state'][0, 1] == 0b0001
+        assert 0b0010 in trace['state'][0] and 0b0100 in trace['state'][0]
+        assert trace['counter'][0].max() == 3
+        assert trace['rdata'][0, -5] == 0x00010002
+        assert trace['rdata'][0, -3] == 2
+        assert trace['rdata'][0, -1] == 0xDEADBEEF
+    
+    def test_operators(self):
+        """Test expressions, part selects, concatenation and case statements."""
+        sim = CycleSimulator.from_files('ops', [self.write_design(OPERATORS)])
+        a = self.rng.integers(0, 256, (1, 200))
+        b = self.rng.integers(0, 256, (1, 200))
+        sel = self.rng.integers(0, 4, (1, 200))
+        outputs = sim.run({'a': a, 'b': b, 'sel': sel})
+        
+        # Outputs are sampled one cycle after the inputs are applied
+        for i in range(199):
+            x, z, s = int(a[0, i]), int(b[0, i]), int(sel[0, i])
+            expected_y = [(x + z) & 0xFF, (x - z) & 0xFF, ((x << 2) | (z >> 1)) & 0xFF, ~x & 0xFF][s]
+            parity = bin(x).count('1') & 1
+            expected_cat = ((x & 0xF) << 10) | ((z >> 4) << 6) | (0b10 << 4) | ((0b111 if s & 1 else 0) << 1) | parity
+            expected_flags = (int(x == 0xFF) << 3) | (int(z != 0) << 2) | (int(x == z) << 1) | int(x > z)
+            assert outputs['y'][0, i + 1] == expected_y
+            assert outputs['cat'][0, i + 1] == expected_cat
+            assert outputs['flags'][0, i + 1] == expected_flags
+    
+    def test_run_sequences(self):
+        """Test checking expected outputs like the vector testbench."""
+        sim = CycleSimulator.from_files('counter', [os.path.join(EXAMPLE_DIR, 'counter.v')])
+        
+        result = sim.run_sequences({'clk': [0, 1, 0, 1], 'rst_n': [0, 1, 1, 1], 'count': [0, 0, 1, None]})
+        assert result.passed
+        assert result.cycles == 4
+        
+        result = sim.run_sequences({'clk': [0, 1], 'rst_n': [0, 0], 'count': [5, 0]})
+        assert not result.passed
+        assert result.errors == 1
+        assert (result.mismatches[0].cycle, result.mismatches[0].expected) == (0, '5')
+    
+    def test_step_keeps_missing_inputs(self):
+        """Test that inputs not given to step keep their value."""
+        sim = CycleSimulator.from_files('counter', [os.path.join(EXAMPLE_DIR, 'counter.v')])
+        sim.reset(2)
+        sim.step({'clk': [1, 0], 'rst_n': 1})
+        sim.step({'clk': 0})
+        sim.step({'clk': 1})
+        assert sim.values['count'].tolist() == [2, 1]
+        with pytest.raises(ValueError):
+            sim.step({'count': 1})
+    
+    def test_unsupported_constructs(self):
+        """Test that constructs outside the subset are rejected."""
+        path = self.write_design("""
+module mem (input clk, input [1:0] a, output [7:0] q);
+    reg [7:0] m [0:3];
+    assign q = m[a];
+endmodule
+""")
+        with pytest.raises(RuntimeError, match="Unsupported construct"):
+            CycleSimulator.from_files('mem', [path])
+        
+        path = self.write_design("module wide (input [127:0] a, output [127:0] y);\n    assign y = a;\nendmodule\n")
+        with pytest.raises(RuntimeError, match="wider than 64 bits"):
+            CycleSimulator.from_files('wide', [path])
+        
+        # casex is a CaseStatement subclass, but its wildcards are not supported
+        path = self.write_design("""
+module wild (input [1:0] a, output reg y);
+    always @(*) casex (a) 2'b1x: y = 1; default: y = 0; endcase
+endmodule
+""")
+        with pytest.raises(RuntimeError, match="Unsupported construct: CasexStatement"):
+            CycleSimulator.from_files('wild', [path])
@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+from svapy.refmodel import as_batch, batch_model, hold, last_index, previous
+from ref_model.ref_counter import reference_counter, reference_counter_batch
+from ref_model.ref_multiplier import reference_multiplier, reference_multiplier_batch
+
+
+class TestRefModel:
+    """Test cases for batch reference models."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.rng = np.random.default_rng(1234)
+    
+    def random_bits(self, examples=200, cycles=64, p=0.5):
+        return (self.rng.random((examples, cycles)) < p).astype(np.int64)
+    
+    def test_as_batch(self):
+        """Test promotion of single sequences and shape checks."""
+        clk, rst_n = as_batch([0, 1, 0], [[1, 1, 1]])
+        assert clk.shape == rst_n.shape == (1, 3)
+        with pytest.raises(ValueError):
+            as_batch([[0, 1]], [[0, 1, 0]])
+        with pytest.raises(ValueError):
+            as_batch(np.zeros((2, 2, 2)))
+    
+    def test_previous(self):
+        """Test shifting sequences by one cycle."""
+        values = np.array([[1, 2, 3], [4, 5, 6]])
+        assert previous(values).tolist() == [[0, 1, 2], [0, 4, 5]]
+        assert previous(values, fill=9).tolist() == [[9, 1, 2], [9, 4, 5]]
+    
+    def test_hold(self):
+        """Test register loading and holding."""
+        values = np.array([[5, 6, 7, 8]])
+        load = np.array([[False, True, False, True]])
+        assert last_index(load).tolist() == [[-1, 1, 1, 3]]
+        assert hold(values, load, initial=1).tolist() == [[1, 6, 6, 8]]
+    
+    def test_batch_model_adapter(self):
+        """Test lifting scalar models into batch form."""
+        counter = batch_model(reference_counter)
+        clk, rst_n = self.random_bits(5, 10), self.random_bits(5, 10, p=0.8)
+        count = counter(clk, rst_n)
+        assert count.shape == (5, 10)
+        assert count[2].tolist() == reference_counter(clk[2].tolist(), rst_n[2].tolist())
+        
+        multiplier = batch_model(reference_multiplier)
+        valid, data = multiplier(clk, rst_n, clk, clk * 200)
+        assert valid.shape == data.shape == (5, 10)
+        assert counter.__name__ == 'reference_counter_batch'
+    
+    def test_counter_matches_scalar(self):
+        """Test the vectorized counter against the scalar model."""
+        clk, rst_n = self.random_bits(), self.random_bits(p=0.9)
+        expected = batch_model(reference_counter)(clk, rst_n)
+        assert np.array_equal(reference_counter_batch(clk, rst_n), expected)
+        assert reference_counter_batch([1, 1, 1, 1], [1, 1, 0, 1]).tolist() == [[0, 1, 2, 0]]
+    
+    def test_multiplier_matches_scalar(self):
+        """Test the vectorized multiplier against the scalar model."""
+        clk = np.tile([0, 1], (200, 32))
+        clk[::3] = self.random_bits(len(clk[::3]))
+        rst_n = self.random_bits(p=0.9)
+        valid_in = self.random_bits()
+        data_in = self.rng.integers(0, 256, size=clk.shape, dtype=np.uint8)
+        
+        expected_valid, expected_data = batch_model(reference_multiplier)(clk, rst_n, valid_in, data_in)
+        valid_out, data_out = reference_multiplier_batch(clk, rst_n, valid_in, data_in)
+        assert np.array_equal(valid_out, expected_valid)
+        assert np.array_equal(data_out, expected_data)
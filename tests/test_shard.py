@@ -0,0 +1,139 @@
+import pytest
+import tempfile
+import os
+import json
+import shutil
+import subprocess
+import sys
+from svapy.coverage import Coverage
+from svapy.shard import ShardResult, falsifying_examples, merge_reports, shard_env, split_budget, write_report
+
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FAILING_TEST = '''
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from svapy.shard import example_database
+
+@settings(database=example_database(), deadline=None)
+@given(x=st.integers(min_value=0, max_value=1000))
+def test_small(x):
+    assert x < 100
+
+@given(x=st.integers())
+def test_any(x):
+    pass
+'''
+
+
+class TestShard:
+    """Test cases for sharded Hypothesis runs."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def shard(self, index, data):
+        path = os.path.join(self.temp_dir, f'shard{index}.json')
+        if data is not None:
+            write_report(data, path)
+        return ShardResult(index, 100 + index, 50, [], '', path)
+    
+    def test_split_budget(self):
+        """Test that budgets are split evenly without empty shards."""
+        assert split_budget(10, 3) == [4, 3, 3]
+        assert split_budget(8, 4) == [2, 2, 2, 2]
+        assert split_budget(2, 8) == [1, 1]
+        with pytest.raises(ValueError):
+            split_budget(0, 4)
+    
+    def test_falsifying_examples(self):
+        """Test extracting shrunk examples from both Hypothesis report formats."""
+        new = 'E       Failing test case: test_small(\nE           x=100,\nE       )\n'
+        assert falsifying_examples(new) == ['test_small(\n    x=100,\n)']
+        old = 'Falsifying example: test_small(\n    x=100,\n)\nother text'
+        assert falsifying_examples(old) == ['test_small(\n    x=100,\n)']
+        assert falsifying_examples('Falsifying example: test_empty()') == ['test_empty()']
+        nested = 'E           Failing test case: test_x(\nE               x=1,  # or any other generated value\nE           )'
+        assert falsifying_examples(nested) == ['test_x(\n    x=1,  # or any other generated value\n)']
+        assert falsifying_examples('AssertionError') == []
+    
+    def test_shard_env(self):
+        """Test the per-shard budget, database and profile file."""
+        env = shard_env(2, 125, '/db', '/r.json', {'SVAPY_PROFILE_FILE': 'out/p.json'})
+        assert env['SVAPY_MAX_EXAMPLES'] == '125'
+        assert env['SVAPY_HYPOTHESIS_DB'] == '/db'
+        assert env['SVAPY_SHARD'] == '2'
+        assert env['SVAPY_PROFILE_FILE'] == 'out/p_shard2.json'
+    
+    def test_merge_reports(self):
+        """Test merging outcomes, examples, counts and coverage."""
+        failure = 'Falsifying example: test_a(\n    x=1,\n)'
+        results = [
+            self.shard(0, {'tests': [
+                {'nodeid': 't::test_a', 'outcome': 'failed', 'duration': 1.0, 'failure': failure,
+                 'examples': {'passing': 3, 'failing': 2, 'invalid': 0},
+                 'falsifying_examples': falsifying_examples(failure)},
+                {'nodeid': 't::test_b', 'outcome': 'passed', 'duration': 0.5,
+                 'examples': {'passing': 50, 'failing': 0, 'invalid': 1}, 'falsifying_examples': []},
+            ], 'coverage': Coverage(toggles={'a': (1, 0)}).to_dict()}),
+            self.shard(1, {'tests': [
+                {'nodeid': 't::test_a', 'outcome': 'failed', 'duration': 2.0, 'failure': failure,
+                 'examples': {'passing': 0, 'failing': 1, 'invalid': 0},
+                 'falsifying_examples': falsifying_examples(failure)},
+                {'nodeid': 't::test_b', 'outcome': 'passed', 'duration': 0.5,
+                 'examples': {'passing': 50, 'failing': 0, 'invalid': 0}, 'falsifying_examples': []},
+            ], 'coverage': Coverage(toggles={'a': (0, 1)}, states={'s': {2}}).to_dict()}),
+        ]
+        report = merge_reports(results, 4.0)
+        assert not report['passed']
+        assert report['failed'] == ['t::test_a']
+        test_a = report['tests']['t::test_a']
+        assert test_a['failed_shards'] == [0, 1]
+        assert test_a['falsifying_examples'] == ['test_a(\n    x=1,\n)']
+        assert test_a['duration'] == 3.0
+        assert report['tests']['t::test_b']['examples'] == {'passing': 100, 'failing': 0, 'invalid': 1}
+        assert report['examples'] == 107
+        assert report['max_examples'] == 100
+        assert Coverage.from_dict(report['coverage']).bins == 3
+        
+        # A shard without a report failed as a whole
+        report = merge_reports([results[0], self.shard(2, None)])
+        assert [shard['completed'] for shard in report['shards']] == [True, False]
+        assert not report['passed']
+    
+    def test_run(self):
+        """Test that shards find, shrink and share a failure."""
+        with open(os.path.join(self.temp_dir, 'test_sharded.py'), 'w') as f:
+            f.write(FAILING_TEST)
+        env = dict(os.environ, PYTHONPATH=PACKAGE_DIR)
+        command = [sys.executable, '-m', 'svapy.shard', 'test_sharded.py', '-n', '2', '--max-examples', '200', '--quiet']
+        
+        proc = subprocess.run(command, capture_output=True, text=True, cwd=self.temp_dir, env=env)
+        assert proc.returncode == 1, proc.stdout + proc.stderr
+        assert 'FAILED test_sharded.py::test_small' in proc.stdout
+        with open(os.path.join(self.temp_dir, 'build', 'shard-report.json')) as f:
+            report = json.load(f)
+        assert report['failed'] == ['test_sharded.py::test_small']
+        assert report['tests']['test_sharded.py::test_small']['falsifying_examples'] == ['test_small(\n    x=100,\n)']
+        assert report['tests']['test_sharded.py::test_any']['outcome'] == 'passed'
+        assert os.listdir(os.path.join(self.temp_dir, 'build', 'hypothesis'))
+        
+        # Both shards of the next run replay the failure from the shared database
+        proc = subprocess.run(command, capture_output=True, text=True, cwd=self.temp_dir, env=env)
+        with open(os.path.join(self.temp_dir, 'build', 'shard-report.json')) as f:
+            report = json.load(f)
+        assert report['tests']['test_sharded.py::test_small']['failed_shards'] == [0, 1]
+        
+        # Seeded shards are reproducible
+        proc = subprocess.run(command + ['--seed', '7'], capture_output=True, text=True, cwd=self.temp_dir, env=env)
+        assert '(seed 7)' in proc.stdout
+        with open(os.path.join(self.temp_dir, 'build', 'shard-report.json')) as f:
+            report = json.load(f)
+        assert [shard['seed'] for shard in report['shards']] == [7, 8]
+        assert report['failed'] == ['test_sharded.py::test_small']
@@ -0,0 +1,116 @@
+import pytest
+import numpy as np
+from collections.abc import Mapping
+from svapy.ports import PortInfo, port_table
+from svapy.stimulus import Stimulus, hex_lines, port_dtype, to_array
+from svapy.vectors import vector_layout
+
+
+def pack_reference(ports_info, sequences, num_cycles):
+    """Per-cycle Python packing, as done before stimulus arrays."""
+    lines = []
+    layout = vector_layout(ports_info)
+    digits = (sum(width for _, _, width, _ in layout) + 3) // 4
+    for cycle in range(num_cycles):
+        word = 0
+        for port, kind, width, lsb in layout:
+            seq = sequences.get(port)
+            if seq is None:
+                continue
+            item = seq[cycle]
+            if kind == 'check':
+                value = int(item is not None)
+            else:
+                value = 0 if item is None else int(item)
+            word |= (value & ((1 << width) - 1)) << lsb
+        lines.append(format(word, f'0{digits}x'))
+    return lines
+
+
+class TestStimulus:
+    """Test cases for port tables and array-backed stimulus."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.ports_info = {
+            'clk': {'direction': 'Input', 'width': 1},
+            'data': {'direction': 'Input', 'width': 12},
+            'wide': {'direction': 'Input', 'width': 100},
+            'result': {'direction': 'Output', 'width': 8},
+        }
+    
+    def test_port_info(self):
+        """Test that PortInfo still reads like a port dictionary."""
+        ports = port_table(self.ports_info)
+        info = ports['data']
+        assert isinstance(info, PortInfo) and isinstance(info, Mapping)
+        assert info['width'] == 12 and info.is_input and not info.is_output
+        assert 'role' not in info
+        assert info.get('role', 'none') == 'none'
+        with pytest.raises(KeyError):
+            info['role']
+        
+        info['role'] = 'data'
+        assert dict(info) == {'direction': 'Input', 'width': 12, 'role': 'data'}
+        assert len(info) == 3 and list(info.items())[-1] == ('role', 'data')
+        with pytest.raises(KeyError):
+            info['name'] = 'data'
+        
+        # port_table copies its input
+        assert port_table(ports)['data'] is not info
+    
+    def test_dtypes(self):
+        """Test that ports get the smallest dtype that fits."""
+        assert [port_dtype(w) for w in (1, 8, 9, 16, 32, 33, 64)] == [
+            np.uint8, np.uint8, np.uint16, np.uint16, np.uint32, np.uint64, np.uint64]
+        assert port_dtype(65) == object
+        
+        values = np.arange(4, dtype=np.uint16)
+        assert to_array(values, 12) is values
+        assert to_array([True, False], 1).tolist() == [1, 0]
+        assert to_array([-1, 256], 8).tolist() == [255, 0]
+        assert to_array([1 << 99], 100)[0] == 1 << 99
+    
+    def test_trim_and_mapping(self):
+        """Test that trimming returns views and the mapping keeps the legacy form."""
+        stimulus = Stimulus.from_sequences(self.ports_info, {
+            'clk': [0, 1, 0, 1], 'data': [1, 2, 3, 4], 'result': [7, None, 9, None], 'wide': None})
+        assert Stimulus.from_sequences(self.ports_info, stimulus) is stimulus
+        assert stimulus.cycles == 4
+        assert stimulus.array('data').dtype == np.uint16
+        
+        trimmed = stimulus.trim(3)
+        assert trimmed.cycles == 3
+        assert np.shares_memory(trimmed.array('data'), stimulus.array('data'))
+        assert trimmed['result'] == [7, None, 9]
+        assert trimmed['wide'] is None
+        assert set(trimmed) == {'clk', 'data', 'result', 'wide'}
+        assert trimmed.check('result').tolist() == [True, False, True]
+    
+    def test_hex_literals(self):
+        """Test bulk conversion into Verilog literal digits."""
+        stimulus = Stimulus.from_sequences(self.ports_info, {
+            'data': [0, 0xabc], 'wide': [1 << 99, 5], 'result': [None, 0x3f]})
+        assert stimulus.hex_literals('data') == ['000', 'abc']
+        assert stimulus.hex_literals('wide') == ['8' + '0' * 24, '0' * 24 + '5']
+        assert stimulus.hex_literals('result') == [None, '3f']
+        assert hex_lines(np.zeros((0, 1), dtype=np.uint64), 4) == b''
+    
+    def test_vector_hex(self):
+        """Test that bulk packing matches per-cycle packing."""
+        rng = np.random.default_rng(0)
+        sequences = {
+            'clk': rng.integers(0, 2, 200).tolist(),
+            'data': rng.integers(0, 1 << 12, 200).tolist(),
+            'wide': [int(rng.integers(0, 1 << 62)) << 38 | 0x2a for _ in range(200)],
+            'result': [None if v < 64 else int(v) for v in rng.integers(0, 256, 200)],
+        }
+        stimulus = Stimulus.from_sequences(self.ports_info, sequences)
+        layout = vector_layout(self.ports_info)
+        assert stimulus.vector_hex(layout).decode().split() == pack_reference(self.ports_info, sequences, 200)
+        assert stimulus.vector_words(layout).shape == (200, 2)
+        
+        # Ports without a sequence pack as zero
+        sequences['wide'] = None
+        stimulus = Stimulus.from_sequences(self.ports_info, sequences).trim(50)
+        assert stimulus.vector_hex(layout).decode().split() == pack_reference(self.ports_info, sequences, 50)
@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+from hypothesis import given, settings, HealthCheck
+from svapy.strategies import MAX_DRAW_BYTES, decode_frames, frame_layout, stimulus_strategy
+
+
+PORTS = {
+    'valid': {'direction': 'Input', 'width': 1},
+    'data': {'direction': 'Input', 'width': 12},
+    'wide': {'direction': 'Input', 'width': 100},
+    'result': {'direction': 'Output', 'width': 8},
+}
+
+
+class TestStrategies:
+    """Test cases for bulk stimulus strategies."""
+    
+    def test_frame_layout(self):
+        """Test byte offsets of the drawn ports."""
+        assert frame_layout(PORTS, ['valid', 'data', 'wide']) == [('valid', 0, 1), ('data', 1, 2), ('wide', 3, 13)]
+    
+    def test_decode_frames(self):
+        """Test decoding little-endian frames, masking and repetition."""
+        wide = (1 << 99) | 0x0102
+        frame = bytes([0xff]) + (0xfabc).to_bytes(2, 'little') + wide.to_bytes(13, 'little')
+        arrays = decode_frames(PORTS, ['valid', 'data', 'wide'], frame + bytes(16), 5)
+        
+        assert arrays['valid'].dtype == np.uint8
+        assert arrays['valid'].tolist() == [1, 0, 1, 0, 1]
+        assert arrays['data'].dtype == np.uint16
+        assert arrays['data'].tolist() == [0xabc, 0, 0xabc, 0, 0xabc]
+        assert arrays['wide'].tolist() == [wide, 0, wide, 0, wide]
+        
+        # Nothing drawn yet decodes to zeros
+        assert decode_frames(PORTS, ['data'], b'', 3)['data'].tolist() == [0, 0, 0]
+        assert decode_frames(PORTS, [], b'', 3) == {}
+    
+    def test_decode_frames_seeded_tail(self):
+        """Test that cycles past the drawn frames come from the seeded PRNG instead of repeating them."""
+        ports = ['data', 'wide']
+        data = bytes(range(15)) * 4
+        arrays = decode_frames(PORTS, ports, data, 1000, seed=7)
+        drawn = decode_frames(PORTS, ports, data, 4)
+        
+        assert all(len(array) == 1000 for array in arrays.values())
+        assert arrays['data'][:4].tolist() == drawn['data'].tolist()
+        assert arrays['wide'][:4].tolist() == drawn['wide'].tolist()
+        assert arrays['data'][4:8].tolist() != drawn['data'].tolist()
+        assert len(set(arrays['data'][4:].tolist())) > 100
+        assert int(arrays['data'].max()) < 1 << 12
+        assert max(arrays['wide']) < 1 << 100
+        
+        # The tail depends on the seed only
+        assert arrays['data'].tolist() == decode_frames(PORTS, ports, data, 1000, seed=7)['data'].tolist()
+        assert arrays['data'].tolist() != decode_frames(PORTS, ports, data, 1000, seed=8)['data'].tolist()
+        assert len(decode_frames(PORTS, ports, b'', 5, seed=1)['data']) == 5
+    
+    def test_stimulus_strategy(self):
+        """Test drawn examples against the port widths and length bounds."""
+        examples = []
+    
+        @settings(max_examples=30, deadline=None, database=None, suppress_health_check=[HealthCheck.large_base_example])
+        @given(stimulus_strategy(PORTS, ['valid', 'data', 'wide'], ['result'], min_cycles=5, max_cycles=50000))
+        def check(stimulus):
+            examples.append(stimulus.cycles)
+            assert 5 <= stimulus.cycles <= 50000
+            assert all(len(stimulus.array(port)) == stimulus.cycles for port in PORTS)
+            assert int(stimulus.array('data').max()) < 1 << 12
+            assert max(stimulus.array('wide')) < 1 << 100
+            assert not stimulus.array('result').any()
+            # Cycles past the drawn bytes do not repeat them
+            drawn = MAX_DRAW_BYTES // 16
+            if stimulus.cycles >= 2 * drawn:
+                wide = stimulus.array('wide')
+                assert wide[drawn:2 * drawn].tolist() != wide[:drawn].tolist()
+        
+        check()
+        assert len(examples) == 30
+        assert max(examples) * 16 > MAX_DRAW_BYTES
+    
+    def test_shrinking(self):
+        """Test that a failing value shrinks to a small example."""
+        failures = []
+    
+        @settings(max_examples=200, deadline=None, database=None)
+        @given(stimulus_strategy(PORTS, ['data', 'wide'], min_cycles=1, max_cycles=100))
+        def check(stimulus):
+            if (stimulus.array('data') >= 0x800).any():
+                failures.append(stimulus)
+                raise AssertionError
+        
+        with pytest.raises(AssertionError):
+            check()
+        smallest = failures[-1]
+        assert smallest.cycles == 1
+        assert smallest.array('data').tolist() == [0x800]
+        assert smallest.array('wide').tolist() == [0]
+    
+    def test_cycle_bounds(self):
+        """Test that invalid bounds are rejected."""
+        with pytest.raises(ValueError):
+            stimulus_strategy(PORTS, ['data'], min_cycles=0)
+        with pytest.raises(ValueError):
+            stimulus_strategy(PORTS, ['data'], min_cycles=10, max_cycles=5)
@@ -0,0 +1,165 @@
+import pytest
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import numpy as np
+from svapy.clocking import clocked_sequences
+from svapy.engine import SimulationEngine
+from svapy.stimulus import Stimulus
+from svapy.stream import encode_chunks, random_chunks
+from svapy.vectors import vector_layout
+from svapy.waves import WavePolicy
+
+
+FAKE_IVERILOG = """#!{python}
+import sys
+args = sys.argv[1:]
+with open(args[args.index('-o') + 1], 'w') as f:
+    f.write('binary')
+"""
+
+# Simulates y = a for a vector word {{a[7:0], y_expected[7:0], y_check}}
+FAKE_VVP = """#!{python}
+import struct, sys
+args = dict(a[1:].split('=', 1) for a in sys.argv if a.startswith('+'))
+samples = open(args['samples'], 'wb') if 'samples' in args else None
+cycle = errors = 0
+with open(args['stream']) as f:
+    for line in f:
+        word = int(line, 16)
+        a, expected, check = word >> 9, (word >> 1) & 0xff, word & 1
+        if samples:
+            samples.write(struct.pack('<I', a))
+        if check and expected != a:
+            errors += 1
+            print('SVAPY_MISMATCH cycle=%d port=y expected=%x actual=%x' % (cycle, expected, a), flush=True)
+        cycle += 1
+if samples:
+    samples.close()
+print('SVAPY_DONE cycles=%d errors=%d' % (cycle, errors))
+"""
+
+FAILING_VVP = """#!{python}
+print('vvp: unable to open input file')
+raise SystemExit(1)
+"""
+
+
+def write_script(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason="named pipes not available")
+class TestStream:
+    """Test cases for streaming stimulus through named pipes."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.ports_info = {
+            'a': {'direction': 'Input', 'width': 8},
+            'y': {'direction': 'Output', 'width': 8},
+        }
+        self.clocked_info = {
+            'clk': {'direction': 'Input', 'width': 1},
+            'rst_n': {'direction': 'Input', 'width': 1},
+            'wide': {'direction': 'Input', 'width': 100},
+            'count': {'direction': 'Output', 'width': 8},
+        }
+        self.design = os.path.join(self.temp_dir, 'passthrough.v')
+        with open(self.design, 'w') as f:
+            f.write('module passthrough(input [7:0] a, output [7:0] y); assign y = a; endmodule\n')
+        self.iverilog = os.path.join(self.temp_dir, 'iverilog')
+        self.vvp = os.path.join(self.temp_dir, 'vvp')
+        write_script(self.iverilog, FAKE_IVERILOG.format(python=sys.executable))
+        write_script(self.vvp, FAKE_VVP.format(python=sys.executable))
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def make_engine(self, vvp=None):
+        return SimulationEngine('passthrough', self.ports_info, [self.design],
+                                build_dir=os.path.join(self.temp_dir, 'build'), iverilog=self.iverilog,
+                                vvp=vvp or self.vvp, waves=WavePolicy('none'))
+    
+    def test_encode_chunks(self):
+        """Test that chunked encoding matches one long vector file."""
+        values = np.arange(10, dtype=np.uint8)
+        chunks = [{'a': values[:3], 'y': values[:3]}, {'a': values[3:], 'y': values[3:]}]
+        whole = Stimulus.from_sequences(self.ports_info, {'a': values, 'y': values})
+        layout = vector_layout(self.ports_info)
+        assert b''.join(encode_chunks(self.ports_info, chunks)) == whole.vector_hex(layout)
+        
+        # Clocked chunks: reset once, and the last cycle of a chunk is checked in the next one
+        chunks = list(random_chunks(self.clocked_info, 25, chunk_cycles=7, seed=1))
+        assert [chunk.cycles for chunk in chunks] == [7, 7, 7, 4]
+        for chunk in chunks:
+            chunk.arrays['count'] = chunk.array('wide') % 256
+        whole = Stimulus(self.clocked_info, {port: np.concatenate([chunk.array(port) for chunk in chunks])
+                                             for port in ('wide', 'count')})
+        layout = vector_layout(self.clocked_info)
+        expected = clocked_sequences(self.clocked_info, whole, 25, reset_cycles=3).vector_hex(layout)
+        assert b''.join(encode_chunks(self.clocked_info, chunks, clocked=True, reset_cycles=3)) == expected
+    
+    def test_random_chunks(self):
+        """Test random soak-test stimulus."""
+        chunks = list(random_chunks(self.clocked_info, 10, chunk_cycles=4, seed=3))
+        assert [set(chunk) for chunk in chunks] == [{'wide'}] * 3
+        assert chunks[0].array('wide').dtype == object
+        assert max(chunks[0].array('wide')) < 1 << 100
+        again = list(random_chunks(self.clocked_info, 10, chunk_cycles=4, seed=3))
+        assert chunks[1].array('wide').tolist() == again[1].array('wide').tolist()
+        
+        # The clock keeps running without data inputs
+        only_clock = {'clk': self.clocked_info['clk'], 'count': self.clocked_info['count']}
+        assert [chunk.cycles for chunk in random_chunks(only_clock, 5, chunk_cycles=5)] == [5]
+    
+    def test_run_stream(self):
+        """Test feeding stimulus and reading samples while the simulator runs."""
+        def chunks():
+            for start in range(0, 3000, 1000):
+                values = (np.arange(start, start + 1000) % 256).astype(np.uint8)
+                expected = values.copy()
+                if start == 1000:
+                    expected[5] += 1
+                yield {'a': values, 'y': expected}
+        
+        samples = []
+        result = self.make_engine().run_stream(chunks(), chunk_cycles=512,
+                                               on_samples=lambda first, arrays: samples.append((first, arrays['y'])))
+        assert result.completed and result.cycles == 3000
+        assert result.errors == 1
+        assert (result.mismatches[0].cycle, result.mismatches[0].expected) == (1005, format(1005 % 256 + 1, 'x'))
+        assert [first for first, _ in samples] == list(range(0, 3000, 512))
+        assert np.concatenate([values for _, values in samples]).tolist() == [i % 256 for i in range(3000)]
+    
+    def test_bounded_mismatches(self):
+        """Test keeping only the first mismatches and stopping on failure."""
+        def chunks(count):
+            for _ in range(count):
+                yield {'a': np.zeros(2000, dtype=np.uint8), 'y': np.ones(2000, dtype=np.uint8)}
+        
+        result = self.make_engine().run_stream(chunks(2), max_mismatches=10)
+        assert result.errors == 4000 and len(result.mismatches) == 10
+        
+        result = self.make_engine().run_stream(chunks(500), stop_on_failure=True)
+        assert result.completed and 0 < result.cycles < 500 * 2000
+    
+    def test_errors(self):
+        """Test that simulator and generator failures are reported without hanging."""
+        failing = os.path.join(self.temp_dir, 'failing_vvp')
+        write_script(failing, FAILING_VVP.format(python=sys.executable))
+        with pytest.raises(RuntimeError, match="unable to open input file"):
+            self.make_engine(failing).run_stream(random_chunks(self.ports_info, 100), on_samples=lambda *args: None)
+        
+        def broken():
+            yield {'a': [1, 2, 3]}
+            raise ValueError("generator failed")
+        
+        with pytest.raises(ValueError, match="generator failed"):
+            self.make_engine().run_stream(broken())
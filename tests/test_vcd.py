@@ -0,0 +1,144 @@
+import pytest
+import tempfile
+import os
+from svapy.vcd import VcdReader, compare_vcd, to_int
+
+
+VCD = """$date
+    Thu Jan  1 00:00:00 2026
+$end
+$version
+    Icarus Verilog
+$end
+$timescale
+    1ps
+$end
+$scope module counter_tb $end
+$var reg 1 ! clk $end
+$var reg 1 " rst_n $end
+$var wire 4 # count [3:0] $end
+$scope module dut $end
+$var wire 1 $ clk $end
+$var wire 4 # count [3:0] $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+$dumpvars
+0!
+0"
+0$
+bx #
+$end
+#1000
+1!
+1"
+1$
+b0 #
+#2000
+0!
+0$
+b1 #
+$comment this is not a value change $end
+#3000
+1!
+1$
+b10 #
+#5000
+"""
+
+
+class TestVcd:
+    """Test cases for the streaming VCD reader."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'counter_tb.vcd')
+        with open(self.path, 'w') as f:
+            f.write(VCD)
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_to_int(self):
+        """Test conversion of VCD values."""
+        assert to_int('1010') == 10
+        assert to_int('x') is None
+        assert to_int('1z') is None
+        assert to_int(None) is None
+    
+    def test_header(self):
+        """Test reading of scopes, variables and timescale."""
+        reader = VcdReader(self.path)
+        list(reader.changes())
+        assert reader.timescale == '1ps'
+        assert [s.name for s in reader.signals] == [
+            'counter_tb.clk', 'counter_tb.rst_n', 'counter_tb.count', 'counter_tb.dut.clk', 'counter_tb.dut.count'
+        ]
+        assert reader.signals[2].width == 4
+        assert reader.end_time == 5000
+    
+    def test_changes_with_filter(self):
+        """Test that only selected signals are reported."""
+        reader = VcdReader(self.path, signals=['counter_tb.count'])
+        assert list(reader.changes()) == [
+            (0, 'counter_tb.count', 'x'),
+            (1000, 'counter_tb.count', '0'),
+            (2000, 'counter_tb.count', '1'),
+            (3000, 'counter_tb.count', '10'),
+        ]
+    
+    def test_filter_by_suffix(self):
+        """Test that a short name selects every signal ending with it."""
+        reader = VcdReader(self.path, signals=['clk'])
+        names = {name for _, name, _ in reader.changes()}
+        assert names == {'counter_tb.clk', 'counter_tb.dut.clk'}
+    
+    def test_samples(self):
+        """Test per-cycle sampling, including cycles without changes."""
+        reader = VcdReader(self.path, signals=['dut.count', 'rst_n'])
+        samples = [(t, to_int(v['counter_tb.dut.count'])) for t, v in reader.samples(1000)]
+        assert samples == [(0, None), (1000, 0), (2000, 1), (3000, 2), (4000, 2), (5000, 2)]
+        
+        samples = list(VcdReader(self.path, signals=['rst_n']).samples(1000, offset=500))
+        assert [v['counter_tb.rst_n'] for _, v in samples] == ['0', '1', '1', '1', '1']
+        
+        with pytest.raises(ValueError):
+            next(reader.samples(0))
+    
+    def test_samples_are_lazy(self):
+        """Test that the reader does not consume the file ahead of the caller."""
+        reader = VcdReader(self.path, signals=['count'])
+        samples = reader.samples(1000)
+        next(samples)
+        assert reader.end_time == 0
+        samples.close()
+    
+    def test_compare_match(self):
+        """Test a stream matching the expected sequences."""
+        expected = {'dut.count': [None, 0, 1, 2, 2], 'rst_n': [0, 1]}
+        assert compare_vcd(self.path, expected, period=1000) is None
+    
+    def test_compare_first_mismatch(self):
+        """Test that comparison stops at the first mismatch."""
+        mismatch = compare_vcd(self.path, {'dut.count': [None, 0, 5, 7]}, period=1000)
+        assert mismatch is not None
+        assert (mismatch.index, mismatch.time, mismatch.expected, mismatch.actual) == (2, 2000, 5, '1')
+        
+        mismatch = compare_vcd(self.path, {'dut.count': [0]}, period=1000)
+        assert mismatch is not None
+        assert mismatch.actual == 'x'
+    
+    def test_compare_short_dump(self):
+        """Test expected values beyond the end of the dump."""
+        mismatch = compare_vcd(self.path, {'rst_n': [0, 1, 1, 1, 1, 1, 1]}, period=1000)
+        assert mismatch is not None
+        assert (mismatch.index, mismatch.actual) == (6, None)
+    
+    def test_compare_unknown_signal(self):
+        """Test comparison against a signal missing from the dump."""
+        with pytest.raises(ValueError):
+            compare_vcd(self.path, {'missing': [1]}, period=1000)
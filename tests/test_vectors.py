@@ -0,0 +1,78 @@
+import pytest
+import tempfile
+import os
+from svapy.vectors import (
+    direction_name,
+    vector_layout,
+    vector_width,
+    vector_depth,
+    pack_vectors,
+    write_vector_file
+)
+from pyverilog.vparser.ast import Input, Output
+
+
+class TestVectors:
+    """Test cases for vector file packing."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.ports_info = {
+            'clk': {'direction': Input, 'width': 1},
+            'data': {'direction': Input, 'width': 8},
+            'result': {'direction': Output, 'width': 4}
+        }
+    
+    def test_direction_name(self):
+        """Test direction name for classes and strings."""
+        assert direction_name(Input) == 'Input'
+        assert direction_name('Output') == 'Output'
+    
+    def test_vector_layout(self):
+        """Test field order and offsets."""
+        layout = vector_layout(self.ports_info)
+        
+        assert layout == [
+            ('clk', 'input', 1, 13),
+            ('data', 'input', 8, 5),
+            ('result', 'expected', 4, 1),
+            ('result', 'check', 1, 0)
+        ]
+        assert vector_width(layout) == 14
+    
+    def test_empty_layout(self):
+        """Test that modules without ports still get a one-bit word."""
+        assert vector_layout({}) == []
+        assert vector_width([]) == 1
+    
+    def test_vector_depth(self):
+        """Test depth rounding."""
+        assert vector_depth(0) == 1024
+        assert vector_depth(1024) == 1024
+        assert vector_depth(1025) == 2048
+        assert vector_depth(100000) == 131072
+    
+    def test_pack_vectors(self):
+        """Test packing with and without expected outputs."""
+        sequences = {'clk': [1, 0], 'data': [0xAB, 0x01], 'result': [0x5, 0xF]}
+        assert pack_vectors(self.ports_info, sequences, 2) == ['356b', '003f']
+        
+        sequences['result'] = None
+        assert pack_vectors(self.ports_info, sequences, 2) == ['3560', '0020']
+    
+    def test_pack_vectors_masks_values(self):
+        """Test that values are truncated to the port width."""
+        sequences = {'clk': [3], 'data': [0x1FF], 'result': None}
+        assert pack_vectors(self.ports_info, sequences, 1) == ['3fe0']
+    
+    def test_write_vector_file(self):
+        """Test writing a vector file trims to the shortest sequence."""
+        sequences = {'clk': [True, False, True], 'data': [1, 2], 'result': None}
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'vectors', 'test.hex')
+            num_cycles = write_vector_file(path, self.ports_info, sequences)
+            
+            assert num_cycles == 2
+            with open(path, 'r') as f:
+                assert f.read().split() == ['2020', '0040']
@@ -0,0 +1,95 @@
+import pytest
+import os
+import shutil
+import tempfile
+from hypothesis import given, settings, strategies as st
+from svapy.core import generate_module
+from svapy.waves import WavePolicy, final_example, new_dump_path
+
+
+class TestWaves:
+    """Test cases for waveform dumping policies."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.ports_info = {
+            'clk': {'direction': 'Input', 'width': 1},
+            'count': {'direction': 'Output', 'width': 8},
+        }
+    
+    def teardown_method(self):
+        """Cleanup test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_from_env(self):
+        """Test reading the policy from the environment."""
+        assert WavePolicy.from_env({}) == WavePolicy('failure', 'vcd', 0, ())
+        waves = WavePolicy.from_env({'SVAPY_WAVES': 'all', 'SVAPY_WAVE_FORMAT': 'fst',
+                                     'SVAPY_WAVE_DEPTH': '2', 'SVAPY_WAVE_SIGNALS': 'dut.count, dut.u_alu'})
+        assert waves == WavePolicy('all', 'fst', 2, ('dut.count', 'dut.u_alu'))
+        
+        with pytest.raises(ValueError, match="Unknown waveform policy"):
+            WavePolicy.from_env({'SVAPY_WAVES': 'sometimes'})
+        with pytest.raises(ValueError, match="Unknown waveform format"):
+            WavePolicy(format='lxt')
+    
+    def test_policy_settings(self):
+        """Test dump statements, paths and simulator arguments."""
+        assert WavePolicy().dumpvars('counter_tb') == ['$dumpvars(0, counter_tb);']
+        assert WavePolicy(depth=1, signals=('dut.count', 'clk')).dumpvars('counter_tb') == [
+            '$dumpvars(1, counter_tb.dut.count);', '$dumpvars(1, counter_tb.clk);']
+        
+        fst = WavePolicy('all', 'fst')
+        assert fst.dump_path(os.path.join('gen', 'dump', 'counter_tb_0.vcd')) == os.path.join('gen', 'dump', 'counter_tb_0.fst')
+        assert fst.run_args('iverilog') == ['-fst']
+        assert fst.run_args('verilator') == []
+        assert fst.build_flags('verilator') == ['--trace-fst']
+        assert WavePolicy().build_flags('verilator') == ['--trace']
+        
+        assert not WavePolicy('none').dump_failures
+        assert WavePolicy('failure').dump_failures and not WavePolicy('failure').dump_always
+        
+        dump_dir = os.path.join(self.temp_dir, 'dump')
+        first, second = new_dump_path('counter', fst, dump_dir), new_dump_path('counter', fst, dump_dir)
+        assert first != second and first.endswith('.fst') and os.path.isdir(dump_dir)
+    
+    def test_final_example(self):
+        """Test that only the final replay of a shrunk example counts as final."""
+        assert final_example()
+        seen = []
+        
+        @settings(max_examples=50, database=None)
+        @given(st.integers(0, 100))
+        def check(value):
+            seen.append((value, final_example()))
+            assert value < 10
+        
+        with pytest.raises(AssertionError):
+            check()
+        assert seen[-1] == (10, True)
+        assert not any(final for _, final in seen[:-1])
+    
+    def test_generated_testbenches(self, monkeypatch):
+        """Test that generated testbenches only dump on request by default."""
+        namespace = {}
+        exec(generate_module('counter', self.ports_info), namespace)
+        drive_counter = namespace['drive_counter']
+        monkeypatch.chdir(self.temp_dir)
+        tests = os.path.join('gen', 'tests')
+        
+        drive_counter([0, 1], [0, 0], mode='unrolled')
+        with open(os.path.join(tests, os.listdir(tests)[0])) as f:
+            source = f.read()
+        assert 'if (!$value$plusargs("dump=%s", dump_file)) dump_file = "";' in source
+        assert '$dumpvars(0, counter_tb);' in source
+        shutil.rmtree(tests)
+        
+        monkeypatch.setenv('SVAPY_WAVES', 'all')
+        monkeypatch.setenv('SVAPY_WAVE_FORMAT', 'fst')
+        monkeypatch.setenv('SVAPY_WAVE_SIGNALS', 'dut')
+        drive_counter([0, 1], [0, 0], mode='vectors')
+        with open(os.path.join(tests, os.listdir(tests)[0])) as f:
+            source = f.read()
+        assert '.fst";' in source
+        assert '$dumpvars(0, counter_tb.dut);' in source